@@ -7,6 +7,7 @@ import tensorflow as tf
 from collections import OrderedDict
 
 import deep_architect.helpers.tensorflow_eager_support as htfe
+import deep_architect.core as co
 import deep_architect.modules as mo
 import deep_architect.contrib.misc.search_spaces.tensorflow.cnn2d as cnn2d
 from deep_architect.contrib.deep_learning_backend.tensorflow_eager_ops import (
@@ -17,9 +18,54 @@ from deep_architect.hyperparameters import Discrete as D
 from deep_architect.hyperparameters import Bool
 
 
-def cell(input_fn, node_fn, output_fn, h_connections, num_nodes, channels):
+def get_cell_constraint_fn(num_nodes, max_num_edges=9):
+    """Returns a function that checks if the connections of a cell assigned so
+    far can still lead to a valid cell.
 
-    def substitution_fn(dh):
+    Applies the same checks as the substitution function of the cell to the
+    connections that have been assigned, so samplers can avoid choosing
+    connections that would make it raise an error.
+    """
+
+    def fn(dh):
+        if sum(v for v in dh.values() if v) > max_num_edges:
+            return False
+        for i in range(1, num_nodes + 2):
+            ins = [dh.get('%d_%d' % (in_id, i)) for in_id in range(i)]
+            outs = [
+                dh.get('%d_%d' % (i, out_id))
+                for out_id in range(i + 1, num_nodes + 2)
+            ]
+            # unassigned connections are None, so they may still be used.
+            no_ins = all(v is not None and not v for v in ins)
+            no_outs = all(v is not None and not v for v in outs)
+            if i == num_nodes + 1:
+                if no_ins:
+                    return False
+            elif (no_ins and any(outs)) or (no_outs and any(ins)):
+                return False
+        return True
+
+    return fn
+
+
+def get_connection_name_to_hparam(h_connections, num_nodes):
+    return {
+        '%d_%d' % pair: h_connections[ix] for ix, pair in enumerate(
+            itertools.combinations(range(num_nodes + 2), 2))
+    }
+
+
+# NOTE: the numbers of inputs, outputs, and channels of the vertices of a cell
+# only depend on its connections and on its number of channels. they are
+# computed by a dependent hyperparameter, with a table for each number of nodes
+# and of channels that is shared by the cells of all the sampled architectures.
+_num_nodes_and_channels_to_memo = {}
+
+
+def get_vertex_channels_fn(num_nodes, channels):
+
+    def fn(dh):
         num_ins = [
             sum([dh['%d_%d' % (in_id, out_id)]
                  for in_id in range(out_id)])
@@ -35,14 +81,17 @@ def cell(input_fn, node_fn, output_fn, h_connections, num_nodes, channels):
 
         for i in range(1, num_nodes + 1):
             if num_outs[i] > 0 and num_ins[i] == 0:
-                raise ValueError('Node exists with no path to input')
+                raise co.InvalidArchitectureError(
+                    'Node exists with no path to input')
             if num_ins[i] > 0 and num_outs[i] == 0:
-                raise ValueError('Node exists with no path to output')
+                raise co.InvalidArchitectureError(
+                    'Node exists with no path to output')
         if num_ins[-1] == 0:
-            raise ValueError('No path exists between input and output')
+            raise co.InvalidArchitectureError(
+                'No path exists between input and output')
 
         if sum(num_ins) > 9:
-            raise ValueError('More than 9 edges')
+            raise co.InvalidArchitectureError('More than 9 edges')
 
         if dh['%d_%d' % (0, num_nodes + 1)]:
             num_ins[-1] -= 1
@@ -68,6 +117,16 @@ def cell(input_fn, node_fn, output_fn, h_connections, num_nodes, channels):
                     if dh['%d_%d' % (in_id, out_id)]:
                         vertex_channels[in_id] = max(vertex_channels[in_id],
                                                      vertex_channels[out_id])
+        # the values are shared through the table, so they are not mutable.
+        return tuple(num_ins), tuple(num_outs), tuple(vertex_channels)
+
+    return fn
+
+
+def cell(input_fn, node_fn, output_fn, h_connections, num_nodes, channels):
+
+    def substitution_fn(dh):
+        num_ins, num_outs, vertex_channels = dh['vertex_channels']
 
         nodes = [mo.identity()]
         nodes += [
@@ -101,10 +160,14 @@ def cell(input_fn, node_fn, output_fn, h_connections, num_nodes, channels):
 
         return nodes[0][0], nodes[-1][1]
 
-    name_to_hparam = {}
-    for ix, hparam in enumerate(itertools.combinations(range(num_nodes + 2),
-                                                       2)):
-        name_to_hparam['%d_%d' % hparam] = h_connections[ix]
+    name_to_hparam = get_connection_name_to_hparam(h_connections, num_nodes)
+    key = (num_nodes, channels)
+    if key not in _num_nodes_and_channels_to_memo:
+        _num_nodes_and_channels_to_memo[key] = co.MemoTable()
+    name_to_hparam['vertex_channels'] = co.DependentHyperparameter(
+        get_vertex_channels_fn(num_nodes, channels),
+        dict(name_to_hparam),
+        memo=_num_nodes_and_channels_to_memo[key])
     return mo.substitution_module('NasbenchCell',
                                   substitution_fn,
                                   name_to_hparam, ['in'], ['out'],
@@ -164,6 +227,10 @@ def create_cell_generator(num_nodes):
         Bool(name='in_%d_%d' % (in_id, out_id))
         for (in_id, out_id) in itertools.combinations(range(num_nodes + 2), 2)
     ]
+    # NOTE: the connections are shared by all the cells, so the constraint is
+    # created once rather than once per cell.
+    co.Constraint(get_cell_constraint_fn(num_nodes),
+                  get_connection_name_to_hparam(h_connections, num_nodes))
 
     cell_ops = [
         D(['conv1', 'conv3', 'max3'], name='node_%d' % i)
@@ -177,7 +244,7 @@ def create_cell_generator(num_nodes):
                  batch_normalization(),
                  relu()]), lambda num_inputs, node_id, channels:
             intermediate_node_fn(num_inputs, node_id, channels, cell_ops),
-            concat, h_connections, 5, filters)
+            concat, h_connections, num_nodes, filters)
 
     return generate
 
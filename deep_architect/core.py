@@ -1,5 +1,13 @@
-from collections import OrderedDict
-from six import iterkeys, itervalues, iteritems
+import sys
+import threading
+import weakref
+import itertools
+from collections import OrderedDict, deque
+from six import iterkeys, itervalues, iteritems, add_metaclass
+
+# NOTE: dictionaries keep the insertion order from python 3.7 onwards and use
+# less memory than ordered dictionaries.
+_ordered_dict = dict if sys.version_info >= (3, 7) else OrderedDict
 
 
 def sorted_values_by_key(d):
@@ -7,9 +15,10 @@ def sorted_values_by_key(d):
 
 
 class OrderedSet:
+    __slots__ = ['d']
 
     def __init__(self):
-        self.d = OrderedDict()
+        self.d = _ordered_dict()
 
     def add(self, x):
         if x not in self.d:
@@ -31,15 +40,114 @@ class OrderedSet:
         return item in self.d
 
 
+if sys.version_info >= (3, 7):
+    import contextvars
+
+    def _get_default_scope():
+        return _default_scope.get()
+
+    def _set_default_scope(scope):
+        return _default_scope.set(scope)
+
+    def _restore_default_scope(token):
+        _default_scope.reset(token)
+
+else:
+
+    def _get_default_scope():
+        return getattr(_default_scope, 'scope', _global_default_scope)
+
+    def _set_default_scope(scope):
+        token = _get_default_scope()
+        _default_scope.scope = scope
+        return token
+
+    def _restore_default_scope(token):
+        _default_scope.scope = token
+
+
+class _ScopeMeta(type):
+    """Makes ``Scope.default_scope`` refer to the default scope of the
+    current context."""
+
+    @property
+    def default_scope(cls):
+        return _get_default_scope()
+
+    @default_scope.setter
+    def default_scope(cls, scope):
+        _set_default_scope(scope)
+
+
+@add_metaclass(_ScopeMeta)
 class Scope:
     """A scope is used to help assign unique readable names to addressable objects.
 
     A scope keeps references to modules, hyperparameters, inputs, and outputs.
-    """
 
-    def __init__(self):
-        self.name_to_elem = OrderedDict()
-        self.elem_to_name = OrderedDict()
+    Unique names are created by adding a numbered suffix to a prefix. The
+    scope keeps a counter for each prefix, so creating a new name takes
+    constant time, regardless of the number of objects already registered.
+
+    If ``lazy_names`` is ``True``, the string names are not created when the
+    objects are registered. The scope keeps the prefix and the number (or the
+    object from which the name is derived), and builds the string only when
+    the name is requested, e.g., by
+    :meth:`deep_architect.core.Addressable.get_name` or ``repr``. This
+    reduces the time and memory spent constructing large search spaces.
+    The names are the same in both cases.
+
+    If ``weak_references`` is ``True``, the scope only keeps weak references
+    to the registered objects, so objects that are no longer used elsewhere,
+    e.g., the architectures sampled by a searcher, are garbage collected even
+    if the scope is kept alive. Names of collected objects are not reused.
+
+    The default scope, ``Scope.default_scope``, is used by addressable objects
+    created without a scope. It is local to the current thread and, on
+    Python 3.7+, to the current context (e.g., an asyncio task), so
+    architectures sampled concurrently get separate names as long as each
+    thread or task sets its own default scope, either through
+    :meth:`reset_default_scope`, by assigning ``Scope.default_scope``, or by
+    using a scope as a context manager:
+
+    .. code:: python
+
+        with Scope():
+            inputs, outputs = search_space_fn()
+
+    Threads and contexts that never set a default scope share a global one.
+
+    Args:
+        lazy_names (bool, optional): Whether to build names only when they are
+            requested.
+        weak_references (bool, optional): Whether to keep weak references to
+            the registered objects rather than regular ones.
+    """
+    __slots__ = [
+        'name_to_elem', 'elem_to_name', 'prefix_to_count', 'lazy_names',
+        'weak_references', '_tokens'
+    ]
+
+    def __init__(self, lazy_names=False, weak_references=False):
+        if weak_references:
+            self.name_to_elem = weakref.WeakValueDictionary()
+            self.elem_to_name = weakref.WeakKeyDictionary()
+        else:
+            self.name_to_elem = _ordered_dict()
+            self.elem_to_name = _ordered_dict()
+        self.prefix_to_count = {}
+        self.lazy_names = lazy_names
+        self.weak_references = weak_references
+        self._tokens = []
+
+    def __enter__(self):
+        """Makes this scope the default scope of the current context until
+        the end of the ``with`` block."""
+        self._tokens.append(_set_default_scope(self))
+        return self
+
+    def __exit__(self, *args):
+        _restore_default_scope(self._tokens.pop())
 
     def register(self, name, elem):
         """Registers an addressable object with the desired name.
@@ -47,12 +155,19 @@ class Scope:
         The name cannot exist in the scope, otherwise asserts ``False``.
 
         Args:
-            name (str): Unique name.
+            name (str): Unique name. If the scope uses lazy names, it can also
+                be a name returned by :meth:`get_unused_name` or
+                :meth:`get_child_name`.
             elem (deep_architect.core.Addressable): Addressable object to register.
         """
-        assert name not in self.name_to_elem
         assert isinstance(elem, Addressable)
-        self.name_to_elem[name] = elem
+        if isinstance(name, tuple):
+            assert self.lazy_names
+            # NOTE: lazy names are only added to name_to_elem when looking up
+            # an element by name.
+        else:
+            assert name not in self.name_to_elem
+            self.name_to_elem[name] = elem
         self.elem_to_name[elem] = name
 
     def get_unused_name(self, prefix):
@@ -62,15 +177,43 @@ class Scope:
             prefix (str): Prefix of the desired name.
 
         Returns:
-            str: Unique name in the current scope.
+            str: Unique name in the current scope. If the scope uses lazy
+                names, a tuple from which the name is built when requested.
         """
-        i = 0
-        while True:
-            name = prefix + str(i)
-            if name not in self.name_to_elem:
-                break
-            i += 1
-        return name
+        i = self.prefix_to_count.get(prefix, 0)
+        if self.lazy_names:
+            self.prefix_to_count[prefix] = i + 1
+            return (prefix, i)
+        else:
+            # NOTE: names registered directly may already use the next number.
+            while True:
+                name = prefix + str(i)
+                i += 1
+                if name not in self.name_to_elem:
+                    break
+            self.prefix_to_count[prefix] = i
+            return name
+
+    def get_child_name(self, elem, suffix):
+        """Creates a name by adding a suffix to the name of an object registered
+        in the scope.
+
+        Args:
+            elem (deep_architect.core.Addressable): Addressable object
+                registered in the scope.
+            suffix (str): Suffix to add to the name of the object.
+
+        Returns:
+            str: Name in the current scope. If the scope uses lazy names, a
+                tuple from which the name is built when requested.
+        """
+        if self.lazy_names:
+            # NOTE: the name must not keep the object alive in a scope with
+            # weak references.
+            return (weakref.ref(elem) if self.weak_references else elem,
+                    suffix)
+        else:
+            return self.elem_to_name[elem] + suffix
 
     def get_name(self, elem):
         """Get the name of the addressable object registered in the scope.
@@ -84,7 +227,16 @@ class Scope:
         Returns:
             str: Name with which the object was registered in the scope.
         """
-        return self.elem_to_name[elem]
+        name = self.elem_to_name[elem]
+        if isinstance(name, tuple):
+            x, suffix = name
+            if isinstance(x, weakref.ref):
+                name = self.get_name(x()) + suffix
+            elif isinstance(x, Addressable):
+                name = self.get_name(x) + suffix
+            else:
+                name = x + str(suffix)
+        return name
 
     def get_elem(self, name):
         """Get the object that is registered in the scope with the desired name.
@@ -97,6 +249,13 @@ class Scope:
         Returns:
             str: Addressable object with the corresponding name.
         """
+        if self.lazy_names and name not in self.name_to_elem:
+            for elem, elem_name in list(iteritems(self.elem_to_name)):
+                if isinstance(elem_name, tuple):
+                    elem_name = self.get_name(elem)
+                    assert elem_name not in self.name_to_elem
+                    self.name_to_elem[elem_name] = elem
+                    self.elem_to_name[elem] = elem_name
         return self.name_to_elem[name]
 
     @staticmethod
@@ -105,9 +264,13 @@ class Scope:
         Scope.default_scope = Scope()
 
 
-# NOTE: is this called once for each time core is imported?
-# TODO: check.
-Scope.default_scope = Scope()
+# NOTE: default scope of the threads and contexts that do not set one.
+_global_default_scope = Scope()
+if sys.version_info >= (3, 7):
+    _default_scope = contextvars.ContextVar('default_scope',
+                                            default=_global_default_scope)
+else:
+    _default_scope = threading.local()
 
 
 class Addressable:
@@ -120,6 +283,7 @@ class Addressable:
             object will be registered.
         name (str): Unique name used to register the addressable object.
     """
+    __slots__ = ['scope', '__weakref__']
 
     def __init__(self, scope, name):
         scope.register(name, self)
@@ -166,6 +330,9 @@ class Hyperparameter(Addressable):
             hyperparameter. If none is given, uses the class name to derive
             the name.
     """
+    __slots__ = [
+        'assign_done', 'modules', 'dependent_hyperps', 'constraints', 'val'
+    ]
 
     def __init__(self, scope=None, name=None):
         scope = scope if scope is not None else Scope.default_scope
@@ -175,7 +342,10 @@ class Hyperparameter(Addressable):
 
         self.assign_done = False
         self.modules = OrderedSet()
-        self.dependent_hyperps = OrderedSet()
+        # NOTE: most hyperparameters have no dependent hyperparameters, so the
+        # ordered set is only created once the first one is registered.
+        self.dependent_hyperps = ()
+        self.constraints = ()
 
         self.val = None
 
@@ -201,15 +371,14 @@ class Hyperparameter(Addressable):
         self.assign_done = True
         self.val = val
 
-        # calls update on the dependent modules to signal that this hyperparameter
-        # has been set, and trigger any relevant local changes.
-        for m in self.modules:
-            m._update()
-
-        # calls updates on the dependent hyperparameters.
         for h in self.dependent_hyperps:
-            if not h.assign_done:
-                h._update()
+            h._num_pending -= 1
+        # calls update on the dependent modules to signal that this hyperparameter
+        # has been set, and trigger any relevant local changes, and then on the
+        # dependent hyperparameters.
+        if len(self.modules) > 0 or len(self.dependent_hyperps) > 0:
+            _get_update_queue().add(
+                itertools.chain(self.modules, self.dependent_hyperps))
 
     def get_value(self):
         """Get the value assigned to the hyperparameter.
@@ -223,6 +392,15 @@ class Hyperparameter(Addressable):
         assert self.assign_done
         return self.val
 
+    def get_domain_size(self):
+        """Number of values that the hyperparameter can take.
+
+        Returns:
+            int or None: Number of possible values, or ``None`` if the
+                hyperparameter does not have a finite list of values.
+        """
+        return None
+
     def _register_module(self, module):
         """Registers a module as being dependent of this hyperparameter.
 
@@ -240,8 +418,34 @@ class Hyperparameter(Addressable):
         # NOTE: for now, it is odd to register the same hyperparameter multiple times.
         assert hyperp not in self.dependent_hyperps
         assert isinstance(hyperp, DependentHyperparameter)
+        if len(self.dependent_hyperps) == 0:
+            self.dependent_hyperps = OrderedSet()
         self.dependent_hyperps.add(hyperp)
 
+    def _register_constraint(self, constraint):
+        """Registers a constraint on the value of this hyperparameter.
+
+        Args:
+            constraint (deep_architect.core.Constraint): Constraint that
+                involves this hyperparameter.
+        """
+        if len(self.constraints) == 0:
+            self.constraints = []
+        self.constraints.append(constraint)
+
+    def is_value_allowed(self, val):
+        """Checks if assigning a value to the hyperparameter satisfies the
+        constraints that involve it, given the values of the hyperparameters
+        assigned so far. See :class:`Constraint`.
+
+        Args:
+            val (object): Candidate value for the hyperparameter.
+
+        Returns:
+            bool: ``False`` if the value cannot lead to a valid architecture.
+        """
+        return all(c.is_satisfiable(self, val) for c in self.constraints)
+
     def _check_value(self, val):
         """Checks if the value is valid for the hyperparameter.
 
@@ -270,18 +474,32 @@ class DependentHyperparameter(Hyperparameter):
             hyperparameter in.
         name (str, optional): Name from which the name of the hyperparameter
             in the scope is derived.
+        memo (deep_architect.core.MemoTable, optional): Table with the values
+            previously computed by ``fn``. If given, ``fn`` is only called for
+            combinations of values of the dependent hyperparameters that are
+            not in the table. The same table should be used for all the
+            hyperparameters created with the same function, e.g., across the
+            architectures sampled from a search space.
     """
+    __slots__ = ['_hyperps', '_fn', '_memo', '_num_pending']
 
-    def __init__(self, fn, hyperps, scope=None, name=None):
+    def __init__(self, fn, hyperps, scope=None, name=None, memo=None):
         Hyperparameter.__init__(self, scope, name)
         # NOTE: this assert may or may not be necessary.
         # assert isinstance(hyperps, OrderedDict)
-        self._hyperps = OrderedDict([(k, hyperps[k]) for k in sorted(hyperps)])
+        self._hyperps = _ordered_dict([
+            (k, hyperps[k]) for k in sorted(hyperps)
+        ])
         self._fn = fn
+        self._memo = memo
 
         # registering the dependencies.
         for h in itervalues(self._hyperps):
             h._register_dependent_hyperparameter(self)
+        # number of hyperparameters that still need to be assigned. updated
+        # by the hyperparameters when they are assigned.
+        self._num_pending = sum(
+            1 for h in itervalues(self._hyperps) if not h.has_value_assigned())
 
         self._update()
 
@@ -289,16 +507,250 @@ class DependentHyperparameter(Hyperparameter):
         """Checks if the hyperparameter is ready to be set, and sets it if that
         is the case.
         """
-        # assert not self.has_value_assigned()
-        if all(h.has_value_assigned() for h in itervalues(self._hyperps)):
+        if (not self.assign_done) and self._num_pending == 0:
             dh = {name: h.get_value() for name, h in iteritems(self._hyperps)}
-            v = self._fn(dh)
+            if self._memo is None:
+                v = self._fn(dh)
+            else:
+                v = self._memo.get_value(self._fn, dh)
             self.assign_value(v)
 
     def _check_value(self, val):
         pass
 
 
+class Constraint:
+    """Condition that the values of a set of hyperparameters must satisfy for
+    the architecture to be valid.
+
+    The constraint is checked as the hyperparameters get assigned, so
+    samplers can avoid choosing values that cannot lead to a valid
+    architecture (see :meth:`Hyperparameter.is_value_allowed`), rather than
+    finding out once the search space is fully specified, e.g., when a
+    substitution function raises an error for an invalid combination of
+    values. The function is called with the values of the hyperparameters
+    assigned so far, so it must return ``True`` for partial assignments that
+    can still be completed into a valid one. Assigning a value does not check
+    the constraint, so replaying sequences of values is not affected.
+    Samplers raise :class:`InvalidArchitectureError` if no value of a
+    hyperparameter satisfies its constraints.
+
+    Args:
+        fn (dict[str, object] -> bool): Function that is called with a
+            dictionary with the values of the assigned hyperparameters and
+            returns ``False`` if the values cannot lead to a valid
+            architecture.
+        hyperps (dict[str, deep_architect.core.Hyperparameter]): Dictionary
+            mapping names to hyperparameters. The names are used as keys in
+            the dictionary passed to ``fn``.
+    """
+    __slots__ = ['_hyperps', '_fn']
+
+    def __init__(self, fn, hyperps):
+        self._hyperps = _ordered_dict([
+            (k, hyperps[k]) for k in sorted(hyperps)
+        ])
+        self._fn = fn
+        for h in itervalues(self._hyperps):
+            h._register_constraint(self)
+
+    def is_satisfiable(self, hyperp=None, val=None):
+        """Checks if the constraint can still be satisfied.
+
+        Args:
+            hyperp (deep_architect.core.Hyperparameter, optional):
+                Unassigned hyperparameter to consider assigned to ``val``.
+            val (object, optional): Candidate value for ``hyperp``.
+
+        Returns:
+            bool: ``False`` if the values assigned so far (and the candidate
+                value) cannot lead to a valid architecture.
+        """
+        dh = {}
+        for name, h in iteritems(self._hyperps):
+            if h is hyperp:
+                dh[name] = val
+            elif h.has_value_assigned():
+                dh[name] = h.get_value()
+        return self._fn(dh)
+
+
+class InvalidArchitectureError(ValueError):
+    """Raised while specifying a search space when the values assigned so
+    far cannot lead to a valid architecture.
+
+    Substitution functions raise it for invalid combinations of values, and
+    samplers raise it when no value of a hyperparameter satisfies its
+    constraints (see :class:`Constraint`). Samplers reject the architecture
+    and try again with a new search space, e.g.,
+    :func:`deep_architect.searchers.common.sample_valid`. Other errors are
+    not caught by the samplers.
+    """
+
+
+class MemoTable:
+    """Bounded table with the values computed by the function of a dependent
+    hyperparameter for each combination of values of the hyperparameters it
+    depends on.
+
+    The table is meant to be created once per search space, e.g., next to the
+    search space function, and shared by the dependent hyperparameters created
+    with the same function in the architectures sampled from the search space.
+    See :class:`DependentHyperparameter`. The least recently used values are
+    dropped once the table is full. Combinations with values that are not
+    hashable are not kept. The table can be shared between threads.
+
+    Args:
+        max_size (int, optional): Maximum number of values in the table.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.key_to_val = OrderedDict()
+        self.num_hits = 0
+        self.num_misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.key_to_val)
+
+    def get_value(self, fn, dh):
+        """Gets the value for the values of the hyperparameters, calling the
+        function if it is not in the table.
+
+        Args:
+            fn (dict[str, object] -> object): Function used to compute the
+                value.
+            dh (dict[str, object]): Values of the hyperparameters, passed to
+                the function.
+
+        Returns:
+            object: Value computed by the function.
+        """
+        key = tuple(sorted(iteritems(dh)))
+        try:
+            with self.lock:
+                v = self.key_to_val.pop(key)
+                self.key_to_val[key] = v
+                self.num_hits += 1
+            return v
+        except KeyError:
+            pass
+        except TypeError:
+            return fn(dh)
+
+        v = fn(dh)
+        with self.lock:
+            self.num_misses += 1
+            self.key_to_val[key] = v
+            if len(self.key_to_val) > self.max_size:
+                self.key_to_val.popitem(last=False)
+        return v
+
+
+class _UpdateQueue:
+    """Calls the update operations of modules and hyperparameters iteratively.
+
+    Assigning a value to a hyperparameter calls :meth:`Module._update` on its
+    modules and on its dependent hyperparameters. These may create new
+    modules and assign other hyperparameters, e.g., in the substitution
+    function of a substitution module, which would lead to deep recursion for
+    nested search spaces. Instead, the objects to update are added to a
+    queue that is processed by the outermost call, so the depth of the
+    search space is not limited by the recursion limit. Each thread has its
+    own queue (see :func:`_get_update_queue`).
+
+    As a consequence, the objects created by a substitution function may be
+    substituted only after the function returns. Substitutions are recorded
+    with :meth:`record_substitution`, and once the queue is empty, the inputs
+    and outputs of the substituted modules that refer to inputs and outputs
+    replaced by a later substitution are updated.
+
+    The number of substitutions done so far in all threads is kept in
+    ``_UpdateQueue.num_substitutions``, so that
+    :func:`unassigned_independent_hyperparameter_iterator` can tell whether
+    assigning a value led to a substitution.
+    """
+    __slots__ = [
+        'queue', 'is_processing', 'substituted_modules', 'replacements'
+    ]
+    num_substitutions = 0
+
+    def __init__(self):
+        self.queue = deque()
+        self.is_processing = False
+        self.substituted_modules = []
+        self.replacements = {}
+
+    def add(self, xs):
+        """Calls ``_update`` on the objects after the ones already in the
+        queue.
+
+        Args:
+            xs (iterable): Modules and hyperparameters to update.
+        """
+        queue = self.queue
+        queue.extend(xs)
+        if not self.is_processing:
+            self.is_processing = True
+            try:
+                while queue:
+                    queue.popleft()._update()
+                if len(self.substituted_modules) > 0:
+                    self._resolve_replacements()
+            finally:
+                self.is_processing = False
+                queue.clear()
+                if len(self.replacements) > 0:
+                    self.substituted_modules = []
+                    self.replacements = {}
+
+    def record_substitution(self, module, replacements, is_pending):
+        """Records the inputs and outputs replaced by a substitution.
+
+        Args:
+            module (deep_architect.core.Module): Module whose inputs and
+                outputs have been replaced.
+            replacements (list[(object, object)]): Pairs with an input or
+                output that has been replaced and its replacement.
+            is_pending (bool): Whether some of the replacements belong to
+                modules that have not been substituted yet, in which case
+                the inputs and outputs of the module are updated once the
+                queue is empty.
+        """
+        # NOTE: increments from different threads may be lost, but the count
+        # still changes.
+        _UpdateQueue.num_substitutions += 1
+        if self.is_processing:
+            self.replacements.update(replacements)
+            if is_pending:
+                self.substituted_modules.append(module)
+
+    def _resolve_replacements(self):
+        for m in self.substituted_modules:
+            for d in [m.inputs, m.outputs]:
+                for name, x in list(iteritems(d)):
+                    replaced = []
+                    while x in self.replacements:
+                        replaced.append(x)
+                        x = self.replacements[x]
+                    # shortens the chains of replacements for later lookups.
+                    for y in replaced:
+                        self.replacements[y] = x
+                    d[name] = x
+
+
+_thread_state = threading.local()
+
+
+def _get_update_queue():
+    """Returns the update queue of the current thread."""
+    queue = getattr(_thread_state, 'update_queue', None)
+    if queue is None:
+        queue = _thread_state.update_queue = _UpdateQueue()
+    return queue
+
+
 class Input(Addressable):
     """Manages input connections.
 
@@ -314,9 +766,10 @@ class Input(Addressable):
             going to be registered in.
         name (str): Unique name with which to register the input object.
     """
+    __slots__ = ['module', 'from_output', 'val']
 
     def __init__(self, module, scope, name):
-        name = '.'.join([module.get_name(), 'I', name])
+        name = scope.get_child_name(module, '.I.' + name)
         Addressable.__init__(self, scope, name)
 
         self.module = module
@@ -359,6 +812,8 @@ class Input(Addressable):
         assert self.from_output is None
         self.from_output = from_output
         from_output.to_inputs.append(self)
+        self.module._num_connection_changes += 1
+        from_output.module._num_connection_changes += 1
 
     def disconnect(self):
         """Disconnects the input from the output it is connected to.
@@ -368,6 +823,8 @@ class Input(Addressable):
         """
         assert self.from_output is not None
         self.from_output.to_inputs.remove(self)
+        self.from_output.module._num_connection_changes += 1
+        self.module._num_connection_changes += 1
         self.from_output = None
 
     def reroute_connected_output(self, to_input):
@@ -407,9 +864,10 @@ class Output(Addressable):
             going to be registered in.
         name (str): Unique name with which to register the output object.
     """
+    __slots__ = ['module', 'to_inputs', 'val']
 
     def __init__(self, module, scope, name):
-        name = '.'.join([module.get_name(), 'O', name])
+        name = scope.get_child_name(module, '.O.' + name)
         Addressable.__init__(self, scope, name)
 
         self.module = module
@@ -498,6 +956,10 @@ class Module(Addressable):
             module is going to be registered in.
         name (str, optional): Unique name with which to register the module.
     """
+    __slots__ = [
+        'inputs', 'outputs', 'hyperps', '_is_compiled',
+        '_num_connection_changes'
+    ]
 
     def __init__(self, scope=None, name=None):
         scope = scope if scope is not None else Scope.default_scope
@@ -505,10 +967,13 @@ class Module(Addressable):
             ['M', (name if name is not None else self._get_base_name()) + '-']))
         Addressable.__init__(self, scope, name)
 
-        self.inputs = OrderedDict()
-        self.outputs = OrderedDict()
-        self.hyperps = OrderedDict()
+        self.inputs = _ordered_dict()
+        self.outputs = _ordered_dict()
+        self.hyperps = _ordered_dict()
         self._is_compiled = False
+        # incremented when one of the inputs or outputs is connected or
+        # disconnected. see ModuleEvalSeqCache.
+        self._num_connection_changes = 0
 
     def _register_input(self, name):
         """Creates a new input with the chosen local name.
@@ -670,34 +1135,66 @@ def extract_unique_modules(input_or_output_lst):
     return list(ms)
 
 
-# assumes that the inputs provided are sufficient to evaluate all the network.
-# TODO: add the more general functionality that allows us to compute the sequence
-# of forward operations for a subgraph of the full computational graph.
-def determine_module_eval_seq(input_lst):
+def _get_needed_modules(input_lst, output_lst):
+    """Modules that have to be evaluated to compute the values of the outputs,
+    starting from the values of the inputs."""
+    input_memo = set(input_lst)
+    module_memo = set()
+    ms = extract_unique_modules(output_lst)
+    module_memo.update(ms)
+    while len(ms) > 0:
+        m = ms.pop()
+        for ix in itervalues(m.inputs):
+            if ix.is_connected() and ix not in input_memo:
+                m_prev = ix.get_connected_output().get_module()
+                if m_prev not in module_memo:
+                    module_memo.add(m_prev)
+                    ms.append(m_prev)
+    return module_memo
+
+
+def determine_module_eval_seq(input_lst, output_lst=None):
     """Computes the module forward evaluation sequence necessary to evaluate
     the computational graph starting from the provided inputs.
 
     The computational graph is a directed acyclic graph. This function sorts
-    the modules topologically based on their dependencies. It is assumed that
-    the inputs in the list provided are sufficient to compute forward for all
-    modules in the graph. See also: :func:`forward`.
+    the modules topologically based on their dependencies. Only modules whose
+    inputs can be computed from the provided inputs are included. If a list of
+    outputs is given, only the modules needed to compute the values of those
+    outputs are included. See also: :func:`forward`.
 
     Args:
-        input_lst (list[deep_architect.core.Input]): List of inputs sufficient
-            to compute the forward computation of the whole graph through propagation.
+        input_lst (list[deep_architect.core.Input]): List of inputs from which
+            to start the forward computation through propagation.
+        output_lst (list[deep_architect.core.Output], optional): List of
+            outputs whose values are needed. If none is given, all the modules
+            that can be reached from the inputs are included.
 
     Returns:
         list[deep_architect.core.Module]:
             List of modules ordered in a way that allows to call forward on the
             modules in that order.
     """
+    module_seq, _ = _determine_module_eval_seq(input_lst, output_lst)
+    return module_seq
+
+
+def _determine_module_eval_seq(input_lst, output_lst):
+    """Module evaluation sequence, and modules visited to compute it.
+
+    The sequence only changes if an input or an output of one of the visited
+    modules is connected or disconnected.
+    """
+    needed_modules = (_get_needed_modules(input_lst, output_lst)
+                      if output_lst is not None else None)
     module_seq = []
     module_memo = set()
     input_memo = set(input_lst)
     ms = extract_unique_modules(input_lst)
     for m in ms:
         if m not in module_memo and all(
-                ix in input_memo for ix in itervalues(m.inputs)):
+                ix in input_memo for ix in itervalues(m.inputs)) and (
+                    needed_modules is None or m in needed_modules):
             module_seq.append(m)
             module_memo.add(m)
 
@@ -706,7 +1203,70 @@ def determine_module_eval_seq(input_lst):
                 input_memo.update(ix_lst)
                 m_lst = [ix.get_module() for ix in ix_lst]
                 ms.extend(m_lst)
-    return module_seq
+    visited_modules = set(ms)
+    if needed_modules is not None:
+        visited_modules.update(needed_modules)
+    return module_seq, list(visited_modules)
+
+
+class ModuleEvalSeqCache:
+    """Keeps the module evaluation sequences computed for the most recent
+    combinations of inputs and outputs.
+
+    Each module counts the times its inputs and outputs are connected or
+    disconnected, which includes the substitution of substitution modules. A
+    cached sequence is recomputed if the count changed for any of the modules
+    visited to compute it, so :meth:`get` can be called before each forward
+    pass to get a valid sequence without recomputing it each time. Changes to
+    other graphs, e.g., architectures sampled in other threads, do not
+    invalidate the sequence.
+
+    .. note::
+        The cache keeps references to the modules in the sequences. Use one
+        cache per architecture, e.g., in the object wrapping it, rather than a
+        cache shared by all architectures, so it does not keep architectures
+        alive.
+
+    Args:
+        max_size (int, optional): Maximum number of sequences to keep.
+    """
+
+    def __init__(self, max_size=1):
+        self.max_size = max_size
+        self.key_to_seq = OrderedDict()
+
+    def get(self, input_lst, output_lst=None):
+        """Gets the module evaluation sequence, computing it with
+        :func:`determine_module_eval_seq` if it is not in the cache or the
+        graph has changed.
+
+        Args:
+            input_lst (list[deep_architect.core.Input]): List of inputs from
+                which to start the forward computation through propagation.
+            output_lst (list[deep_architect.core.Output], optional): List of
+                outputs whose values are needed. If none is given, all the
+                modules that can be reached from the inputs are included.
+
+        Returns:
+            list[deep_architect.core.Module]:
+                List of modules ordered in a way that allows to call forward on
+                the modules in that order.
+        """
+        key = (frozenset(input_lst),
+               frozenset(output_lst) if output_lst is not None else None)
+        entry = self.key_to_seq.pop(key, None)
+        if entry is not None:
+            module_seq, visited_modules, counts = entry
+            if counts != [m._num_connection_changes for m in visited_modules]:
+                entry = None
+        if entry is None:
+            module_seq, visited_modules = _determine_module_eval_seq(
+                input_lst, output_lst)
+            counts = [m._num_connection_changes for m in visited_modules]
+        self.key_to_seq[key] = (module_seq, visited_modules, counts)
+        if len(self.key_to_seq) > self.max_size:
+            self.key_to_seq.popitem(last=False)
+        return module_seq
 
 
 def traverse_backward(outputs, fn):
@@ -807,17 +1367,123 @@ def is_specified(outputs):
     return is_spec[0]
 
 
-def forward(input_to_val, _module_seq=None):
+class _ValueTracker:
+    """Passes the values of the outputs of the evaluated modules to the
+    connected inputs, optionally dropping values that are no longer needed,
+    and keeps track of the number of values alive. See :func:`forward`.
+    """
+
+    def __init__(self, input_to_val, module_seq, free_values, output_lst):
+        self.free_values = free_values
+        self.module_set = set(module_seq) if free_values else None
+        self.kept_outputs = set(output_lst) if output_lst is not None else ()
+        # number of inputs that still have to use the value of each output.
+        self.ox_to_num_uses = {}
+        self.num_values = len(input_to_val)
+        self.max_num_values = self.num_values
+
+    def update(self, m):
+        """Called after evaluating a module."""
+        if self.free_values:
+            for ix in itervalues(m.inputs):
+                ix.val = None
+                ox = ix.from_output
+                if ox is None:
+                    self.num_values -= 1
+                else:
+                    self.ox_to_num_uses[ox] -= 1
+                    if (self.ox_to_num_uses[ox] == 0 and
+                            ox not in self.kept_outputs):
+                        self.num_values -= 1
+
+        for ox in itervalues(m.outputs):
+            ix_lst = ox.get_connected_inputs()
+            if self.free_values:
+                # values are not passed to modules that are not evaluated.
+                ix_lst = [ix for ix in ix_lst if ix.module in self.module_set]
+            for ix in ix_lst:
+                ix.val = ox.val
+            self.num_values += 1
+            if self.free_values:
+                self.ox_to_num_uses[ox] = len(ix_lst)
+                if len(ix_lst) > 0 and ox not in self.kept_outputs:
+                    ox.val = None
+        if self.num_values > self.max_num_values:
+            self.max_num_values = self.num_values
+
+
+def _forward_in_parallel(module_seq, tracker, num_workers):
+    """Evaluates the modules in a thread pool, dispatching each module once
+    the modules that it depends on have been evaluated.
+
+    The values are passed between modules in the calling thread.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    module_set = set(module_seq)
+    m_to_next_ms = {m: OrderedSet() for m in module_seq}
+    m_to_num_prev = {m: 0 for m in module_seq}
+    for m in module_seq:
+        for ix in itervalues(m.inputs):
+            if ix.is_connected():
+                m_prev = ix.get_connected_output().get_module()
+                if m_prev in module_set and m not in m_to_next_ms[m_prev]:
+                    m_to_next_ms[m_prev].add(m)
+                    m_to_num_prev[m] += 1
+
+    with ThreadPoolExecutor(num_workers) as executor:
+        future_to_m = {
+            executor.submit(m.forward): m
+            for m in module_seq
+            if m_to_num_prev[m] == 0
+        }
+        while len(future_to_m) > 0:
+            done, _ = wait(future_to_m, return_when=FIRST_COMPLETED)
+            for future in done:
+                m = future_to_m.pop(future)
+                # raises the exception of the forward of the module, if any.
+                future.result()
+                tracker.update(m)
+                for m_next in m_to_next_ms[m]:
+                    m_to_num_prev[m_next] -= 1
+                    if m_to_num_prev[m_next] == 0:
+                        future_to_m[executor.submit(m_next.forward)] = m_next
+
+
+def forward(input_to_val,
+            _module_seq=None,
+            free_values=False,
+            output_lst=None,
+            num_workers=1):
     """Forward pass through the graph starting with the provided inputs.
 
     The starting inputs are given the values in the dictionary. The values for
     the other inputs are obtained through propagation, i.e., through successive
     calls to :meth:`deep_architect.core.Module.forward` of the appropriate modules.
 
+    By default, the values are kept in the inputs and outputs after the forward
+    pass, so all intermediate values (e.g., activations in dynamic frameworks)
+    stay referenced until the next forward pass. If ``free_values`` is ``True``,
+    the value of an input is dropped once its module has been evaluated, and
+    the value of an output is dropped once it has been passed to the inputs
+    connected to it, so each value is released as soon as the last module that
+    uses it has been evaluated. Values of outputs that are not connected to
+    any input and of the outputs in ``output_lst`` are kept.
+
+    If ``num_workers`` is larger than one, modules are evaluated in a thread
+    pool with that number of threads. A module is dispatched as soon as the
+    modules connected to its inputs have been evaluated, so independent
+    modules (e.g., the branches of a cell) are evaluated at the same time.
+    This is only useful if the forward computation of the modules releases
+    the global interpreter lock, as most operations of deep learning
+    frameworks do, and requires that the modules can be evaluated
+    concurrently. Each call creates its own thread pool.
+
     .. note::
         For efficiency, in dynamic frameworks, the module evaluation sequence
         is best computed once and reused in each forward call. The module
-        evaluation sequence is computed with :func:`determine_module_eval_seq`.
+        evaluation sequence is computed with :func:`determine_module_eval_seq`,
+        and :class:`ModuleEvalSeqCache` keeps it until the graph changes.
 
     Args:
         input_to_val (dict[deep_architect.core.Input, object]): Dictionary of initial
@@ -826,18 +1492,35 @@ def forward(input_to_val, _module_seq=None):
             in a way that calling :meth:`deep_architect.core.Module.forward` on them
             starting from the values given for the inputs is valid. If it is
             not provided, the module sequence is computed.
+        free_values (bool, optional): Whether to drop the values of inputs and
+            outputs once they are no longer needed.
+        output_lst (list[deep_architect.core.Output], optional): Outputs whose
+            values are needed. If the module sequence is not provided, only
+            the modules needed to compute these outputs are evaluated. Their
+            values are kept when freeing values, e.g., outputs of the graph
+            that are also connected to other modules.
+        num_workers (int, optional): Number of threads used to evaluate
+            modules.
+
+    Returns:
+        int: Maximum number of values referenced by the inputs and outputs at
+            the same time during the forward pass. A value passed from an
+            output to multiple inputs is counted once.
     """
     if _module_seq is None:
-        _module_seq = determine_module_eval_seq(input_to_val.keys())
+        _module_seq = determine_module_eval_seq(list(input_to_val), output_lst)
 
     for ix, val in iteritems(input_to_val):
         ix.val = val
 
-    for m in _module_seq:
-        m.forward()
-        for ox in itervalues(m.outputs):
-            for ix in ox.get_connected_inputs():
-                ix.val = ox.val
+    tracker = _ValueTracker(input_to_val, _module_seq, free_values, output_lst)
+    if num_workers > 1:
+        _forward_in_parallel(_module_seq, tracker, num_workers)
+    else:
+        for m in _module_seq:
+            m.forward()
+            tracker.update(m)
+    return tracker.max_num_values
 
 
 def get_unconnected_inputs(outputs):
@@ -917,35 +1600,49 @@ def get_all_hyperparameters(outputs):
             graph.
     """
     visited_hs = OrderedSet()
+    visited_hs.update(_hyperparameter_traversal_backward(outputs))
+    return visited_hs
 
-    def _add_reachable_hs(h_dep):
-        assert isinstance(h_dep, DependentHyperparameter)
-        local_memo = set([h_dep])
-        h_dep_lst = [h_dep]
-        idx = 0
-        while idx < len(h_dep_lst):
-            for h in itervalues(h_dep_lst[idx]._hyperps):
-                # cycle detection.
-                # assert h not in local_memo
-
-                if h not in visited_hs:
-                    if isinstance(h, DependentHyperparameter):
-                        h_dep_lst.append(h)
-                local_memo.add(h)
-                visited_hs.add(h)
-            idx += 1
 
-    # this function is applied on each of the modules in the graph.
-    def fn(module):
-        for h in itervalues(module.hyperps):
+def _hyperparameter_traversal_backward(outputs, module_memo=None):
+    """Yields the hyperparameters found by going backward from the outputs,
+    in the order of :func:`get_all_hyperparameters`.
+
+    The graph is traversed as needed, so stopping early avoids traversing the
+    rest of it. The graph must not change during the traversal. If given,
+    ``module_memo`` must be empty and is filled with the modules reached.
+    """
+    visited_hs = set()
+    ms = extract_unique_modules(sorted_values_by_key(outputs))
+    if module_memo is None:
+        module_memo = set()
+    module_memo.update(ms)
+    idx = 0
+    while idx < len(ms):
+        m = ms[idx]
+        for h in itervalues(m.hyperps):
             if h not in visited_hs:
                 visited_hs.add(h)
+                yield h
+                # hyperparameters reachable through dependency links.
                 if isinstance(h, DependentHyperparameter):
-                    _add_reachable_hs(h)
-        return False
-
-    traverse_backward(outputs, fn)
-    return visited_hs
+                    h_dep_lst = [h]
+                    dep_idx = 0
+                    while dep_idx < len(h_dep_lst):
+                        for h_prev in itervalues(h_dep_lst[dep_idx]._hyperps):
+                            if h_prev not in visited_hs:
+                                visited_hs.add(h_prev)
+                                yield h_prev
+                                if isinstance(h_prev, DependentHyperparameter):
+                                    h_dep_lst.append(h_prev)
+                        dep_idx += 1
+        for ix in itervalues(m.inputs):
+            if ix.is_connected():
+                m_prev = ix.get_connected_output().get_module()
+                if m_prev not in module_memo:
+                    module_memo.add(m_prev)
+                    ms.append(m_prev)
+        idx += 1
 
 
 def get_unassigned_independent_hyperparameters(outputs):
@@ -980,30 +1677,192 @@ def get_unassigned_independent_hyperparameters(outputs):
 # this can be done through a flag.
 
 
-def unassigned_independent_hyperparameter_iterator(outputs):
+def unassigned_independent_hyperparameter_iterator(outputs,
+                                                  hyperp_to_parent=None):
     """Returns an iterator over the hyperparameters that are not specified in
     the current search space.
 
     This iterator is used by the searchers to go over the unspecified
     hyperparameters.
 
+    The hyperparameters are visited in rounds. Each round visits the
+    unassigned independent hyperparameters in the graph in the order of a
+    backward traversal of the graph, skipping the ones that were assigned in
+    the meantime. The hyperparameters created by the substitutions triggered
+    during a round are visited in the next round.
+
+    The graph is traversed in full at the start and at the end. The parts of
+    the graph created by a substitution are traversed when the substitution
+    happens, so a round that follows a single substitution that created a
+    single hyperparameter, e.g., in deeply nested search spaces, does not
+    traverse the graph. Otherwise, the traversal stops once the
+    hyperparameters of the round are found. Rounds that follow more than one
+    substitution traverse the whole graph, unless ``hyperp_to_parent`` is
+    given.
+
     .. note::
         It is assumed that all the hyperparameters that are touched by the
         iterator will be specified (most likely, right away). Otherwise, the
         iterator will never terminate.
 
+    .. note::
+        The order of the hyperparameters determines which values are assigned
+        to which hyperparameters when replaying a list of values with
+        :func:`deep_architect.searchers.common.specify`, so it must not
+        change between versions.
+
     Args:
         outputs (dict[str, deep_architect.core.Output]): Dictionary of named
             outputs which by being traversed back will reach all the
             modules in the search space, and correspondingly all the current
             unspecified hyperparameters of the search space.
+        hyperp_to_parent (dict[deep_architect.core.Hyperparameter, deep_architect.core.Hyperparameter], optional):
+            If given, it is filled with, for each hyperparameter found in a
+            part of the graph created by a substitution, the hyperparameter
+            whose assignment led to the substitution. The hyperparameters
+            with the same parent are added in the order of a backward
+            traversal of the part of the graph created by the substitution,
+            which does not depend on the rest of the graph.
 
     Yields:
         (deep_architect.core.Hyperparameter):
             Next unspecified hyperparameter of the search space.
     """
-    while not is_specified(outputs):
-        hs = get_unassigned_independent_hyperparameters(outputs)
+    module_memo = set()
+    hyperp_memo = set()
+    # unassigned independent hyperparameters found since the start of the
+    # current round, in the order in which they were found.
+    pending = []
+    # hyperparameter being expanded, if any.
+    parent_cell = [None]
+    # number of substitutions found since the start of the current round, and
+    # whether part of the graph may have become unreachable from the outputs.
+    num_found_cell = [0]
+    unreachable_cell = [False]
+
+    def _add_hyperp(h):
+        if h in hyperp_memo:
+            return
+        hyperp_memo.add(h)
+        h_dep_lst = [h]
+        idx = 0
+        while idx < len(h_dep_lst):
+            h_cur = h_dep_lst[idx]
+            if isinstance(h_cur, DependentHyperparameter):
+                for h_prev in itervalues(h_cur._hyperps):
+                    if h_prev not in hyperp_memo:
+                        hyperp_memo.add(h_prev)
+                        h_dep_lst.append(h_prev)
+            elif not h_cur.has_value_assigned():
+                pending.append(h_cur)
+                if hyperp_to_parent is not None and parent_cell[0] is not None:
+                    hyperp_to_parent[h_cur] = parent_cell[0]
+            idx += 1
+
+    def _add_modules(output_lst):
+        ms = [
+            m for m in extract_unique_modules(output_lst)
+            if m not in module_memo
+        ]
+        module_memo.update(ms)
+        for m in ms:
+            for h in itervalues(m.hyperps):
+                _add_hyperp(h)
+            for ix in itervalues(m.inputs):
+                if ix.is_connected():
+                    m_prev = ix.get_connected_output().get_module()
+                    if m_prev not in module_memo:
+                        module_memo.add(m_prev)
+                        ms.append(m_prev)
+
+    # substitution modules replace their inputs and outputs with the ones of
+    # the graph fragment that takes their place. the new part of the graph is
+    # reached by traversing backward from the new outputs, stopping at the
+    # modules found before.
+    def _expand(h):
+        parent_cell[0] = h
+        h_lst = [h]
+        local_memo = set(h_lst)
+        idx = 0
+        while idx < len(h_lst):
+            h_cur = h_lst[idx]
+            for m in h_cur.modules:
+                # modules whose inputs and outputs were not replaced, e.g.,
+                # modules that are not substitution modules.
+                if m not in module_memo or all(
+                        x.get_module() is m
+                        for x in itertools.chain(itervalues(m.inputs),
+                                                 itervalues(m.outputs))):
+                    continue
+                num_found_cell[0] += 1
+                _add_modules(sorted_values_by_key(m.outputs))
+                # the new part of the graph is reachable if the inputs of the
+                # module are still connected and its outputs are connected or
+                # are outputs of the graph. the dictionary of outputs is not
+                # updated when an output of the graph is substituted more
+                # than once.
+                output_lst = list(itervalues(outputs))
+                if not (all(ix.is_connected()
+                            for ix in itervalues(m.inputs)) and
+                        all(ox.is_connected() or ox in output_lst
+                            for ox in itervalues(m.outputs))):
+                    unreachable_cell[0] = True
+            for h_next in h_cur.dependent_hyperps:
+                if h_next.has_value_assigned() and h_next not in local_memo:
+                    local_memo.add(h_next)
+                    h_lst.append(h_next)
+            idx += 1
+        parent_cell[0] = None
+
+    # the hyperparameters of the first round are found in the order of the
+    # backward traversal.
+    _add_modules(sorted_values_by_key(outputs))
+    hs = list(pending)
+    while True:
+        del pending[:]
+        num_found_cell[0] = 0
+        unreachable_cell[0] = False
+        num_substitutions = _UpdateQueue.num_substitutions
         for h in hs:
+            n = _UpdateQueue.num_substitutions
             if not h.has_value_assigned():
                 yield h
+            # the new parts of the graph are only needed to find the parents
+            # or if there is a single substitution in the round. otherwise,
+            # the next round traverses the whole graph.
+            if (_UpdateQueue.num_substitutions != n and
+                (hyperp_to_parent is not None or
+                 _UpdateQueue.num_substitutions - num_substitutions == 1)):
+                _expand(h)
+
+        # hyperparameters found in the new parts of the graph may have been
+        # assigned later in the round.
+        pending[:] = [h for h in pending if not h.has_value_assigned()]
+        num_substitutions = _UpdateQueue.num_substitutions - num_substitutions
+        if (len(pending) > 0 and num_found_cell[0] == num_substitutions and
+            (hyperp_to_parent is not None or num_substitutions == 1)):
+            if len(pending) == 1 and not unreachable_cell[0]:
+                hs = list(pending)
+            else:
+                # the backward traversal stops once the hyperparameters of
+                # the round are found. the ones that are no longer in the
+                # graph are not found, which requires traversing all of it.
+                pending_set = set(pending)
+                hs = []
+                for h in _hyperparameter_traversal_backward(outputs):
+                    if h in pending_set:
+                        hs.append(h)
+                        if len(hs) == len(pending_set):
+                            break
+        else:
+            # NOTE: also checks that no hyperparameter was missed, e.g., in
+            # parts of the graph changed by the caller.
+            module_memo.clear()
+            hs = [
+                h for h in _hyperparameter_traversal_backward(
+                    outputs, module_memo)
+                if not isinstance(h, DependentHyperparameter) and
+                not h.has_value_assigned()
+            ]
+            if len(hs) == 0:
+                break
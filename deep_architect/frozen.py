@@ -0,0 +1,391 @@
+import hashlib
+import numpy as np
+from six import iteritems, itervalues
+import deep_architect.core as co
+import deep_architect.modules as mo
+import deep_architect.utils as ut
+
+
+def _make_array(xs):
+    arr = np.array(xs, dtype='int32')
+    arr.flags.writeable = False
+    return arr
+
+
+class _Table:
+    """Assigns consecutive integer ids to hashable objects."""
+
+    def __init__(self):
+        self.idx = {}
+        self.lst = []
+
+    def get_id(self, x):
+        if x not in self.idx:
+            self.idx[x] = len(self.lst)
+            self.lst.append(x)
+        return self.idx[x]
+
+
+class FrozenArchitecture:
+    """Compact immutable representation of a fully specified architecture.
+
+    Modules, inputs, outputs, and hyperparameters are identified by integer
+    ids. Modules are numbered in topological order, i.e., every connection
+    goes from a module to a module with a larger id, so the range of module
+    ids is a valid evaluation sequence. Connections and the dependencies of
+    modules on hyperparameters are kept in numpy index arrays, and strings
+    are stored once in tables. Names of the scope are not kept, so two
+    architectures sampled from the same search space with the same structure
+    and hyperparameter values are equal, regardless of the names they got in
+    the scope.
+
+    Architectures are created with :func:`freeze`, or by
+    :meth:`from_dict` from the result of :meth:`to_dict`.
+
+    Args:
+        module_type_names (tuple[str]): Type name of each module type.
+        local_names (tuple[str]): Local names of inputs, outputs, and
+            hyperparameters.
+        hyperp_values (tuple[object]): Value of each hyperparameter.
+        arrays (dict[str, numpy.ndarray]): Dictionary with the integer arrays
+            describing the architecture. See :meth:`to_dict`.
+        input_names (tuple[str]): Names of the inputs of the architecture.
+        output_names (tuple[str]): Names of the outputs of the architecture.
+    """
+
+    _array_names = [
+        'module_types', 'input_modules', 'input_local_names', 'output_modules',
+        'output_local_names', 'connection_outputs', 'connection_inputs',
+        'module_hyperp_modules', 'module_hyperp_local_names',
+        'module_hyperp_values', 'input_ids', 'output_ids'
+    ]
+
+    def __init__(self, module_type_names, local_names, hyperp_values, arrays,
+                 input_names, output_names):
+        self.module_type_names = tuple(module_type_names)
+        self.local_names = tuple(local_names)
+        self.hyperp_values = tuple(hyperp_values)
+        self.input_names = tuple(input_names)
+        self.output_names = tuple(output_names)
+        for name in self._array_names:
+            setattr(self, name, _make_array(arrays[name]))
+        self._hash = None
+
+    def get_num_modules(self):
+        return len(self.module_types)
+
+    def get_num_connections(self):
+        return len(self.connection_inputs)
+
+    def get_module_eval_seq(self):
+        """Module ids in an order that allows to call forward on them.
+
+        Returns:
+            numpy.ndarray: Module ids sorted topologically.
+        """
+        return np.arange(self.get_num_modules())
+
+    def get_connections(self):
+        """Connections between modules.
+
+        Returns:
+            (numpy.ndarray, numpy.ndarray):
+                Ids of the source and target modules of each connection.
+        """
+        return (self.output_modules[self.connection_outputs],
+                self.input_modules[self.connection_inputs])
+
+    def get_adjacency_matrix(self):
+        """Dense matrix with the number of connections between modules.
+
+        Returns:
+            numpy.ndarray: Matrix where the entry ``(i, j)`` is the number of
+                connections from module ``i`` to module ``j``.
+        """
+        n = self.get_num_modules()
+        adj = np.zeros((n, n), dtype='int32')
+        src, dst = self.get_connections()
+        np.add.at(adj, (src, dst), 1)
+        return adj
+
+    def get_module_depths(self):
+        """Length of the longest path from a module without connected inputs
+        to each module.
+
+        Returns:
+            numpy.ndarray: Depth of each module.
+        """
+        depths = np.zeros(self.get_num_modules(), dtype='int32')
+        src, dst = self.get_connections()
+        # connections are sorted by target module, and target modules are
+        # sorted topologically.
+        for s, d in zip(src.tolist(), dst.tolist()):
+            if depths[d] <= depths[s]:
+                depths[d] = depths[s] + 1
+        return depths
+
+    def get_module_type_counts(self):
+        """Number of modules of each type.
+
+        Returns:
+            dict[str, int]: Dictionary mapping type names to counts.
+        """
+        counts = np.bincount(self.module_types,
+                             minlength=len(self.module_type_names))
+        return dict(zip(self.module_type_names, counts.tolist()))
+
+    def extract_features(self):
+        """Feature representation of the architecture.
+
+        Same format as :func:`deep_architect.surrogates.common.extract_features`,
+        but modules are identified by their type and their position in the
+        topological order rather than by their names in the scope.
+
+        Returns:
+            dict[str, list[str]]:
+                Representation of the architecture as a dictionary where each
+                key is associated to a list with different types of features.
+        """
+        module_names = [
+            '%s-%d' % (self.module_type_names[t], i)
+            for (i, t) in enumerate(self.module_types.tolist())
+        ]
+        module_names = np.array(module_names, dtype='object')
+        local_names = np.array(self.local_names, dtype='object')
+
+        src, dst = self.get_connections()
+        ox_names = local_names[self.output_local_names[self.connection_outputs]]
+        ix_names = local_names[self.input_local_names[self.connection_inputs]]
+        connection_feats = [
+            "%s.%s |-> %s.%s" % t for t in zip(module_names[src], ox_names,
+                                              module_names[dst], ix_names)
+        ]
+        h_names = local_names[self.module_hyperp_local_names]
+        module_hyperp_feats = [
+            "%s/%s = %s" % (m_name, h_name, self.hyperp_values[v])
+            for (m_name, h_name, v) in zip(
+                module_names[self.module_hyperp_modules], h_names,
+                self.module_hyperp_values.tolist())
+        ]
+        return {
+            'module_feats': list(module_names),
+            'connection_feats': connection_feats,
+            'module_hyperp_feats': module_hyperp_feats,
+        }
+
+    def to_dict(self):
+        """JSON serializable representation of the architecture.
+
+        Returns:
+            dict[str, object]: Dictionary with the tables and the arrays of the
+                architecture as lists. The hyperparameter values are kept as
+                they are.
+        """
+        d = {name: getattr(self, name).tolist() for name in self._array_names}
+        d['module_type_names'] = list(self.module_type_names)
+        d['local_names'] = list(self.local_names)
+        d['hyperp_values'] = list(self.hyperp_values)
+        d['input_names'] = list(self.input_names)
+        d['output_names'] = list(self.output_names)
+        return d
+
+    @staticmethod
+    def from_dict(d):
+        """Recreates the architecture from the result of :meth:`to_dict`."""
+        return FrozenArchitecture(
+            d['module_type_names'], d['local_names'], d['hyperp_values'],
+            {name: d[name] for name in FrozenArchitecture._array_names},
+            d['input_names'], d['output_names'])
+
+    def get_hash(self):
+        """Hash of the contents of the architecture.
+
+        Returns:
+            str: Hexadecimal digest that is equal for equal architectures.
+        """
+        if self._hash is None:
+            h = hashlib.sha1()
+            for name in self._array_names:
+                h.update(name.encode('utf-8'))
+                h.update(getattr(self, name).tobytes())
+            h.update(
+                ut.json_object_to_json_string([
+                    self.module_type_names, self.local_names,
+                    [repr(v) for v in self.hyperp_values], self.input_names,
+                    self.output_names
+                ]).encode('utf-8'))
+            self._hash = h.hexdigest()
+        return self._hash
+
+    def __hash__(self):
+        return hash(self.get_hash())
+
+    def __eq__(self, other):
+        return (isinstance(other, FrozenArchitecture) and
+                self.get_hash() == other.get_hash())
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+
+def _get_topological_order(outputs):
+    """Modules reachable from the outputs in an order where each module comes
+    after the modules connected to its inputs.
+
+    The order only depends on the structure of the graph and on the local
+    names of the inputs and outputs.
+    """
+    order = []
+    memo = set()
+    for ox in co.sorted_values_by_key(outputs):
+        m = ox.get_module()
+        if m in memo:
+            continue
+        memo.add(m)
+        stack = [(m, iter(list(itervalues(m.inputs))))]
+        while len(stack) > 0:
+            m, it = stack[-1]
+            for ix in it:
+                if ix.is_connected():
+                    m_prev = ix.get_connected_output().get_module()
+                    if m_prev not in memo:
+                        memo.add(m_prev)
+                        stack.append((m_prev, iter(list(itervalues(
+                            m_prev.inputs)))))
+                        break
+            else:
+                stack.pop()
+                order.append(m)
+    return order
+
+
+def _get_replacement(x):
+    """Input or output that replaced ``x`` in the graph.
+
+    The dictionaries of inputs and outputs returned by a substitution module
+    are updated when it is substituted, but if the new inputs and outputs
+    belong to a substitution module that is substituted in a later call to
+    :meth:`deep_architect.core.Hyperparameter.assign_value`, the
+    dictionaries keep the replaced ones, e.g., for the outermost module of a
+    nested search space. Search spaces wrapped with
+    :func:`deep_architect.modules.buffer_io` do not have this problem.
+    """
+    suffix = '.I.' if isinstance(x, co.Input) else '.O.'
+    m = x.get_module()
+    while isinstance(m, mo.SubstitutionModule) and m._is_done:
+        d = m.inputs if suffix == '.I.' else m.outputs
+        prefix = m.get_name() + suffix
+        name = x.get_name()
+        local_name = name[len(prefix):]
+        if not name.startswith(prefix) or local_name not in d:
+            raise ValueError(
+                '%s was removed by the substitution of its module.' % name)
+        x = d[local_name]
+        m = x.get_module()
+    return x
+
+
+def freeze(inputs, outputs):
+    """Creates a compact immutable representation of a fully specified
+    architecture.
+
+    See :class:`FrozenArchitecture`.
+
+    Args:
+        inputs (dict[str, deep_architect.core.Input]): Dictionary of named
+            inputs of the architecture.
+        outputs (dict[str, deep_architect.core.Output]): Dictionary of named
+            outputs of the architecture. All modules reached by traversing
+            backward from the outputs must have their hyperparameters assigned.
+
+    Returns:
+        deep_architect.frozen.FrozenArchitecture:
+            Frozen representation of the architecture.
+
+    Raises:
+        ValueError: If some input of the architecture does not belong to the
+            modules reached from the outputs.
+    """
+    # NOTE: inputs and outputs of modules that have been substituted are
+    # replaced by the ones that took their place. see _get_replacement.
+    inputs = {name: _get_replacement(ix) for name, ix in iteritems(inputs)}
+    outputs = {name: _get_replacement(ox) for name, ox in iteritems(outputs)}
+    module_seq = _get_topological_order(outputs)
+
+    type_table = _Table()
+    name_table = _Table()
+    hyperp_to_id = {}
+    hyperp_values = []
+    a = {name: [] for name in FrozenArchitecture._array_names}
+    input_to_id = {}
+    output_to_id = {}
+    for i, m in enumerate(module_seq):
+        a['module_types'].append(
+            type_table.get_id(ut.extract_simple_name(m.get_name())))
+        for name, ix in iteritems(m.inputs):
+            input_to_id[ix] = len(a['input_modules'])
+            a['input_modules'].append(i)
+            a['input_local_names'].append(name_table.get_id(name))
+            if ix.is_connected():
+                # the module of the output comes earlier in the order.
+                a['connection_outputs'].append(
+                    output_to_id[ix.get_connected_output()])
+                a['connection_inputs'].append(input_to_id[ix])
+        for name, ox in iteritems(m.outputs):
+            output_to_id[ox] = len(a['output_modules'])
+            a['output_modules'].append(i)
+            a['output_local_names'].append(name_table.get_id(name))
+        for name, h in iteritems(m.hyperps):
+            assert h.has_value_assigned()
+            if h not in hyperp_to_id:
+                hyperp_to_id[h] = len(hyperp_values)
+                hyperp_values.append(h.get_value())
+            a['module_hyperp_modules'].append(i)
+            a['module_hyperp_local_names'].append(name_table.get_id(name))
+            a['module_hyperp_values'].append(hyperp_to_id[h])
+
+    input_names = sorted(inputs)
+    output_names = sorted(outputs)
+    for name in input_names:
+        if inputs[name] not in input_to_id:
+            raise ValueError(
+                'Input %s of the architecture does not belong to the modules '
+                'reached from its outputs.' % name)
+    a['input_ids'] = [input_to_id[inputs[name]] for name in input_names]
+    a['output_ids'] = [output_to_id[outputs[name]] for name in output_names]
+    return FrozenArchitecture(type_table.lst, name_table.lst, hyperp_values, a,
+                              input_names, output_names)
+
+
+def get_fingerprint(inputs, outputs, hyperps=None):
+    """Fingerprint of a fully specified architecture.
+
+    Architectures with the same modules, connections, and hyperparameter
+    values have the same fingerprint, regardless of the names they got in the
+    scope and of the sequence of values used to specify them, e.g., modules
+    that do not contribute to the outputs are ignored. See
+    :class:`FrozenArchitecture`. The fingerprint can be used as key to keep
+    the results of evaluations, e.g., in a
+    :class:`deep_architect.search_logging.ResultCache`.
+
+    Args:
+        inputs (dict[str, deep_architect.core.Input]): Dictionary of named
+            inputs of the architecture.
+        outputs (dict[str, deep_architect.core.Output]): Dictionary of named
+            outputs of the architecture.
+        hyperps (dict[str, deep_architect.core.Hyperparameter], optional):
+            Dictionary of named hyperparameters that are not associated to
+            modules, e.g., the learning rate. Their values are also part of
+            the fingerprint.
+
+    Returns:
+        str: Hexadecimal digest that is equal for equal architectures.
+    """
+    h = hashlib.sha1(freeze(inputs, outputs).get_hash().encode('utf-8'))
+    if hyperps is not None:
+        h.update(
+            ut.json_object_to_json_string([
+                [name, repr(hyperps[name].get_value())]
+                for name in sorted(hyperps)
+            ]).encode('utf-8'))
+    return h.hexdigest()
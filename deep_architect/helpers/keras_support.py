@@ -54,6 +54,7 @@ class KerasModule(co.Module):
             registered.
 
     """
+    __slots__ = ['_compile_fn', '_fn']
 
     def __init__(self,
                  name,
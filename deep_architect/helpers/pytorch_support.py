@@ -1,4 +1,4 @@
-from six import iteritems
+from six import iteritems, itervalues
 import torch.nn as nn
 import deep_architect.core as co
 from deep_architect.hyperparameters import D
@@ -59,6 +59,7 @@ class PyTorchModule(co.Module):
         scope (deep_architect.core.Scope, optional): Scope where the module will be
             registered.
     """
+    __slots__ = ['_compile_fn', '_fn', 'pyth_modules']
 
     def __init__(self,
                  name,
@@ -176,19 +177,32 @@ class PyTorchModel(nn.Module):
     Using this class is the recommended way of wrapping a Pytorch architecture
     sampled from a search space. The topological order for evaluating for
     doing the forward computation of the architecture is computed by the
-    container and cached for future calls to forward.
+    container and cached for future calls to forward. Only the modules needed
+    to compute the outputs are evaluated, and the cached order is recomputed
+    if the graph changes.
+
+    If ``free_values`` is ``True``, intermediate values are dropped as soon as
+    the modules that use them have been evaluated (see
+    :func:`deep_architect.core.forward`), rather than kept in the inputs and
+    outputs of the modules until the next call to forward. The maximum number
+    of values alive during the last call to forward is kept in
+    ``max_num_values``.
 
     Args:
         inputs (dict[str,deep_architect.core.Input]): Dictionary of names to inputs.
         outputs (dict[str,deep_architect.core.Output]): Dictionary of names to outputs.
+        free_values (bool, optional): Whether to drop intermediate values once
+            they are no longer needed.
     """
 
-    def __init__(self, inputs, outputs):
+    def __init__(self, inputs, outputs, free_values=False):
         nn.Module.__init__(self)
 
         self.outputs = outputs
         self.inputs = inputs
-        self._module_seq = None
+        self.free_values = free_values
+        self.max_num_values = None
+        self._module_seq_cache = co.ModuleEvalSeqCache()
         self._is_compiled = False
 
     def __call__(self, input_name_to_val):
@@ -200,14 +214,15 @@ class PyTorchModel(nn.Module):
         """Forward computation of the module that is represented through the
         graph of DeepArchitect modules.
         """
-        if self._module_seq is None:
-            self._module_seq = co.determine_module_eval_seq(
-                self.inputs.values())
+        module_seq = self._module_seq_cache.get(
+            list(itervalues(self.inputs)), list(itervalues(self.outputs)))
 
         input_to_val = {
             ix: input_name_to_val[name] for name, ix in iteritems(self.inputs)
         }
-        co.forward(input_to_val, self._module_seq)
+        self.max_num_values = co.forward(input_to_val, module_seq,
+                                         self.free_values,
+                                         list(itervalues(self.outputs)))
         output_name_to_val = {
             name: ox.val for name, ox in iteritems(self.outputs)
         }
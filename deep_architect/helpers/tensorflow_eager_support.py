@@ -55,6 +55,7 @@ class TensorflowEagerModule(co.Module):
         scope (deep_architect.core.Scope, optional): Scope where the module will be
             registered.
     """
+    __slots__ = ['_compile_fn', 'is_training', '_fn']
 
     def __init__(self,
                  name,
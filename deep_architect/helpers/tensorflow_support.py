@@ -58,6 +58,7 @@ class TensorflowModule(co.Module):
             registered.
 
     """
+    __slots__ = ['_compile_fn', '_fn', 'train_feed', 'eval_feed']
 
     def __init__(self,
                  name,
@@ -67,12 +67,16 @@ class Discrete(co.Hyperparameter):
         name (str, optional): Name from which the name of the hyperparameter
             in the scope is derived.
     """
+    __slots__ = ['vs']
 
     def __init__(self, vs, scope=None, name=None):
         assert len(vs) > 0
         co.Hyperparameter.__init__(self, scope, name)
         self.vs = vs
 
+    def get_domain_size(self):
+        return len(self.vs)
+
     def _check_value(self, val):
         """Checks if the chosen values is in the list of valid values.
 
@@ -86,23 +90,221 @@ class Discrete(co.Hyperparameter):
 
 
 class Bool(Discrete):
+    __slots__ = []
 
     def __init__(self, scope=None, name=None):
         Discrete.__init__(self, [0, 1], scope, name)
 
 
 class OneOfK(Discrete):
+    __slots__ = []
 
     def __init__(self, k, scope=None, name=None):
         Discrete.__init__(self, range(k), scope, name)
 
 
 class OneOfKFactorial(Discrete):
+    __slots__ = []
 
     def __init__(self, k, scope=None, name=None):
         Discrete.__init__(self, range(np.product(np.arange(1, k + 1))), scope,
                           name)
 
 
+class Float(co.Hyperparameter):
+    """Real valued hyperparameter in an interval.
+
+    Values are sampled uniformly at random in the interval. Values can be
+    encoded in the unit interval with :meth:`encode` and decoded with
+    :meth:`decode`, e.g., to split the range in bins of equal size.
+
+    Values can also be referred to by integer indices in a grid of
+    ``num_index_values`` equally spaced points of the encoded values, which
+    includes both ends of the interval. See :meth:`get_index_value`. Values
+    that are not in the grid have no index.
+
+    Args:
+        low (float): Smallest value.
+        high (float): Largest value.
+        scope (deep_architect.core.Scope, optional): The scope in which to register the
+            hyperparameter in.
+        name (str, optional): Name from which the name of the hyperparameter
+            in the scope is derived.
+        num_index_values (int, optional): Number of points of the grid of
+            values with an index.
+    """
+    __slots__ = ['low', 'high', 'num_index_values']
+
+    def __init__(self, low, high, scope=None, name=None,
+                 num_index_values=2**16):
+        assert low <= high and num_index_values >= 2
+        co.Hyperparameter.__init__(self, scope, name)
+        self.low = low
+        self.high = high
+        self.num_index_values = num_index_values
+
+    def encode(self, vals):
+        """Maps values in the range of the hyperparameter to the unit
+        interval.
+
+        Args:
+            vals (float or numpy.ndarray): Values of the hyperparameter.
+
+        Returns:
+            float or numpy.ndarray: Encoded values in ``[0, 1]``.
+        """
+        if self.high == self.low:
+            return 0.0 * vals
+        return (vals - self.low) / float(self.high - self.low)
+
+    def decode(self, xs):
+        """Maps values in the unit interval to the range of the
+        hyperparameter. Inverse of :meth:`encode`.
+
+        Args:
+            xs (float or numpy.ndarray): Values in ``[0, 1]``.
+
+        Returns:
+            float or numpy.ndarray: Values of the hyperparameter.
+        """
+        return self.low + xs * (self.high - self.low)
+
+    def sample_values(self, num_samples):
+        """Samples values uniformly at random in the encoded space.
+
+        Args:
+            num_samples (int): Number of values to sample.
+
+        Returns:
+            list[float]: Sampled values.
+        """
+        return self.to_values(self.decode(np.random.uniform(size=num_samples)))
+
+    def to_values(self, xs):
+        """Converts an array of values to a list of values that can be
+        assigned, e.g., rounding them for integer hyperparameters."""
+        return [float(x) for x in np.clip(xs, self.low, self.high)]
+
+    def get_num_index_values(self):
+        """Number of values with an index."""
+        return self.num_index_values
+
+    def get_index_value(self, idx):
+        """Value in the grid for an index.
+
+        Args:
+            idx (int): Index in ``[0, get_num_index_values())``.
+
+        Returns:
+            float: Value of the hyperparameter.
+        """
+        assert 0 <= idx < self.num_index_values
+        x = int(idx) / float(self.num_index_values - 1)
+        return self.to_values(self.decode(np.array([x])))[0]
+
+    def get_value_index(self, val):
+        """Index of a value in the grid. Inverse of :meth:`get_index_value`.
+
+        Raises ``ValueError`` if the value is not in the grid, e.g., for
+        values sampled with :meth:`sample_values`.
+
+        Args:
+            val (float): Value of the hyperparameter.
+
+        Returns:
+            int: Index of the value.
+        """
+        n = self.num_index_values
+        x = float(np.clip(self.encode(np.array([val]))[0], 0.0, 1.0))
+        idx = int(np.round(x * (n - 1)))
+        if self.get_index_value(idx) != val:
+            raise ValueError('Value %r of %s has no index.' %
+                             (val, self.get_name()))
+        return idx
+
+    def _check_value(self, val):
+        assert self.low <= val <= self.high
+
+
+class LogFloat(Float):
+    """Real valued hyperparameter in an interval, with values sampled
+    uniformly at random in the logarithm of the interval, e.g., for learning
+    rates. The encoding in the unit interval is also logarithmic.
+
+    Args:
+        low (float): Smallest value. Must be positive.
+        high (float): Largest value.
+        scope (deep_architect.core.Scope, optional): The scope in which to register the
+            hyperparameter in.
+        name (str, optional): Name from which the name of the hyperparameter
+            in the scope is derived.
+    """
+    __slots__ = []
+
+    def __init__(self, low, high, scope=None, name=None,
+                 num_index_values=2**16):
+        assert low > 0.0
+        Float.__init__(self, low, high, scope, name, num_index_values)
+
+    def encode(self, vals):
+        if self.high == self.low:
+            return 0.0 * vals
+        return np.log(vals / float(self.low)) / np.log(
+            self.high / float(self.low))
+
+    def decode(self, xs):
+        return self.low * np.power(self.high / float(self.low), xs)
+
+
+class Int(Float):
+    """Integer valued hyperparameter in an interval, including both ends.
+
+    Values are sampled uniformly at random among the integers in the
+    interval. The index of a value is its offset from the smallest value.
+
+    Args:
+        low (int): Smallest value.
+        high (int): Largest value.
+        scope (deep_architect.core.Scope, optional): The scope in which to register the
+            hyperparameter in.
+        name (str, optional): Name from which the name of the hyperparameter
+            in the scope is derived.
+    """
+    __slots__ = []
+
+    def __init__(self, low, high, scope=None, name=None):
+        Float.__init__(self, int(low), int(high), scope, name,
+                       max(2, int(high) - int(low) + 1))
+
+    def get_domain_size(self):
+        return self.high - self.low + 1
+
+    def get_num_index_values(self):
+        return self.get_domain_size()
+
+    def get_index_value(self, idx):
+        assert 0 <= idx < self.get_domain_size()
+        return self.low + int(idx)
+
+    def get_value_index(self, val):
+        if int(val) != val or not self.low <= val <= self.high:
+            raise ValueError('Value %r of %s has no index.' %
+                             (val, self.get_name()))
+        return int(val) - self.low
+
+    def decode(self, xs):
+        # NOTE: each integer gets an interval of the same size.
+        return self.low - 0.5 + xs * (self.high - self.low + 1)
+
+    def encode(self, vals):
+        return (vals - self.low + 0.5) / float(self.high - self.low + 1)
+
+    def to_values(self, xs):
+        return [int(x) for x in np.clip(np.round(xs), self.low, self.high)]
+
+    def _check_value(self, val):
+        assert int(val) == val and self.low <= val <= self.high
+
+
 # abbreviations
 D = Discrete
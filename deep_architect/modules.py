@@ -13,6 +13,7 @@ class Identity(co.Module):
             module. If none is given, uses the class name to derive
             the name.
     """
+    __slots__ = []
 
     def __init__(self, scope=None, name=None):
         co.Module.__init__(self, scope, name)
@@ -27,6 +28,7 @@ class Identity(co.Module):
 
 
 class HyperparameterAggregator(co.Module):
+    __slots__ = []
 
     def __init__(self, name_to_hyperp, scope=None, name=None):
         co.Module.__init__(self, scope, name)
@@ -76,6 +78,10 @@ class SubstitutionModule(co.Module):
             substitution. Otherwise, the dictionary of outputs returned by the
             substitution function must contain exactly the same output names.
     """
+    __slots__ = [
+        'allow_input_subset', 'allow_output_subset', '_substitution_fn',
+        '_is_done'
+    ]
 
     def __init__(self,
                  name,
@@ -93,7 +99,9 @@ class SubstitutionModule(co.Module):
         self._register(input_names, output_names, name_to_hyperp)
         self._substitution_fn = substitution_fn
         self._is_done = False
-        self._update()
+        # substitutes right away if the hyperparameters are already assigned.
+        if all(h.has_value_assigned() for h in itervalues(self.hyperps)):
+            co._get_update_queue().add([self])
 
     def _update(self):
         """Implements the substitution operation.
@@ -124,6 +132,7 @@ class SubstitutionModule(co.Module):
                     name in self.outputs for name in new_outputs)
 
             # performing the substitution.
+            replacements = []
             for name, old_ix in iteritems(self.inputs):
                 old_ix = self.inputs[name]
                 if name in new_inputs:
@@ -131,6 +140,7 @@ class SubstitutionModule(co.Module):
                     if old_ix.is_connected():
                         old_ix.reroute_connected_output(new_ix)
                     self.inputs[name] = new_ix
+                    replacements.append((old_ix, new_ix))
                 else:
                     if old_ix.is_connected():
                         old_ix.disconnect()
@@ -142,10 +152,19 @@ class SubstitutionModule(co.Module):
                     if old_ox.is_connected():
                         old_ox.reroute_all_connected_inputs(new_ox)
                     self.outputs[name] = new_ox
+                    replacements.append((old_ox, new_ox))
                 else:
                     if old_ox.is_connected():
                         old_ox.disconnect_all()
 
+            # the new inputs and outputs may belong to substitution modules
+            # that are substituted after this one, in which case they are
+            # replaced by the final ones once the update queue is empty.
+            is_pending = any(
+                isinstance(x.get_module(), SubstitutionModule) and
+                not x.get_module()._is_done for (_, x) in replacements)
+            co._get_update_queue().record_substitution(self, replacements,
+                                                       is_pending)
             self._is_done = True
 
 
@@ -732,6 +751,10 @@ class SearchSpaceFactory:
             specified.
         reset_scope_upon_get (bool): Whether to clean the scope upon getting
             a new search space. Should be ``True`` in most cases.
+
+    Search spaces can be obtained concurrently from multiple threads, as
+    the default scope is local to each thread (see
+    :class:`deep_architect.core.Scope`).
     """
 
     def __init__(self, search_space_fn, reset_scope_upon_get=True):
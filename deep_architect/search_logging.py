@@ -229,6 +229,84 @@ class SearchLogger:
                                 abort_if_notexists=abort_if_notexists)
 
 
+class ResultCache:
+    """Results of evaluations keyed by the fingerprints of the evaluated
+    architectures.
+
+    Used to avoid evaluating the same architecture multiple times when
+    different sequences of hyperparameter values lead to the same
+    architecture. The fingerprints are computed with
+    :func:`deep_architect.frozen.get_fingerprint`. If a file is given, the
+    results are appended to it as they are added, one JSON object per line,
+    and the results in the file are loaded on creation, so the cache can be
+    shared by consecutive searches. An incomplete last line, e.g., left by an
+    interrupted search, is removed from the file when it is loaded.
+
+    Args:
+        filepath (str, optional): Path to the file where the results are
+            kept. If it is not given, the results are only kept in memory.
+    """
+
+    def __init__(self, filepath=None):
+        self.filepath = filepath
+        self.fingerprint_to_results = {}
+        if filepath is not None and ut.file_exists(filepath):
+            self._load()
+
+    def _load(self):
+        with open(self.filepath, 'rb+') as f:
+            data = f.read()
+            # NOTE: the last line is incomplete if the process was
+            # interrupted while writing it. It is removed from the file, as
+            # the next result would be appended to it otherwise.
+            num_bytes = data.rfind(b'\n') + 1
+            if num_bytes < len(data):
+                f.truncate(num_bytes)
+        for line in data[:num_bytes].decode('utf-8').splitlines():
+            try:
+                d = ut.json_string_to_json_object(line)
+            except ValueError:
+                continue
+            self.fingerprint_to_results[d['fingerprint']] = d['results']
+
+    def __len__(self):
+        return len(self.fingerprint_to_results)
+
+    def __contains__(self, fingerprint):
+        return fingerprint in self.fingerprint_to_results
+
+    def get(self, fingerprint, default=None):
+        """Gets the results of the evaluation of the architecture with the
+        given fingerprint.
+
+        Args:
+            fingerprint (str): Fingerprint of the architecture.
+            default (object, optional): Returned if there are no results for
+                the architecture.
+
+        Returns:
+            dict[str, object]: Results of the evaluation.
+        """
+        return self.fingerprint_to_results.get(fingerprint, default)
+
+    def add(self, fingerprint, results):
+        """Adds the results of the evaluation of the architecture with the
+        given fingerprint.
+
+        Args:
+            fingerprint (str): Fingerprint of the architecture.
+            results (dict[str, object]): JSON serializable results of the
+                evaluation.
+        """
+        self.fingerprint_to_results[fingerprint] = results
+        if self.filepath is not None:
+            line = ut.json_object_to_json_string({
+                'fingerprint': fingerprint,
+                'results': results
+            })
+            ut.write_textfile(self.filepath, [line], append=True)
+
+
 def read_evaluation_folder(evaluation_folderpath):
     """Reads all the standard JSON log files associated to a single evaluation.
 
@@ -1,6 +1,9 @@
+import time
+from six.moves import range
 import numpy as np
 import deep_architect.core as co
 import deep_architect.hyperparameters as hp
+import deep_architect.utils as ut
 
 
 class Searcher:
@@ -61,6 +64,57 @@ class Searcher:
         """
         raise NotImplementedError
 
+    def cancel(self, searcher_eval_token):
+        """Tells the searcher that a model that it sampled will not be
+        evaluated, e.g., because it was discarded or its evaluation failed.
+
+        Searchers that keep state for the models that were sampled and not
+        updated yet, e.g., to avoid sampling them again while they are being
+        evaluated, release it. The token must not be passed to :meth:`update`
+        afterwards. By default, it does nothing.
+
+        Args:
+            searcher_eval_token (dict[str, object]): Searcher evaluation token
+                of the model.
+        """
+        pass
+
+    def sample_batch(self, num_samples):
+        """Returns a list of models from the search space.
+
+        Same as calling :meth:`sample` multiple times, but searchers may
+        override it to share work between the models, e.g., drawing random
+        numbers in bulk or scoring all the models with a surrogate model at
+        once. The tokens of the models must all be passed to :meth:`update`
+        or :meth:`update_batch` with the results of the evaluations, or to
+        :meth:`cancel`.
+
+        Args:
+            num_samples (int): Number of models to sample.
+
+        Returns:
+            list[(dict[str, deep_architect.core.Input], dict[str, deep_architect.core.Output], list[object], dict[str, object])]:
+                List of tuples with the same format as the one returned by
+                :meth:`sample`.
+        """
+        return [self.sample() for _ in range(num_samples)]
+
+    def update_batch(self, vals, searcher_eval_tokens):
+        """Updates the state of the searcher with the results of multiple
+        evaluations.
+
+        Same as calling :meth:`update` for each pair of result and token.
+
+        Args:
+            vals (list[object]): Results of the evaluations.
+            searcher_eval_tokens (list[dict[str, object]]): Searcher
+                evaluation tokens of the evaluated models, in the same order
+                as the results.
+        """
+        assert len(vals) == len(searcher_eval_tokens)
+        for val, searcher_eval_token in zip(vals, searcher_eval_tokens):
+            self.update(val, searcher_eval_token)
+
     # TODO: needs to be changed to a nicer API. use sparsely.
     # NOTE: this solution only allows a single saved state per frolder.
     def save_state(self, folderpath):
@@ -70,26 +124,265 @@ class Searcher:
         raise NotImplementedError
 
 
-# TODO: generalize this for other types of hyperparameters. currently only supports
-# discrete hyperparameters.
-def random_specify_hyperparameter(hyperp):
-    """Choose a random value for an unspecified hyperparameter.
+class UniformBuffer:
+    """Random numbers drawn uniformly from ``[0, 1)`` in blocks.
 
-    The hyperparameter becomes specified after the call.
+    Each call to numpy to draw a single random number has a significant
+    overhead. The buffer draws the numbers in blocks and returns them one at a
+    time, e.g., to choose the values of the hyperparameters of many
+    architectures sampled in a batch. See :func:`random_specify`.
 
-    hyperp (deep_architect.core.Hyperparameter): Hyperparameter to specify.
+    Args:
+        block_size (int, optional): Number of random numbers drawn at once.
     """
-    assert not hyperp.has_value_assigned()
 
+    def __init__(self, block_size=1024):
+        self.block_size = block_size
+        self._us = []
+        self._idx = 0
+
+    def draw(self):
+        """Returns the next random number.
+
+        Returns:
+            float: Number uniformly distributed in ``[0, 1)``.
+        """
+        if self._idx == len(self._us):
+            self._us = np.random.uniform(size=self.block_size).tolist()
+            self._idx = 0
+        u = self._us[self._idx]
+        self._idx += 1
+        return u
+
+
+def _randint(n, uniform_buffer=None):
+    if uniform_buffer is None:
+        return np.random.randint(n)
+    return min(int(uniform_buffer.draw() * n), n - 1)
+
+
+def get_allowed_value_indices(hyperp):
+    """Indices of the values of a discrete hyperparameter that satisfy the
+    constraints that involve it, given the values assigned so far.
+
+    See :class:`deep_architect.core.Constraint`.
+
+    Args:
+        hyperp (deep_architect.hyperparameters.Discrete): Unassigned
+            hyperparameter.
+
+    Returns:
+        list[int]: Indices of the allowed values in ``hyperp.vs``.
+    """
+    if len(hyperp.constraints) == 0:
+        return list(range(len(hyperp.vs)))
+    return [i for (i, v) in enumerate(hyperp.vs) if hyperp.is_value_allowed(v)]
+
+
+# NOTE: range hyperparameters with constraints sample candidate values in
+# batches of growing size, and the first allowed one is chosen. the number
+# of candidates is capped, as the constraints may not allow any value.
+_num_candidate_values = 16
+_max_num_candidate_values = 4096
+
+
+def get_candidate_batch_sizes():
+    """Sizes of the batches of candidate values sampled for range
+    hyperparameters with constraints until an allowed one is found.
+
+    Returns:
+        list[int]: Sizes of the batches, doubling from the first one, with
+            the cap on the total number of candidates.
+    """
+    sizes = []
+    num_candidates = 0
+    size = _num_candidate_values
+    while num_candidates < _max_num_candidate_values:
+        sizes.append(min(size, _max_num_candidate_values - num_candidates))
+        num_candidates += sizes[-1]
+        size *= 2
+    return sizes
+
+
+def sample_value_index(hyperp, uniform_buffer=None):
+    """Chooses the index of a random value of a hyperparameter among the
+    values allowed by its constraints.
+
+    For discrete hyperparameters, the index is the position of the value in
+    ``hyperp.vs``. For range hyperparameters, the index is uniformly
+    distributed among the values of the grid of
+    :meth:`deep_architect.hyperparameters.Float.get_index_value`. If they have
+    constraints, indices are sampled until an allowed one is found, up to a
+    maximum number of candidates. Raises
+    :class:`deep_architect.core.InvalidArchitectureError` if no allowed value
+    is found.
+
+    Args:
+        hyperp (deep_architect.core.Hyperparameter): Unassigned
+            hyperparameter.
+        uniform_buffer (deep_architect.searchers.common.UniformBuffer, optional):
+            Source of the random numbers. If ``None``, numpy is called
+            directly.
+
+    Returns:
+        int: Index of the value. See :func:`get_index_value`.
+    """
+    if isinstance(hyperp, hp.Discrete):
+        if len(hyperp.constraints) == 0:
+            return _randint(len(hyperp.vs), uniform_buffer)
+        idxs = get_allowed_value_indices(hyperp)
+    elif isinstance(hyperp, hp.Float):
+        n = hyperp.get_num_index_values()
+        if len(hyperp.constraints) == 0:
+            return _randint(n, uniform_buffer)
+        for _ in range(_max_num_candidate_values):
+            idx = _randint(n, uniform_buffer)
+            if hyperp.is_value_allowed(hyperp.get_index_value(idx)):
+                return idx
+        idxs = []
+    else:
+        raise ValueError
+    if len(idxs) == 0:
+        raise co.InvalidArchitectureError(
+            'No value of %s satisfies the constraints.' % hyperp.get_name())
+    return idxs[_randint(len(idxs), uniform_buffer)]
+
+
+def sample_value(hyperp, uniform_buffer=None):
+    """Chooses a random value for an unassigned hyperparameter among the
+    values allowed by its constraints.
+
+    Discrete hyperparameters choose one of their values uniformly at random.
+    Range hyperparameters (see :class:`deep_architect.hyperparameters.Float`)
+    sample values with
+    :meth:`deep_architect.hyperparameters.Float.sample_values`. If they have
+    constraints, batches of values are sampled until an allowed one is found
+    (see :func:`get_candidate_batch_sizes`). Raises
+    :class:`deep_architect.core.InvalidArchitectureError` if no allowed value
+    is found.
+
+    Args:
+        hyperp (deep_architect.core.Hyperparameter): Unassigned
+            hyperparameter.
+        uniform_buffer (deep_architect.searchers.common.UniformBuffer, optional):
+            Source of the random numbers for discrete hyperparameters. See
+            :func:`sample_value_index`.
+
+    Returns:
+        object: Value for the hyperparameter.
+    """
     if isinstance(hyperp, hp.Discrete):
-        v = hyperp.vs[np.random.randint(len(hyperp.vs))]
-        hyperp.assign_value(v)
+        return hyperp.vs[sample_value_index(hyperp, uniform_buffer)]
+    elif isinstance(hyperp, hp.Float):
+        if len(hyperp.constraints) == 0:
+            return hyperp.sample_values(1)[0]
+        for num_samples in get_candidate_batch_sizes():
+            for v in hyperp.sample_values(num_samples):
+                if hyperp.is_value_allowed(v):
+                    return v
+        raise co.InvalidArchitectureError(
+            'No value of %s satisfies the constraints.' % hyperp.get_name())
     else:
         raise ValueError
+
+
+def random_specify_hyperparameter(hyperp, uniform_buffer=None):
+    """Choose a random value for an unspecified hyperparameter.
+
+    The hyperparameter becomes specified after the call. Only values that
+    satisfy the constraints involving the hyperparameter are chosen (see
+    :class:`deep_architect.core.Constraint`). If there are none, raises
+    :class:`deep_architect.core.InvalidArchitectureError`, as the
+    architecture cannot be valid. See :func:`sample_value`.
+
+    hyperp (deep_architect.core.Hyperparameter): Hyperparameter to specify.
+    uniform_buffer (deep_architect.searchers.common.UniformBuffer, optional):
+        Source of the random numbers. See :func:`sample_value`.
+    """
+    assert not hyperp.has_value_assigned()
+
+    v = sample_value(hyperp, uniform_buffer)
+    hyperp.assign_value(v)
     return v
 
 
-def random_specify(outputs):
+class SamplingStats:
+    """Number of valid and rejected samples and time spent sampling.
+
+    Samples are rejected when specifying the search space raises
+    :class:`deep_architect.core.InvalidArchitectureError`, e.g., because a
+    substitution function found an invalid combination of values, or because
+    no value of a hyperparameter satisfies its constraints. See
+    :func:`sample_valid`.
+    """
+
+    def __init__(self):
+        self.num_valid = 0
+        self.num_rejected = 0
+        self.time_in_seconds = 0.0
+
+    def get_rejection_rate(self):
+        """Fraction of the samples that were rejected."""
+        num_samples = self.num_valid + self.num_rejected
+        if num_samples == 0:
+            return 0.0
+        return float(self.num_rejected) / num_samples
+
+    def get_time_per_valid_sample(self):
+        """Time in seconds spent sampling, including the rejected samples, per
+        valid sample."""
+        if self.num_valid == 0:
+            return 0.0
+        return self.time_in_seconds / self.num_valid
+
+
+def sample_valid(search_space_fn, specify_fn, stats=None,
+                 max_num_attempts=10000):
+    """Samples from new search spaces until specifying one succeeds.
+
+    Only :class:`deep_architect.core.InvalidArchitectureError` rejects a
+    sample. Other errors are raised to the caller.
+
+    Args:
+        search_space_fn (() -> (dict[str,deep_architect.core.Input], dict[str,deep_architect.core.Output])):
+            Returns a new unspecified search space when called.
+        specify_fn (dict[str, deep_architect.core.Output] -> object): Specifies
+            the search space given its outputs, e.g., :func:`random_specify`,
+            raising :class:`deep_architect.core.InvalidArchitectureError` if
+            the architecture is invalid.
+        stats (deep_architect.searchers.common.SamplingStats, optional):
+            Updated with the number of valid and rejected samples and the
+            time spent.
+        max_num_attempts (int, optional): Maximum number of search spaces
+            to try. If ``None``, there is no maximum.
+
+    Returns:
+        (dict[str,deep_architect.core.Input], dict[str,deep_architect.core.Output], object):
+            Inputs and outputs of the specified search space, and the result
+            of ``specify_fn``.
+    """
+    num_attempts = 0
+    while max_num_attempts is None or num_attempts < max_num_attempts:
+        num_attempts += 1
+        start = time.time()
+        try:
+            inputs, outputs = search_space_fn()
+            r = specify_fn(outputs)
+            if stats is not None:
+                stats.num_valid += 1
+            return inputs, outputs, r
+        except co.InvalidArchitectureError:
+            if stats is not None:
+                stats.num_rejected += 1
+        finally:
+            if stats is not None:
+                stats.time_in_seconds += time.time() - start
+    raise RuntimeError(
+        'No valid architecture was sampled in %d attempts. The search space '
+        'may have no valid architectures.' % max_num_attempts)
+
+
+def random_specify(outputs, uniform_buffer=None):
     """Chooses random values to all the unspecified hyperparameters.
 
     The hyperparameters will be specified after this call, meaning that the
@@ -100,10 +393,13 @@ def random_specify(outputs):
             outputs which by being traversed back will reach all the modules
             in the search space, and correspondingly all the current
             unspecified hyperparameters of the search space.
+        uniform_buffer (deep_architect.searchers.common.UniformBuffer, optional):
+            Source of the random numbers, e.g., shared by the architectures
+            of a batch. See :func:`sample_value`.
     """
     hyperp_value_lst = []
     for h in co.unassigned_independent_hyperparameter_iterator(outputs):
-        v = random_specify_hyperparameter(h)
+        v = random_specify_hyperparameter(h, uniform_buffer)
         hyperp_value_lst.append(v)
     return hyperp_value_lst
 
@@ -130,3 +426,195 @@ def specify(outputs, hyperp_value_lst):
     for i, h in enumerate(
             co.unassigned_independent_hyperparameter_iterator(outputs)):
         h.assign_value(hyperp_value_lst[i])
+
+
+def get_hyperp_value_lst_key(hyperp_value_lst):
+    """String that identifies a sequence of values, e.g., to find the
+    architectures that were sampled more than once.
+
+    Args:
+        hyperp_value_lst (list[object]): List of values used to specify the
+            hyperparameters.
+
+    Returns:
+        str: Key of the sequence of values.
+    """
+    return ut.json_object_to_json_string([repr(v) for v in hyperp_value_lst])
+
+
+def get_best_distinct_indices(scores, keys, num_best, excluded_keys=()):
+    """Indices of the highest scores, preferring distinct keys.
+
+    The indices are in decreasing order of score, with ties in the order of
+    the scores. Indices with a key that was already chosen, or that is in
+    ``excluded_keys``, come after all the others, so they are only chosen if
+    there are not enough of the others.
+
+    Args:
+        scores (list[float]): Scores.
+        keys (list[object]): Hashable key for each score, e.g., returned by
+            :func:`get_hyperp_value_lst_key`.
+        num_best (int): Maximum number of indices to return.
+        excluded_keys (set[object], optional): Keys that come last.
+
+    Returns:
+        list[int]: Indices of the chosen scores.
+    """
+    inds = []
+    skipped_inds = []
+    chosen_keys = set()
+    for i in np.argsort(-np.array(scores), kind='mergesort'):
+        if keys[i] in chosen_keys or keys[i] in excluded_keys:
+            skipped_inds.append(i)
+        else:
+            inds.append(i)
+            chosen_keys.add(keys[i])
+    return (inds + skipped_inds)[:num_best]
+
+
+def get_value_index(hyperp, v):
+    """Index of a value in the list of possible values of a hyperparameter.
+
+    For range hyperparameters, the index is the position of the value in the
+    grid of :meth:`deep_architect.hyperparameters.Float.get_value_index`,
+    e.g., the offset from the smallest value for integer hyperparameters.
+    Raises ``ValueError`` for values of range hyperparameters that are not in
+    the grid.
+
+    Args:
+        hyperp (deep_architect.core.Hyperparameter): Hyperparameter.
+        v (object): One of the possible values of the hyperparameter.
+
+    Returns:
+        int: Index of the value.
+    """
+    if isinstance(hyperp, hp.Discrete):
+        return list(hyperp.vs).index(v)
+    elif isinstance(hyperp, hp.Float):
+        return hyperp.get_value_index(v)
+    else:
+        raise ValueError
+
+
+def get_index_value(hyperp, idx):
+    """Value of a hyperparameter for an index. Inverse of
+    :func:`get_value_index`.
+
+    Args:
+        hyperp (deep_architect.core.Hyperparameter): Hyperparameter.
+        idx (int): Index of the value.
+
+    Returns:
+        object: Value of the hyperparameter.
+    """
+    if isinstance(hyperp, hp.Discrete):
+        return hyperp.vs[int(idx)]
+    elif isinstance(hyperp, hp.Float):
+        return hyperp.get_index_value(int(idx))
+    else:
+        raise ValueError
+
+
+def random_specify_indices(outputs):
+    """Same as :func:`random_specify`, but returns the indices of the chosen
+    values in the lists of possible values of the hyperparameters.
+
+    The list of indices is a compact encoding of the sampled architecture that
+    can be replayed with :func:`specify_indices`. Range hyperparameters
+    choose values in the grid of indices of
+    :meth:`deep_architect.hyperparameters.Float.get_index_value` rather than
+    in the whole interval. See :func:`sample_value_index`.
+
+    Args:
+        outputs (dict[str, deep_architect.core.Output]): Dictionary of named
+            outputs which by being traversed back will reach all the modules
+            in the search space, and correspondingly all the current
+            unspecified hyperparameters of the search space.
+
+    Returns:
+        list[int]: Index of the value chosen for each hyperparameter, in the
+            order in which the hyperparameters were specified.
+    """
+    index_lst = []
+    for h in co.unassigned_independent_hyperparameter_iterator(outputs):
+        idx = sample_value_index(h)
+        h.assign_value(get_index_value(h, idx))
+        index_lst.append(idx)
+    return index_lst
+
+
+def specify_indices(outputs, index_lst):
+    """Specify the hyperparameters in the search space using a sequence of
+    indices into the lists of possible values of the hyperparameters.
+
+    Same as :func:`specify`, but for the encoding returned by
+    :func:`random_specify_indices` and :func:`hyperp_value_lst_to_index_lst`.
+    Each index is converted into its value in constant time, so replaying the
+    indices takes as long as replaying the values with :func:`specify`. Most
+    of the time is spent in
+    :func:`deep_architect.core.unassigned_independent_hyperparameter_iterator`,
+    which may traverse the graph once per round of substitutions, so the time
+    is not always linear in the size of the architecture for nested search
+    spaces.
+
+    Args:
+        outputs (dict[str, deep_architect.core.Output]): Dictionary of named
+            outputs which by being traversed back will reach all the modules
+            in the search space, and correspondingly all the current
+            unspecified hyperparameters of the search space.
+        index_lst (list[int] or numpy.ndarray): Indices of the values used to
+            specify the hyperparameters.
+    """
+    for i, h in enumerate(
+            co.unassigned_independent_hyperparameter_iterator(outputs)):
+        h.assign_value(get_index_value(h, index_lst[i]))
+
+
+def hyperp_value_lst_to_index_lst(outputs, hyperp_value_lst):
+    """Converts a sequence of values into the equivalent sequence of indices.
+
+    The search space is specified with the values in the process, as in
+    :func:`specify`, as the hyperparameters that are specified later may
+    depend on the values assigned to the earlier ones.
+
+    Args:
+        outputs (dict[str, deep_architect.core.Output]): Dictionary of named
+            outputs of an unspecified search space.
+        hyperp_value_lst (list[object]): List of values used to specify the
+            hyperparameters, e.g., as returned by :func:`random_specify`.
+
+    Returns:
+        list[int]: Index of each value in the list of possible values of the
+            corresponding hyperparameter.
+    """
+    index_lst = []
+    for i, h in enumerate(
+            co.unassigned_independent_hyperparameter_iterator(outputs)):
+        v = hyperp_value_lst[i]
+        index_lst.append(get_value_index(h, v))
+        h.assign_value(v)
+    return index_lst
+
+
+def index_lst_to_hyperp_value_lst(outputs, index_lst):
+    """Converts a sequence of indices into the equivalent sequence of values.
+
+    The search space is specified in the process, as in
+    :func:`specify_indices`.
+
+    Args:
+        outputs (dict[str, deep_architect.core.Output]): Dictionary of named
+            outputs of an unspecified search space.
+        index_lst (list[int] or numpy.ndarray): Indices of the values used to
+            specify the hyperparameters.
+
+    Returns:
+        list[object]: List of values that can be used with :func:`specify`.
+    """
+    hyperp_value_lst = []
+    for i, h in enumerate(
+            co.unassigned_independent_hyperparameter_iterator(outputs)):
+        v = get_index_value(h, index_lst[i])
+        h.assign_value(v)
+        hyperp_value_lst.append(v)
+    return hyperp_value_lst
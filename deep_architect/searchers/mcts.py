@@ -1,180 +1,605 @@
 import deep_architect.core as co
 import deep_architect.hyperparameters as hp
-from deep_architect.searchers.common import Searcher
+from deep_architect.searchers.common import (Searcher, SamplingStats,
+                                             UniformBuffer, sample_valid,
+                                             sample_value, sample_value_index,
+                                             get_allowed_value_indices,
+                                             get_candidate_batch_sizes)
 import numpy as np
 import deep_architect.utils as ut
 import os
+import uuid
 
 
-# keeps the statistics and knows how to update information related to a node.
-class MCTSTreeNode:
-    """Encapsulates the information contained in a single node of the MCTS tree.
+class MCTSTree:
+    """Tree of the Monte Carlo tree search, stored as a structure of arrays.
 
-    See also :class:`deep_architect.searchers.MCTSSearcher`.
+    Nodes are identified by integer ids, with the root having id ``0``. The
+    statistics of the nodes, i.e., the number of trials and the sum of the
+    scores, are kept in contiguous numpy arrays indexed by node id. The
+    children of a node are created together when the node is expanded, so
+    they have consecutive ids, and each node keeps the id of its first child
+    and its number of children. The arrays grow geometrically as the tree is
+    expanded.
+
+    Nodes also keep the number of pending trials, i.e., trials that have been
+    started but whose score is not known yet. See :meth:`best_child`.
+
+    See also :class:`deep_architect.searchers.mcts.MCTSSearcher`.
+
+    Args:
+        capacity (int, optional): Number of nodes for which space is
+            allocated initially.
     """
 
-    def __init__(self, parent_node):
-        self.num_trials = 0
-        self.sum_scores = 0.0
+    _array_names = [
+        'num_trials', 'sum_scores', 'first_child', 'num_children',
+        'num_pending'
+    ]
+
+    def __init__(self, capacity=1024):
+        self.num_nodes = 1
+        self.num_trials = np.zeros(capacity, dtype='int64')
+        self.sum_scores = np.zeros(capacity, dtype='float64')
+        # id of the first child of each node, and -1 for leaves.
+        self.first_child = np.full(capacity, -1, dtype='int64')
+        self.num_children = np.zeros(capacity, dtype='int32')
+        self.num_pending = np.zeros(capacity, dtype='int32')
+        # nodes changed since the last call to clear_changes. the nodes
+        # created since then are not included.
+        self._changed_nodes = set()
+        self._num_unchanged_nodes = 1
+
+    def get_num_nodes(self):
+        return self.num_nodes
+
+    def is_leaf(self, node):
+        return self.first_child[node] < 0
+
+    def get_child(self, node, i):
+        """Id of the ``i``-th child of a node."""
+        assert 0 <= i < self.num_children[node]
+        return int(self.first_child[node]) + i
 
-        self.parent = parent_node
-        self.children = None
+    # expands a node creating all the placeholders for the children.
+    def expand(self, node, num_children):
+        assert self.is_leaf(node)
+        self._reserve(self.num_nodes + num_children)
+        self.first_child[node] = self.num_nodes
+        self.num_children[node] = num_children
+        self.num_nodes += num_children
+        self._changed_nodes.add(node)
+
+    def best_child(self,
+                   node,
+                   exploration_bonus,
+                   allowed_inds=None,
+                   virtual_loss=None):
+        """Index of the child with the highest UCT score among the allowed
+        ones, breaking ties at random.
+
+        Args:
+            node (int): Id of a node that is not a leaf.
+            exploration_bonus (float): Weight of the exploration term.
+            allowed_inds (list[int], optional): Indices of the children that
+                can be chosen. If ``None``, all of them can.
+            virtual_loss (float, optional): If not ``None``, pending trials
+                count as trials with this score, so that trials started
+                before the scores of the previous ones are known go down
+                different paths.
+
+        Returns:
+            int: Index of the chosen child.
+        """
+        assert not self.is_leaf(node)
+        start = self.first_child[node]
+        end = start + self.num_children[node]
+        num_trials = self.num_trials[start:end]
+        sum_scores = self.sum_scores[start:end]
+        parent_nt = self.num_trials[node]
+        if virtual_loss is not None:
+            num_pending = self.num_pending[start:end]
+            num_trials = num_trials + num_pending
+            sum_scores = sum_scores + virtual_loss * num_pending
+            parent_nt += self.num_pending[node]
+
+        # NOTE: potentially, do a different definition for the scores.
+        # especially once the surrogate model is introduced.
+        # selection policy may be somewhat biased towards what the
+        # rollout policy based on surrogate functions says.
+        # think about how to extend this.
+        # children that were not tried have infinite score. if the parent was
+        # not tried, none of its children were.
+        parent_log_nt = np.log(parent_nt) if parent_nt > 0 else 0.0
+        visited = num_trials > 0
+        nt = np.maximum(num_trials, 1)
+        scores = np.where(
+            visited, sum_scores / nt +
+            exploration_bonus * np.sqrt(2.0 * parent_log_nt / nt), np.inf)
+        if allowed_inds is not None:
+            # no child is allowed by the constraints.
+            if len(allowed_inds) == 0:
+                raise co.InvalidArchitectureError(
+                    'No child satisfies the constraints.')
+            allowed_scores = np.full(len(scores), -np.inf)
+            allowed_scores[allowed_inds] = scores[allowed_inds]
+            scores = allowed_scores
+        best_inds = np.flatnonzero(scores == scores.max())
+        return int(best_inds[np.random.randint(len(best_inds))])
+
+    def update_stats(self, nodes, score):
+        """Adds a trial with the given score to each of the nodes.
+
+        Args:
+            nodes (list[int]): Ids of distinct nodes, e.g., a path from the
+                root.
+            score (float): Score of the trial.
+        """
+        self.num_trials[nodes] += 1
+        self.sum_scores[nodes] += score
+        self._changed_nodes.update(nodes)
+
+    def add_pending(self, nodes, num_pending):
+        """Adds to the number of pending trials of each of the nodes.
+
+        Args:
+            nodes (list[int]): Ids of distinct nodes, e.g., a path from the
+                root.
+            num_pending (int): Number of trials to add, or to remove if
+                negative.
+        """
+        self.num_pending[nodes] += num_pending
+        self._changed_nodes.update(nodes)
+
+    def get_path(self, child_inds):
+        """Ids of the nodes on the path from the root that follows the
+        children with the given indices, including the root."""
+        nodes = [0]
+        for i in child_inds:
+            nodes.append(self.get_child(nodes[-1], i))
+        return nodes
+
+    def _reserve(self, num_nodes):
+        capacity = len(self.num_trials)
+        if num_nodes <= capacity:
+            return
+        while capacity < num_nodes:
+            capacity *= 2
+        for name, fill_value in [('num_trials', 0), ('sum_scores', 0.0),
+                                 ('first_child', -1), ('num_children', 0),
+                                 ('num_pending', 0)]:
+            old = getattr(self, name)
+            new = np.full(capacity, fill_value, dtype=old.dtype)
+            new[:self.num_nodes] = old[:self.num_nodes]
+            setattr(self, name, new)
+
+    def get_arrays(self):
+        """Arrays with the statistics and the children of the nodes, trimmed
+        to the number of nodes.
+
+        Returns:
+            dict[str, numpy.ndarray]: Dictionary mapping the names of the
+                arrays to the arrays.
+        """
+        return {
+            name: getattr(self, name)[:self.num_nodes]
+            for name in self._array_names
+        }
 
-    def is_leaf(self):
-        return self.children == None
+    @staticmethod
+    def from_arrays(arrays):
+        """Recreates the tree from the result of :meth:`get_arrays`."""
+        n = len(arrays['num_trials'])
+        tree = MCTSTree(max(n, 1))
+        tree.num_nodes = n
+        for name in MCTSTree._array_names:
+            # arrays that are missing keep their default values.
+            if name in arrays:
+                getattr(tree, name)[:n] = arrays[name]
+        tree.clear_changes()
+        return tree
+
+    def get_changes(self):
+        """Nodes changed or created since the last call to
+        :meth:`clear_changes`.
+
+        Returns:
+            (numpy.ndarray, dict[str, numpy.ndarray]):
+                Sorted ids of the nodes, and dictionary with the values of
+                the arrays of the tree for those nodes.
+        """
+        node_ids = np.union1d(
+            np.array(sorted(self._changed_nodes), dtype='int64'),
+            np.arange(self._num_unchanged_nodes, self.num_nodes))
+        return node_ids, {
+            name: getattr(self, name)[node_ids] for name in self._array_names
+        }
+
+    def apply_changes(self, num_nodes, node_ids, arrays):
+        """Sets the number of nodes and the values for the given nodes,
+        as returned by :meth:`get_changes`."""
+        self._reserve(num_nodes)
+        self.num_nodes = num_nodes
+        for name in self._array_names:
+            if name in arrays:
+                getattr(self, name)[node_ids] = arrays[name]
+
+    def clear_changes(self):
+        self._changed_nodes = set()
+        self._num_unchanged_nodes = self.num_nodes
 
-    def update_stats(self, score):
-        self.sum_scores += score
-        self.num_trials += 1
-
-    # returns the child with the highest UCT score.
-    def best_child(self, exploration_bonus):
-        assert not self.is_leaf()
-
-        # if two nodes have the same score.
-        best_inds = None
-        best_score = -np.inf
-
-        best_child = best_i = None
-
-        parent_log_nt = np.log(self.num_trials)
-        for (i, node) in enumerate(self.children):
-            # NOTE: potentially, do a different definition for the scores.
-            # especially once the surrogate model is introduced.
-            # selection policy may be somewhat biased towards what the
-            # rollout policy based on surrogate functions says.
-            # think about how to extend this.
-            if node.num_trials > 0:
-                score = (node.sum_scores / node.num_trials + exploration_bonus *
-                         np.sqrt(2.0 * parent_log_nt / node.num_trials))
-            else:
-                score = np.inf
+    @staticmethod
+    def from_nested_lists(serialization):
+        """Recreates the tree from the nested ``(num_trials, sum_scores,
+        children)`` lists saved by previous versions of
+        :class:`MCTSSearcher`."""
+        tree = MCTSTree()
+        tree.num_trials[0] = serialization[0]
+        tree.sum_scores[0] = serialization[1]
+        stack = [(0, serialization)]
+        while len(stack) > 0:
+            node, (_, _, children) = stack.pop()
+            if len(children) > 0:
+                tree.expand(node, len(children))
+                for i, child in enumerate(children):
+                    child_node = tree.get_child(node, i)
+                    tree.num_trials[child_node] = child[0]
+                    tree.sum_scores[child_node] = child[1]
+                    stack.append((child_node, child))
+        tree.clear_changes()
+        return tree
+
+
+class MCTSTreeNode(object):
+    """View of a node of a :class:`MCTSTree` with the interface of the nodes
+    of previous versions of :class:`MCTSSearcher`.
+
+    The statistics are read from and written to the arrays of the tree, so
+    changes made through the view are seen by the searcher and vice versa.
+    New code should use the methods of :class:`MCTSTree` directly.
+
+    Args:
+        tree (MCTSTree): Tree that contains the node.
+        node (int, optional): Id of the node in the tree.
+        parent (MCTSTreeNode, optional): View of the parent of the node.
+    """
+
+    def __init__(self, tree, node=0, parent=None):
+        self.tree = tree
+        self.node = node
+        self.parent = parent
+
+    @property
+    def num_trials(self):
+        return int(self.tree.num_trials[self.node])
+
+    @num_trials.setter
+    def num_trials(self, num_trials):
+        self.tree.num_trials[self.node] = num_trials
+        self.tree._changed_nodes.add(self.node)
+
+    @property
+    def sum_scores(self):
+        return float(self.tree.sum_scores[self.node])
+
+    @sum_scores.setter
+    def sum_scores(self, sum_scores):
+        self.tree.sum_scores[self.node] = sum_scores
+        self.tree._changed_nodes.add(self.node)
+
+    @property
+    def children(self):
+        if self.is_leaf():
+            return None
+        return [
+            MCTSTreeNode(self.tree, self.tree.get_child(self.node, i), self)
+            for i in range(self.tree.num_children[self.node])
+        ]
 
-            # keep the best node.
-            if score > best_score:
-                best_inds = [i]
-                best_score = score
-            elif score == best_score:
-                best_inds.append(i)
+    def is_leaf(self):
+        return self.tree.is_leaf(self.node)
 
-            # draw a child at random and expand.
-            best_i = np.random.choice(best_inds)
-            best_child = self.children[best_i]
+    def update_stats(self, score):
+        self.tree.update_stats([self.node], score)
 
-        assert best_child is not None and best_i is not None
-        return (best_child, best_i)
+    def best_child(self, exploration_bonus, allowed_inds=None):
+        i = self.tree.best_child(self.node, exploration_bonus, allowed_inds)
+        return (MCTSTreeNode(self.tree, self.tree.get_child(self.node, i),
+                             self), i)
 
-    # expands a node creating all the placeholders for the children.
     def expand(self, num_children):
-        self.children = [MCTSTreeNode(self) for _ in range(num_children)]
+        self.tree.expand(self.node, num_children)
 
-    #### TODO: remove serialize and deserialize and
     @staticmethod
     def serialize(node):
-        children = [] if node.children is None else [
+        children = [] if node.is_leaf() else [
             MCTSTreeNode.serialize(child) for child in node.children
         ]
         return (node.num_trials, node.sum_scores, children)
 
     @staticmethod
     def deserialize(serialization, parent=None):
-        node = MCTSTreeNode(parent)
-        node.num_trials = serialization[0]
-        node.sum_scores = serialization[1]
-        node.children = [
-            MCTSTreeNode.deserialize(child, node) for child in serialization[2]
-        ]
-        return node
+        assert parent is None
+        return MCTSTreeNode(MCTSTree.from_nested_lists(serialization))
+
+
+def _get_num_bins(h, num_bins):
+    """Number of children of the tree nodes for a hyperparameter."""
+    if isinstance(h, hp.Discrete):
+        return len(h.vs)
+    elif isinstance(h, hp.Int):
+        return min(h.get_domain_size(), num_bins)
+    elif isinstance(h, hp.Float):
+        return num_bins
+    else:
+        raise ValueError
+
+
+def _get_bin_index(h, v, num_bins):
+    """Index of the bin of a value of a range hyperparameter."""
+    n = _get_num_bins(h, num_bins)
+    return min(int(h.encode(v) * n), n - 1)
+
+
+def _sample_bin_value(h, i, num_bins):
+    """Samples a value in a bin of the range of a range hyperparameter, i.e.,
+    in the interval ``[i / n, (i + 1) / n]`` of the encoded values, among the
+    values allowed by the constraints of the hyperparameter."""
+    n = _get_num_bins(h, num_bins)
+    if len(h.constraints) == 0:
+        x = (i + np.random.uniform()) / float(n)
+        return h.to_values(h.decode(np.array([x])))[0]
+    for num_samples in get_candidate_batch_sizes():
+        xs = (i + np.random.uniform(size=num_samples)) / float(n)
+        for v in h.to_values(h.decode(xs)):
+            if h.is_value_allowed(v):
+                return v
+    raise co.InvalidArchitectureError(
+        'No value of %s in the bin satisfies the constraints.' % h.get_name())
 
 
 class MCTSSearcher(Searcher):
+    """Searcher based on Monte Carlo tree search.
+
+    Values that do not satisfy the constraints of the search space (see
+    :class:`deep_architect.core.Constraint`) are not chosen, neither in the
+    tree nor in the rollout. Samples for which specifying the search space
+    fails are rejected and counted in ``stats``.
+
+    Evaluations of sampled architectures may be pending when the next
+    architectures are sampled, e.g., with many asynchronous workers. If
+    ``virtual_loss`` is not ``None``, each sampled architecture counts as a
+    pending trial with that score along its path in the tree until it is
+    updated, so that pending architectures go down different paths. The
+    searcher evaluation token records that the trial is pending. The tokens
+    of architectures that will not be evaluated must be passed to
+    :meth:`cancel`, which removes the pending trial.
+
+    The range of a range hyperparameter (see
+    :class:`deep_architect.hyperparameters.Float`) is split in bins of equal
+    size in its encoded space, with a child in the tree for each bin. The value
+    is sampled uniformly at random in the chosen bin. Integer hyperparameters
+    with fewer values than bins have a child for each value.
+
+    Args:
+        search_space_fn (() -> (dict[str,deep_architect.core.Input], dict[str,deep_architect.core.Output])):
+            Returns a new unspecified search space when called.
+        exploration_bonus (float, optional): Weight of the exploration term of
+            the UCT score.
+        num_bins (int, optional): Number of bins for range hyperparameters.
+        max_num_checkpoint_deltas (int, optional): Maximum number of
+            incremental checkpoints written by :meth:`save_state` after a
+            full checkpoint.
+        virtual_loss (float, optional): Score of pending trials, e.g., the
+            lowest possible score. If ``None``, pending trials are ignored.
+    """
 
-    def __init__(self, search_space_fn, exploration_bonus=1.0):
+    def __init__(self,
+                 search_space_fn,
+                 exploration_bonus=1.0,
+                 num_bins=4,
+                 max_num_checkpoint_deltas=16,
+                 virtual_loss=None):
         Searcher.__init__(self, search_space_fn)
         self.exploration_bonus = exploration_bonus
-        self.mcts_root_node = MCTSTreeNode(None)
+        self.num_bins = num_bins
+        self.virtual_loss = virtual_loss
+        self.max_num_checkpoint_deltas = max_num_checkpoint_deltas
+        self.tree = MCTSTree()
+        # folder, id, and number of deltas of the last checkpoint written or
+        # loaded.
+        self._checkpoint = None
+        self.stats = SamplingStats()
+
+    @property
+    def mcts_root_node(self):
+        """View of the root of the tree kept for compatibility with previous
+        versions. See :class:`MCTSTreeNode`."""
+        return MCTSTreeNode(self.tree)
 
     # NOTE: this operation changes the state of the tree.
     def sample(self):
-        while True:
-            try:
-                inputs, outputs = self.search_space_fn()
-
-                h_it = co.unassigned_independent_hyperparameter_iterator(
-                    outputs)
-                tree_hist, tree_vs = self._tree_walk(h_it)
-                rollout_hist, rollout_vs = self._rollout_walk(h_it)
-                vs = tree_vs + rollout_vs
-                searcher_eval_token = {
-                    'tree_hist': tree_hist,
-                    'rollout_hist': rollout_hist
-                }
-
-                return inputs, outputs, vs, searcher_eval_token
-            except ValueError:
-                pass
+        return self._sample()
+
+    # NOTE: the tree walks are done one after the other, as each of them
+    # expands the tree. the random numbers are drawn in bulk.
+    def sample_batch(self, num_samples):
+        uniform_buffer = UniformBuffer()
+        return [self._sample(uniform_buffer) for _ in range(num_samples)]
+
+    def _sample(self, uniform_buffer=None):
+
+        def specify_fn(outputs):
+            h_it = co.unassigned_independent_hyperparameter_iterator(outputs)
+            tree_hist, tree_vs = self._tree_walk(h_it, uniform_buffer)
+            rollout_hist, rollout_vs = self._rollout_walk(h_it, uniform_buffer)
+            return tree_hist, tree_vs, rollout_hist, rollout_vs
+
+        inputs, outputs, (tree_hist, tree_vs, rollout_hist,
+                          rollout_vs) = sample_valid(self.search_space_fn,
+                                                     specify_fn, self.stats)
+        vs = tree_vs + rollout_vs
+        searcher_eval_token = {
+            'tree_hist': tree_hist,
+            'rollout_hist': rollout_hist
+        }
+        if self.virtual_loss is not None:
+            self.tree.add_pending(self.tree.get_path(tree_hist), 1)
+            searcher_eval_token['is_pending'] = True
+        return inputs, outputs, vs, searcher_eval_token
 
     def update(self, val, searcher_eval_token):
-        node = self.mcts_root_node
-        node.update_stats(val)
+        path = self.tree.get_path(searcher_eval_token['tree_hist'])
+        self._remove_pending(path, searcher_eval_token)
+        self.tree.update_stats(path, val)
+
+    def cancel(self, searcher_eval_token):
+        path = self.tree.get_path(searcher_eval_token['tree_hist'])
+        self._remove_pending(path, searcher_eval_token)
 
-        for i in searcher_eval_token['tree_hist']:
-            node = node.children[i]
-            node.update_stats(val)
+    def _remove_pending(self, path, searcher_eval_token):
+        if searcher_eval_token.get('is_pending', False):
+            self.tree.add_pending(path, -1)
+            searcher_eval_token['is_pending'] = False
 
-    def _tree_walk(self, h_it):
+    def _tree_walk(self, h_it, uniform_buffer=None):
         hist = []
         vs = []
 
-        node = self.mcts_root_node
+        tree = self.tree
+        node = 0
         for h in h_it:
-            if not node.is_leaf():
-                node, i = node.best_child(self.exploration_bonus)
-                v = h.vs[i]
-                h.assign_value(v)
-
-                hist.append(i)
-                vs.append(v)
+            is_discrete = isinstance(h, hp.Discrete)
+            is_leaf = tree.is_leaf(node)
+            if not is_leaf:
+                allowed_inds = (get_allowed_value_indices(h) if
+                                is_discrete and len(h.constraints) > 0 else
+                                None)
+                i = tree.best_child(node, self.exploration_bonus,
+                                    allowed_inds, self.virtual_loss)
+                node = tree.get_child(node, i)
             else:
-                # NOTE: only implemented for discrete hyperparameters.
                 # does the expansion after tree walk.
-                if isinstance(h, hp.Discrete):
-                    node.expand(len(h.vs))
-
-                    i = np.random.randint(0, len(h.vs))
-                    v = h.vs[i]
-                    h.assign_value(v)
-
-                    hist.append(i)
-                    vs.append(v)
-                else:
-                    raise ValueError
+                num_children = _get_num_bins(h, self.num_bins)
+                tree.expand(node, num_children)
+                i = (sample_value_index(h, uniform_buffer) if is_discrete else
+                     np.random.randint(num_children))
+
+            v = h.vs[i] if is_discrete else _sample_bin_value(
+                h, i, self.num_bins)
+            h.assign_value(v)
+
+            hist.append(i)
+            vs.append(v)
+            if is_leaf:
                 break
         return hist, vs
 
-    def _rollout_walk(self, h_it):
+    def _rollout_walk(self, h_it, uniform_buffer=None):
         hist = []
         vs = []
 
         for h in h_it:
             if isinstance(h, hp.Discrete):
-                i = np.random.randint(0, len(h.vs))
+                i = sample_value_index(h, uniform_buffer)
                 v = h.vs[i]
-                h.assign_value(v)
-
-                hist.append(i)
-                vs.append(v)
             else:
-                raise ValueError
+                v = sample_value(h)
+                i = _get_bin_index(h, v, self.num_bins)
+            h.assign_value(v)
+
+            hist.append(i)
+            vs.append(v)
         return hist, vs
 
     def save_state(self, folderpath):
-        ut.write_jsonfile(
-            {
-                'mcts_root_node': MCTSTreeNode.serialize(self.mcts_root_node),
-            }, ut.join_paths([folderpath, 'mcts_searcher_state.json']))
+        """Writes a checkpoint of the tree to the folder.
+
+        The tree is written in binary form to ``mcts_tree.npz``. If the last
+        checkpoint was written to or loaded from the same folder, only the
+        nodes changed since then are written, to
+        ``mcts_tree_delta_<i>.npz``. A full checkpoint is written instead
+        after ``max_num_checkpoint_deltas`` incremental ones, or if more than
+        half of the nodes changed. Files are written atomically, and deltas
+        are tagged with the id of their full checkpoint, so a checkpoint that
+        is interrupted leaves the previous one readable.
+        """
+        node_ids, arrays = self.tree.get_changes()
+        if (self._checkpoint is not None and
+                self._checkpoint['folderpath'] == folderpath and
+                self._checkpoint['num_deltas'] < self.max_num_checkpoint_deltas
+                and 2 * len(node_ids) <= self.tree.num_nodes):
+            arrays['checkpoint_id'] = np.array(self._checkpoint['id'])
+            arrays['num_nodes'] = np.array(self.tree.num_nodes)
+            arrays['node_ids'] = node_ids
+            _write_npzfile(
+                arrays,
+                _get_delta_filepath(folderpath,
+                                    self._checkpoint['num_deltas']))
+            self._checkpoint['num_deltas'] += 1
+        else:
+            checkpoint_id = uuid.uuid4().hex
+            arrays = self.tree.get_arrays()
+            arrays['checkpoint_id'] = np.array(checkpoint_id)
+            _write_npzfile(arrays,
+                           ut.join_paths([folderpath, 'mcts_tree.npz']))
+            # the deltas of the previous checkpoint are no longer valid.
+            i = 0
+            while ut.file_exists(_get_delta_filepath(folderpath, i)):
+                ut.delete_file(_get_delta_filepath(folderpath, i))
+                i += 1
+            self._checkpoint = {
+                'folderpath': folderpath,
+                'id': checkpoint_id,
+                'num_deltas': 0
+            }
+        self.tree.clear_changes()
 
     def load_state(self, folderpath):
-        state = ut.read_jsonfile(
-            ut.join_paths([folderpath, 'mcts_searcher_state.json']))
-        self.mcts_root_node = MCTSTreeNode.deserialize(state['mcts_root_node'])
+        filepath = ut.join_paths([folderpath, 'mcts_tree.npz'])
+        if ut.file_exists(filepath):
+            arrays = _read_npzfile(filepath)
+            checkpoint_id = str(arrays['checkpoint_id'])
+            self.tree = MCTSTree.from_arrays(arrays)
+            i = 0
+            while ut.file_exists(_get_delta_filepath(folderpath, i)):
+                arrays = _read_npzfile(_get_delta_filepath(folderpath, i))
+                # deltas of an older checkpoint.
+                if str(arrays['checkpoint_id']) != checkpoint_id:
+                    break
+                self.tree.apply_changes(int(arrays['num_nodes']),
+                                        arrays['node_ids'], arrays)
+                i += 1
+            self.tree.clear_changes()
+            self._checkpoint = {
+                'folderpath': folderpath,
+                'id': checkpoint_id,
+                'num_deltas': i
+            }
+        else:
+            # nested lists written by previous versions.
+            state = ut.read_jsonfile(
+                ut.join_paths([folderpath, 'mcts_searcher_state.json']))
+            self.tree = MCTSTree.from_nested_lists(state['mcts_root_node'])
+            self._checkpoint = None
+
+
+def _get_delta_filepath(folderpath, i):
+    return ut.join_paths([folderpath, 'mcts_tree_delta_%d.npz' % i])
+
+
+def _write_npzfile(arrays, filepath):
+    """Writes the arrays to a temporary file that then replaces the file, so
+    the file is either the previous one or the new one in full."""
+    tmp_filepath = filepath + '.tmp'
+    with open(tmp_filepath, 'wb') as f:
+        np.savez(f, **arrays)
+    if hasattr(os, 'replace'):
+        os.replace(tmp_filepath, filepath)
+    else:
+        os.rename(tmp_filepath, filepath)
+
+
+def _read_npzfile(filepath):
+    with np.load(filepath) as d:
+        return {k: d[k] for k in d.files}
@@ -0,0 +1,210 @@
+import threading
+import time
+from collections import deque
+from deep_architect.searchers.common import Searcher
+
+
+class PrefetchStats:
+    """Number of samples handed out by a :class:`PrefetchingSearcher`, time
+    spent waiting for them, and depth of the queue when they were requested.
+    """
+
+    def __init__(self):
+        self.num_samples = 0
+        self.num_waits = 0
+        self.time_waiting = 0.0
+        self.sum_queue_depths = 0
+        self.num_discarded = 0
+
+    def get_average_wait_time(self):
+        """Time in seconds spent waiting per sample handed out, including
+        the samples that were already in the queue."""
+        if self.num_samples == 0:
+            return 0.0
+        return self.time_waiting / self.num_samples
+
+    def get_average_queue_depth(self):
+        """Average number of samples in the queue when a sample was
+        requested."""
+        if self.num_samples == 0:
+            return 0.0
+        return float(self.sum_queue_depths) / self.num_samples
+
+
+class PrefetchingSearcher(Searcher):
+    """Searcher that samples architectures from another searcher in a
+    background thread and keeps them in a bounded queue.
+
+    Calls to :meth:`sample` take an architecture from the queue, waiting only
+    if the queue is empty, so the time to sample architectures overlaps with
+    the time the master spends waiting for the workers. The background thread
+    fills the queue with the ``sample_batch`` method of the wrapped searcher
+    (see :meth:`deep_architect.searchers.common.Searcher.sample_batch`).
+
+    Access to the wrapped searcher is serialized with a lock, as searchers
+    are not thread safe: an update waits for the batch that is being sampled,
+    if any, and is applied before the next batch is sampled. An update may
+    therefore block for the time it takes the wrapped searcher to sample
+    ``batch_size`` architectures, so a small ``batch_size`` keeps updates
+    responsive. Architectures that are already in the queue were sampled
+    without the information of the later updates. If ``discard_on_update``
+    is ``True``, they are discarded on each update, which keeps the samples
+    up to date at the cost of sampling them again. Discarded architectures,
+    including the ones discarded when the state is loaded, are passed to the
+    ``cancel`` method of the wrapped searcher (see
+    :meth:`deep_architect.searchers.common.Searcher.cancel`) before its
+    state changes.
+
+    Errors raised by the wrapped searcher in the background thread are raised
+    by :meth:`sample` once the queue is empty. Searchers that can only sample
+    after receiving the updates for the previous architectures, e.g.,
+    :class:`deep_architect.searchers.successive_narrowing.SuccessiveNarrowing`
+    at the end of a round, are not supported.
+
+    .. note::
+        The background thread is a daemon thread, so it does not keep the
+        process alive. Sampling runs in the same process as the master, so it
+        overlaps with the master waiting on communication and file operations,
+        but not with computation in Python in other threads.
+
+    Args:
+        searcher (deep_architect.searchers.common.Searcher): Searcher used to
+            sample the architectures.
+        queue_size (int, optional): Maximum number of architectures in the
+            queue.
+        batch_size (int, optional): Maximum number of architectures sampled
+            at once by the background thread.
+        discard_on_update (bool, optional): Whether to discard the
+            architectures in the queue on each update.
+    """
+
+    def __init__(self,
+                 searcher,
+                 queue_size=4,
+                 batch_size=1,
+                 discard_on_update=False):
+        assert queue_size > 0 and batch_size > 0
+        Searcher.__init__(self, searcher.search_space_fn)
+        self.searcher = searcher
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.discard_on_update = discard_on_update
+        self.stats = PrefetchStats()
+
+        # guards the wrapped searcher.
+        self._searcher_lock = threading.Lock()
+        # guards the queue and the fields below.
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._fill_queue)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def get_queue_depth(self):
+        """Number of architectures in the queue."""
+        with self._cond:
+            return len(self._queue)
+
+    def sample(self):
+        start = time.time()
+        with self._cond:
+            self.stats.sum_queue_depths += len(self._queue)
+            if len(self._queue) == 0:
+                self.stats.num_waits += 1
+            while (len(self._queue) == 0 and self._error is None and
+                   not self._closed):
+                self._cond.wait()
+            if len(self._queue) > 0:
+                sample = self._queue.popleft()
+                self._cond.notify_all()
+            elif self._error is not None:
+                raise self._error
+            else:
+                sample = None
+
+        # the background thread was stopped.
+        if sample is None:
+            with self._searcher_lock:
+                sample = self.searcher.sample()
+        with self._cond:
+            self.stats.num_samples += 1
+            self.stats.time_waiting += time.time() - start
+        return sample
+
+    def update(self, val, searcher_eval_token):
+        with self._searcher_lock:
+            self.searcher.update(val, searcher_eval_token)
+            if self.discard_on_update:
+                self._discard_queue()
+
+    def update_batch(self, vals, searcher_eval_tokens):
+        with self._searcher_lock:
+            self.searcher.update_batch(vals, searcher_eval_tokens)
+            if self.discard_on_update:
+                self._discard_queue()
+
+    def cancel(self, searcher_eval_token):
+        with self._searcher_lock:
+            self.searcher.cancel(searcher_eval_token)
+
+    def save_state(self, folderpath):
+        with self._searcher_lock:
+            self.searcher.save_state(folderpath)
+
+    def load_state(self, folderpath):
+        with self._searcher_lock:
+            # the architectures in the queue are canceled with the state that
+            # sampled them.
+            self._discard_queue()
+            self.searcher.load_state(folderpath)
+
+    def close(self):
+        """Stops the background thread after the batch that is being sampled,
+        if any. Later calls to :meth:`sample` take the architectures left in
+        the queue and then sample from the wrapped searcher directly."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    # NOTE: must be called with the lock of the wrapped searcher.
+    def _discard_queue(self):
+        with self._cond:
+            samples = list(self._queue)
+            self.stats.num_discarded += len(samples)
+            self._queue.clear()
+            self._cond.notify_all()
+        for (_, _, _, searcher_eval_token) in samples:
+            self.searcher.cancel(searcher_eval_token)
+
+    def _fill_queue(self):
+        while True:
+            with self._cond:
+                while not self._closed and len(
+                        self._queue) >= self.queue_size:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                num_samples = min(self.batch_size,
+                                  self.queue_size - len(self._queue))
+
+            # NOTE: the samples are added to the queue before the lock is
+            # released, as the queue is discarded with the lock, so the
+            # samples in the queue were sampled with the current state of the
+            # wrapped searcher.
+            try:
+                with self._searcher_lock:
+                    if num_samples == 1:
+                        samples = [self.searcher.sample()]
+                    else:
+                        samples = self.searcher.sample_batch(num_samples)
+                    with self._cond:
+                        self._queue.extend(samples)
+                        self._cond.notify_all()
+            except Exception as e:
+                with self._cond:
+                    self._error = e
+                    self._cond.notify_all()
+                return
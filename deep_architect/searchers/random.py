@@ -1,19 +1,38 @@
-from deep_architect.searchers.common import random_specify, Searcher
+from deep_architect.searchers.common import (random_specify, sample_valid,
+                                             SamplingStats, Searcher,
+                                             UniformBuffer)
 
 
 class RandomSearcher(Searcher):
 
     def __init__(self, search_space_fn):
         Searcher.__init__(self, search_space_fn)
+        self.stats = SamplingStats()
 
     def sample(self):
-        inputs, outputs = self.search_space_fn()
-        vs = random_specify(outputs)
+        inputs, outputs, vs = sample_valid(self.search_space_fn, random_specify,
+                                           self.stats)
         return inputs, outputs, vs, {}
 
+    def sample_batch(self, num_samples):
+        uniform_buffer = UniformBuffer()
+
+        def specify_fn(outputs):
+            return random_specify(outputs, uniform_buffer)
+
+        samples = []
+        for _ in range(num_samples):
+            inputs, outputs, vs = sample_valid(self.search_space_fn,
+                                               specify_fn, self.stats)
+            samples.append((inputs, outputs, vs, {}))
+        return samples
+
     def update(self, val, searcher_eval_token):
         pass
 
+    def update_batch(self, vals, searcher_eval_tokens):
+        pass
+
     def save_state(self, folderpath):
         pass
 
@@ -4,16 +4,25 @@ Implementation of Regularized Evolution searcher from Zoph et al '18
 from __future__ import print_function
 
 from builtins import range
+import heapq
 import random
 from collections import deque
 
 import deep_architect.utils as ut
-from deep_architect.searchers.common import Searcher, random_specify_hyperparameter
+from deep_architect.searchers.common import (Searcher, UniformBuffer,
+                                             SamplingStats, sample_valid,
+                                             sample_value,
+                                             random_specify_hyperparameter,
+                                             get_allowed_value_indices,
+                                             get_candidate_batch_sizes)
 import deep_architect.core as co
+import deep_architect.hyperparameters as hp
 import numpy as np
 
 
 def mutatable(h):
+    if isinstance(h, hp.Float):
+        return h.low < h.high
     return len(h.vs) > 1
 
 
@@ -30,11 +39,7 @@ def mutate(outputs, user_vs, all_vs, mutatable_fn, search_space_fn):
     assert len(mutate_candidates) == len(user_vs)
     m_ind = random.randint(0, len(mutate_candidates) - 1)
     m_h = mutate_candidates[m_ind]
-    v = m_h.vs[random.randint(0, len(m_h.vs) - 1)]
-
-    # ensure that same value is not chosen again
-    while v == user_vs[m_ind]:
-        v = m_h.vs[random.randint(0, len(m_h.vs) - 1)]
+    v = _sample_other_value(m_h, user_vs[m_ind])
     new_vs[m_ind] = v
     if 'sub' in m_h.get_name():
         new_vs = new_vs[:m_ind + 1]
@@ -44,11 +49,32 @@ def mutate(outputs, user_vs, all_vs, mutatable_fn, search_space_fn):
     return inputs, outputs, new_vs, all_vs
 
 
-def random_specify_evolution(outputs, mutatable_fn):
+def _sample_other_value(hyperp, v):
+    """Samples a value different from ``v`` among the values allowed by the
+    constraints, given the values of the other hyperparameters. Raises
+    :class:`deep_architect.core.InvalidArchitectureError` if there is none.
+    """
+    if isinstance(hyperp, hp.Float):
+        for num_samples in get_candidate_batch_sizes():
+            for x in hyperp.sample_values(num_samples):
+                if x != v and hyperp.is_value_allowed(x):
+                    return x
+        raise co.InvalidArchitectureError(
+            'No other value of %s satisfies the constraints.' %
+            hyperp.get_name())
+    idxs = [i for i in get_allowed_value_indices(hyperp) if hyperp.vs[i] != v]
+    if len(idxs) == 0:
+        raise co.InvalidArchitectureError(
+            'No other value of %s satisfies the constraints.' %
+            hyperp.get_name())
+    return hyperp.vs[random.choice(idxs)]
+
+
+def random_specify_evolution(outputs, mutatable_fn, uniform_buffer=None):
     user_vs = []
     all_vs = []
     for h in co.unassigned_independent_hyperparameter_iterator(outputs):
-        v = random_specify_hyperparameter(h)
+        v = random_specify_hyperparameter(h, uniform_buffer)
         if mutatable_fn(h):
             user_vs.append(v)
         all_vs.append(v)
@@ -61,8 +87,12 @@ def specify_evolution(outputs, mutatable_fn, user_vs):
     for i, h in enumerate(
             co.unassigned_independent_hyperparameter_iterator(outputs)):
         if mutatable_fn(h):
+            # values that are missing, or that the constraints no longer
+            # allow after a mutation, are sampled again.
             if vs_idx >= len(user_vs):
-                user_vs.append(h.vs[random.randint(0, len(h.vs) - 1)])
+                user_vs.append(sample_value(h))
+            elif not h.is_value_allowed(user_vs[vs_idx]):
+                user_vs[vs_idx] = sample_value(h)
             h.assign_value(user_vs[vs_idx])
             vs.append(user_vs[vs_idx])
             vs_idx += 1
@@ -72,6 +102,167 @@ def specify_evolution(outputs, mutatable_fn, user_vs):
     return vs
 
 
+class Population:
+    """Population of models of an evolution searcher, indexed by age and by
+    score.
+
+    Models get consecutive integer ids in the order they are added, so the
+    order of the ids is also the order of the ages. The ids are kept in a
+    ring buffer in age order, and in a heap ordered by score, so adding a
+    model and finding and removing the oldest or the worst model takes
+    O(log P) time, where P is the number of models. Removed models are
+    skipped lazily, and the ring buffer and the heap are compacted when most
+    of their entries are removed models. The ids and scores are also kept
+    in dense arrays, so that many tournaments can be run at once with numpy
+    (see :meth:`run_tournaments`).
+
+    Args:
+        capacity (int): Maximum number of models. Adding a model to a full
+            population removes the oldest model.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.next_id = 0
+        self.id_to_model = {}
+        self.id_to_slot = {}
+        # ids and scores of the models in the population, in no particular
+        # order. the first len(self) slots are used.
+        self.slot_ids = np.zeros(capacity, dtype='int64')
+        self.slot_scores = np.zeros(capacity, dtype='float64')
+        # ids in the order they were added, and heap of pairs with the score
+        # and the id. both may contain ids of removed models.
+        self.ids_by_age = deque()
+        self.score_heap = []
+
+    def __len__(self):
+        return len(self.id_to_slot)
+
+    def add(self, model, score):
+        """Adds a model to the population, removing the oldest model if the
+        population is full.
+
+        Args:
+            model (object): Model to add.
+            score (float): Score of the model.
+
+        Returns:
+            int: Id of the model.
+        """
+        if len(self) == self.capacity:
+            self.remove(self.get_oldest_id())
+        model_id = self.next_id
+        self.next_id += 1
+        slot = len(self)
+        self.id_to_model[model_id] = model
+        self.id_to_slot[model_id] = slot
+        self.slot_ids[slot] = model_id
+        self.slot_scores[slot] = score
+        self.ids_by_age.append(model_id)
+        heapq.heappush(self.score_heap, (score, model_id))
+        return model_id
+
+    def remove(self, model_id):
+        """Removes the model with the given id from the population."""
+        slot = self.id_to_slot.pop(model_id)
+        del self.id_to_model[model_id]
+        # moves the model in the last used slot to the free slot.
+        last_slot = len(self)
+        if slot != last_slot:
+            moved_id = int(self.slot_ids[last_slot])
+            self.slot_ids[slot] = moved_id
+            self.slot_scores[slot] = self.slot_scores[last_slot]
+            self.id_to_slot[moved_id] = slot
+
+        if len(self.ids_by_age) > 2 * len(self) + 16:
+            self.ids_by_age = deque(
+                i for i in self.ids_by_age if i in self.id_to_slot)
+        if len(self.score_heap) > 2 * len(self) + 16:
+            self.score_heap = [
+                x for x in self.score_heap if x[1] in self.id_to_slot
+            ]
+            heapq.heapify(self.score_heap)
+
+    def get_model(self, model_id):
+        return self.id_to_model[model_id]
+
+    def get_score(self, model_id):
+        return float(self.slot_scores[self.id_to_slot[model_id]])
+
+    def get_ids(self):
+        """Ids of the models in the population, from the oldest."""
+        return [i for i in self.ids_by_age if i in self.id_to_slot]
+
+    def get_oldest_id(self):
+        while self.ids_by_age[0] not in self.id_to_slot:
+            self.ids_by_age.popleft()
+        return self.ids_by_age[0]
+
+    def get_worst_id(self):
+        """Id of the model with the lowest score, or of the oldest of them if
+        there is more than one."""
+        while self.score_heap[0][1] not in self.id_to_slot:
+            heapq.heappop(self.score_heap)
+        return self.score_heap[0][1]
+
+    def run_tournaments(self, num_tournaments, tournament_size):
+        """Runs tournaments between models chosen uniformly at random without
+        replacement. Each tournament is won by the model with the highest
+        score, or by the oldest of them if there is more than one.
+
+        Each tournament takes O(S) expected time, where S is the tournament
+        size, independently of the number of models. If repeated models are
+        unlikely, the models are sampled with replacement, and tournaments
+        with repeated models are drawn again, for all the tournaments at once
+        with numpy. Otherwise, each tournament does a partial Fisher-Yates
+        shuffle of the models, keeping only the swapped positions.
+
+        Args:
+            num_tournaments (int): Number of tournaments.
+            tournament_size (int): Number of models in each tournament. At
+                most the number of models in the population.
+
+        Returns:
+            list[int]: Id of the winner of each tournament.
+        """
+        n = len(self)
+        assert 0 < tournament_size <= n
+        shape = (num_tournaments, tournament_size)
+        if tournament_size * tournament_size <= n:
+            # repeated models are unlikely, so tournaments with repeated
+            # models are drawn again.
+            slots = np.random.randint(n, size=shape)
+            while True:
+                sorted_slots = np.sort(slots, axis=1)
+                repeated = np.flatnonzero(
+                    np.any(sorted_slots[:, 1:] == sorted_slots[:, :-1],
+                           axis=1))
+                if len(repeated) == 0:
+                    break
+                slots[repeated] = np.random.randint(
+                    n, size=(len(repeated), tournament_size))
+        else:
+            # the j-th model of a tournament is swapped with a random one
+            # among the models from the j-th on.
+            js = np.arange(tournament_size)
+            rs = js + np.random.rand(*shape) * (n - js)
+            rs = np.minimum(rs.astype('int64'), n - 1)
+            slots = []
+            for t_rs in rs.tolist():
+                swapped_slots = {}
+                t_slots = []
+                for j, r in enumerate(t_rs):
+                    t_slots.append(swapped_slots.get(r, r))
+                    swapped_slots[r] = swapped_slots.get(j, j)
+                slots.append(t_slots)
+            slots = np.array(slots, dtype='int64')
+
+        scores = self.slot_scores[slots]
+        is_best = scores == scores.max(axis=1, keepdims=True)
+        ids = np.where(is_best, self.slot_ids[slots], np.iinfo('int64').max)
+        return ids.min(axis=1).tolist()
+
+
 class EvolutionSearcher(Searcher):
 
     def __init__(self, search_space_fn, mutatable_fn, P, S, regularized=False):
@@ -82,55 +273,80 @@ class EvolutionSearcher(Searcher):
         # Sample size
         self.S = S
 
-        self.population = deque(maxlen=P)
+        self.population = Population(P)
         # self.processing = []
         self.regularized = regularized
         self.initializing = True
         self.mutatable = mutatable_fn
+        self.stats = SamplingStats()
 
     def sample(self):
         if self.initializing:
-            inputs, outputs = self.search_space_fn()
-            user_vs, all_vs = random_specify_evolution(outputs, self.mutatable)
-            if len(self.population) >= self.P - 1:
-                self.initializing = False
-            return inputs, outputs, all_vs, {
-                'user_vs': user_vs,
-                'all_vs': all_vs
-            }
+            return self._sample_initial()
         else:
-            sample_inds = sorted(
-                random.sample(list(range(len(self.population))),
-                              min(self.S, len(self.population))))
-            # delete weakest model
-
             # mutate strongest model
-            inputs, outputs = self.search_space_fn()
-            user_vs, all_vs, _ = self.population[
-                self._get_strongest_model_index(sample_inds)]
-            inputs, outputs, new_user_vs, new_all_vs = mutate(
-                outputs, user_vs, all_vs, self.mutatable, self.search_space_fn)
-
-            # self.processing.append(self.population[weak_ind])
-            # del self.population[weak_ind]
-            return inputs, outputs, new_all_vs, {
-                'user_vs': new_user_vs,
-                'all_vs': new_all_vs
-            }
+            return self._sample_mutation(
+                self.population.run_tournaments(
+                    1, min(self.S, len(self.population)))[0])
+
+    def sample_batch(self, num_samples):
+        uniform_buffer = UniformBuffer()
+        samples = []
+        while self.initializing and len(samples) < num_samples:
+            samples.append(self._sample_initial(uniform_buffer))
+        num_mutations = num_samples - len(samples)
+        if num_mutations > 0:
+            # runs the tournaments for all the mutations at once.
+            model_ids = self.population.run_tournaments(
+                num_mutations, min(self.S, len(self.population)))
+            for model_id in model_ids:
+                samples.append(self._sample_mutation(model_id))
+        return samples
+
+    # NOTE: architectures that do not satisfy the constraints are rejected,
+    # and sampled or mutated again. see sample_valid.
+    def _sample_initial(self, uniform_buffer=None):
+        inputs, outputs, (user_vs, all_vs) = sample_valid(
+            self.search_space_fn,
+            lambda outputs: random_specify_evolution(
+                outputs, self.mutatable, uniform_buffer), self.stats)
+        if len(self.population) >= self.P - 1:
+            self.initializing = False
+        return inputs, outputs, all_vs, {'user_vs': user_vs, 'all_vs': all_vs}
+
+    def _sample_mutation(self, model_id):
+        user_vs, all_vs = self.population.get_model(model_id)
+        _, _, (inputs, outputs, new_user_vs, new_all_vs) = sample_valid(
+            self.search_space_fn,
+            lambda outputs: mutate(outputs, user_vs, all_vs, self.mutatable,
+                                   self.search_space_fn), self.stats)
+        return inputs, outputs, new_all_vs, {
+            'user_vs': new_user_vs,
+            'all_vs': new_all_vs
+        }
 
     def update(self, val, searcher_eval_token):
         if not self.initializing:
-            weak_ind = self._get_weakest_model_index()
-            del self.population[weak_ind]
-        self.population.append((searcher_eval_token['user_vs'],
-                                searcher_eval_token['all_vs'], val))
+            # delete weakest model
+            if self.regularized:
+                self.population.remove(self.population.get_oldest_id())
+            else:
+                self.population.remove(self.population.get_worst_id())
+        self.population.add(
+            (searcher_eval_token['user_vs'], searcher_eval_token['all_vs']),
+            val)
 
     def save_state(self, folderpath):
         filepath = ut.join_paths([folderpath, 'evolution_searcher.json'])
+        population = []
+        for model_id in self.population.get_ids():
+            user_vs, all_vs = self.population.get_model(model_id)
+            population.append(
+                (user_vs, all_vs, self.population.get_score(model_id)))
         state = {
             "P": self.P,
             "S": self.S,
-            "population": list(self.population),
+            "population": population,
             "regularized": self.regularized,
             "initializing": self.initializing,
         }
@@ -142,36 +358,15 @@ class EvolutionSearcher(Searcher):
         self.P = state["P"]
         self.S = state["S"]
         self.regularized = state['regularized']
-        self.population = deque(state['population'])
+        self.population = Population(self.P)
+        for user_vs, all_vs, score in state['population']:
+            self.population.add((user_vs, all_vs), score)
         self.initializing = state['initializing']
 
-    def _get_weakest_model_index(self):
-        if self.regularized:
-            return 0
-        else:
-            min_score = np.inf
-            min_score_ind = None
-            for i in range(len(self.population)):
-                _, _, score = self.population[i]
-                if score < min_score:
-                    min_score = score
-                    min_score_ind = i
-            return min_score_ind
-
-    def _get_strongest_model_index(self, sample_inds):
-        max_score = -np.inf
-        max_score_ind = -1
-        for i in range(len(sample_inds)):
-            _, _, score = self.population[sample_inds[i]]
-            if score > max_score:
-                max_score = score
-                max_score_ind = i
-        return sample_inds[max_score_ind]
-
     def get_best(self, num_models):
-        ranked_population = sorted(self.population,
-                                   reverse=True,
-                                   key=lambda tup: tup[2])
-
-        return [(model[2], model[1]) for model in ranked_population[:num_models]
-               ]
+        model_ids = heapq.nlargest(num_models,
+                                   self.population.get_ids(),
+                                   key=self.population.get_score)
+        return [(self.population.get_score(model_id),
+                 self.population.get_model(model_id)[1])
+                for model_id in model_ids]
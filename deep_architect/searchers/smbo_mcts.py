@@ -1,4 +1,8 @@
-from deep_architect.searchers.common import random_specify, specify, Searcher
+from six.moves import range
+from deep_architect.searchers.common import (random_specify, specify,
+                                             Searcher, UniformBuffer,
+                                             get_hyperp_value_lst_key,
+                                             get_best_distinct_indices)
 from deep_architect.searchers.mcts import MCTSSearcher
 from deep_architect.surrogates.common import extract_features
 import deep_architect.utils as ut
@@ -8,17 +12,32 @@ import numpy as np
 # surrogate with MCTS optimization.
 # TODO: make sure that can keep the tree while the surrogate changes below me.
 # TODO: I would just compute the std for the scores.
+# NOTE: if virtual_loss is not None, the architectures that were sampled and
+# not updated yet are pending. the tree search gets virtual_loss as their
+# score rather than the score of the surrogate, which does not know about
+# them yet, and they are not sampled again while pending, unless the tree
+# search does not find any other architecture. the tokens of architectures
+# that will not be evaluated must be passed to cancel.
 class SMBOSearcherWithMCTSOptimizer(Searcher):
 
-    def __init__(self, search_space_fn, surrogate_model, num_samples,
-                 exploration_prob, tree_refit_interval):
+    def __init__(self,
+                 search_space_fn,
+                 surrogate_model,
+                 num_samples,
+                 exploration_prob,
+                 tree_refit_interval,
+                 virtual_loss=None):
         Searcher.__init__(self, search_space_fn)
         self.surr_model = surrogate_model
         self.mcts = MCTSSearcher(self.search_space_fn)
         self.num_samples = num_samples
         self.exploration_prob = exploration_prob
         self.tree_refit_interval = tree_refit_interval
+        self.virtual_loss = virtual_loss
         self.cnt = 0
+        # maps the keys of the pending architectures to their number of
+        # pending evaluations.
+        self.key_to_num_pending = {}
 
     def sample(self):
         if np.random.rand() < self.exploration_prob:
@@ -32,9 +51,8 @@ class SMBOSearcherWithMCTSOptimizer(Searcher):
             best_score = -np.inf
             for _ in range(self.num_samples):
                 (inputs, outputs, vs, m_cfg_d) = self.mcts.sample()
-                feats = extract_features(inputs, outputs)
-                score = self.surr_model.eval(feats)
-                if score > best_score:
+                score = self._eval(inputs, outputs, vs)
+                if best_model is None or score > best_score:
                     best_model = (inputs, outputs)
                     best_vs = vs
                     best_score = score
@@ -42,10 +60,80 @@ class SMBOSearcherWithMCTSOptimizer(Searcher):
                 self.mcts.update(score, m_cfg_d)
             inputs, outputs = best_model
 
-        searcher_eval_token = {'vs': best_vs}
+        searcher_eval_token = self._make_token(best_vs)
         return inputs, outputs, best_vs, searcher_eval_token
 
+    # NOTE: the models that are not sampled at random are the ones with the
+    # highest scores among the ones visited by a single run of the tree search
+    # for the whole batch, with num_samples tree walks per model returned, as
+    # in sample. the tree search needs the score of each model before
+    # sampling the next one, so they are scored one at a time. the same
+    # architecture may be visited more than once, so repeated architectures,
+    # and pending ones if virtual_loss is not None, are only returned if there
+    # are not enough other ones.
+    def sample_batch(self, num_samples):
+        num_explore = int(
+            np.sum(np.random.rand(num_samples) < self.exploration_prob))
+        num_exploit = num_samples - num_explore
+
+        samples = []
+        if num_exploit > 0:
+            vs_lst = []
+            scores = []
+            for _ in range(self.num_samples * num_exploit):
+                (inputs, outputs, vs, m_cfg_d) = self.mcts.sample()
+                score = self._eval(inputs, outputs, vs)
+                vs_lst.append(vs)
+                scores.append(score)
+                self.mcts.update(score, m_cfg_d)
+            keys = [get_hyperp_value_lst_key(vs) for vs in vs_lst]
+            for i in get_best_distinct_indices(scores, keys, num_exploit,
+                                               self.key_to_num_pending):
+                inputs, outputs = self.search_space_fn()
+                specify(outputs, vs_lst[i])
+                samples.append(
+                    (inputs, outputs, vs_lst[i], self._make_token(vs_lst[i])))
+        uniform_buffer = UniformBuffer()
+        for _ in range(num_explore):
+            inputs, outputs = self.search_space_fn()
+            vs = random_specify(outputs, uniform_buffer)
+            samples.append((inputs, outputs, vs, self._make_token(vs)))
+        return samples
+
+    def get_num_pending(self):
+        """Number of architectures sampled and not updated yet. Only kept if
+        ``virtual_loss`` is not ``None``."""
+        return sum(self.key_to_num_pending.values())
+
+    def _eval(self, inputs, outputs, vs):
+        if (self.virtual_loss is not None and
+                get_hyperp_value_lst_key(vs) in self.key_to_num_pending):
+            return self.virtual_loss
+        return self.surr_model.eval(extract_features(inputs, outputs))
+
+    def _make_token(self, vs):
+        searcher_eval_token = {'vs': vs}
+        if self.virtual_loss is not None:
+            key = get_hyperp_value_lst_key(vs)
+            self.key_to_num_pending[key] = (
+                self.key_to_num_pending.get(key, 0) + 1)
+            searcher_eval_token['is_pending'] = True
+        return searcher_eval_token
+
+    def _remove_pending(self, searcher_eval_token):
+        if searcher_eval_token.get('is_pending', False):
+            key = get_hyperp_value_lst_key(searcher_eval_token['vs'])
+            if self.key_to_num_pending.get(key, 0) > 1:
+                self.key_to_num_pending[key] -= 1
+            else:
+                self.key_to_num_pending.pop(key, None)
+            searcher_eval_token['is_pending'] = False
+
+    def cancel(self, searcher_eval_token):
+        self._remove_pending(searcher_eval_token)
+
     def update(self, val, searcher_eval_token):
+        self._remove_pending(searcher_eval_token)
         (inputs, outputs) = self.search_space_fn()
         specify(outputs, searcher_eval_token['vs'])
         feats = extract_features(inputs, outputs)
@@ -55,6 +143,20 @@ class SMBOSearcherWithMCTSOptimizer(Searcher):
         if self.cnt % self.tree_refit_interval == 0:
             self.mcts = MCTSSearcher(self.search_space_fn)
 
+    def update_batch(self, vals, searcher_eval_tokens):
+        feats_lst = []
+        for searcher_eval_token in searcher_eval_tokens:
+            self._remove_pending(searcher_eval_token)
+            (inputs, outputs) = self.search_space_fn()
+            specify(outputs, searcher_eval_token['vs'])
+            feats_lst.append(extract_features(inputs, outputs))
+        self.surr_model.update_batch(vals, feats_lst)
+
+        num_refits = self.cnt // self.tree_refit_interval
+        self.cnt += len(vals)
+        if self.cnt // self.tree_refit_interval > num_refits:
+            self.mcts = MCTSSearcher(self.search_space_fn)
+
     # NOTE: this has not been tested.
     def save_state(self, folderpath):
         self.mcts.save_state(folderpath)
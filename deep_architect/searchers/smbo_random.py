@@ -1,5 +1,9 @@
 import numpy as np
-from deep_architect.searchers.common import random_specify, specify, Searcher
+from six.moves import range
+from deep_architect.searchers.common import (random_specify, specify,
+                                             Searcher, UniformBuffer,
+                                             get_hyperp_value_lst_key,
+                                             get_best_distinct_indices)
 from deep_architect.surrogates.common import extract_features
 
 
@@ -36,12 +40,57 @@ class SMBOSearcher(Searcher):
         searcher_eval_token = {'vs': best_vs}
         return inputs, outputs, best_vs, searcher_eval_token
 
+    def sample_batch(self, num_samples):
+        """Returns a list of models from the search space.
+
+        Models that are not sampled at random are the ones with the highest
+        scores among a pool of ``num_samples`` models per model returned,
+        the same number as :meth:`sample` scores, sampled for the whole batch.
+        The pool is scored with a single call to the surrogate model. Models
+        that were sampled more than once in the pool are returned once,
+        unless there are not enough distinct models.
+        """
+        uniform_buffer = UniformBuffer()
+        num_explore = int(
+            np.sum(np.random.rand(num_samples) < self.exploration_prob))
+        num_exploit = num_samples - num_explore
+
+        samples = []
+        if num_exploit > 0:
+            vs_lst = []
+            feats_lst = []
+            for _ in range(self.num_samples * num_exploit):
+                inputs, outputs = self.search_space_fn()
+                vs_lst.append(random_specify(outputs, uniform_buffer))
+                feats_lst.append(extract_features(inputs, outputs))
+            scores = self.surr_model.eval_batch(feats_lst)
+            keys = [get_hyperp_value_lst_key(vs) for vs in vs_lst]
+            # NOTE: only the values of the pool are kept, and the search
+            # spaces of the chosen models are specified again.
+            for i in get_best_distinct_indices(scores, keys, num_exploit):
+                inputs, outputs = self.search_space_fn()
+                specify(outputs, vs_lst[i])
+                samples.append((inputs, outputs, vs_lst[i], {'vs': vs_lst[i]}))
+        for _ in range(num_explore):
+            inputs, outputs = self.search_space_fn()
+            vs = random_specify(outputs, uniform_buffer)
+            samples.append((inputs, outputs, vs, {'vs': vs}))
+        return samples
+
     def update(self, val, searcher_eval_token):
         (inputs, outputs) = self.search_space_fn()
         specify(outputs, searcher_eval_token['vs'])
         feats = extract_features(inputs, outputs)
         self.surr_model.update(val, feats)
 
+    def update_batch(self, vals, searcher_eval_tokens):
+        feats_lst = []
+        for searcher_eval_token in searcher_eval_tokens:
+            (inputs, outputs) = self.search_space_fn()
+            specify(outputs, searcher_eval_token['vs'])
+            feats_lst.append(extract_features(inputs, outputs))
+        self.surr_model.update_batch(vals, feats_lst)
+
     def save_state(self, folderpath):
         self.surr_model.save_state(folderpath)
 
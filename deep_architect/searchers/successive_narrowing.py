@@ -16,9 +16,10 @@ class SuccessiveNarrowing(se.Searcher):
         self.idx = 0
 
         self.queue = []
+        uniform_buffer = se.UniformBuffer()
         for _ in range(num_initial_samples):
             inputs, outputs = search_space_fn()
-            hyperp_value_lst = se.random_specify(outputs)
+            hyperp_value_lst = se.random_specify(outputs, uniform_buffer)
             self.queue.append(hyperp_value_lst)
 
     def sample(self):
@@ -30,6 +31,10 @@ class SuccessiveNarrowing(se.Searcher):
         self.idx += 1
         return inputs, outputs, hyperp_value_lst, {"idx": idx}
 
+    def sample_batch(self, num_samples):
+        assert self.idx + num_samples <= len(self.queue)
+        return [self.sample() for _ in range(num_samples)]
+
     def update(self, val, searcher_eval_token):
         assert self.num_remaining > 0
         idx = searcher_eval_token["idx"]
@@ -0,0 +1,505 @@
+import numbers
+import types
+from collections import deque
+from six import iteritems, string_types
+from six.moves import range
+import numpy as np
+import deep_architect.core as co
+import deep_architect.hyperparameters as hp
+import deep_architect.modules as mo
+from deep_architect.searchers.common import Searcher, get_index_value
+
+
+def _get_ancestors(node):
+    """Pairs with the ancestor nodes of a node and the value indices that
+    lead to it, from the root down."""
+    return [(node[:i], node[i]) for i in range(1, len(node), 2)]
+
+
+def _randint(n):
+    """Integer uniformly at random in ``[0, n)``, for integers of any size.
+
+    Random bits are drawn from numpy in chunks of 31 bits, rejecting the
+    numbers that are not smaller than ``n``.
+    """
+    num_bits = (n - 1).bit_length()
+    num_chunks = (num_bits + 30) // 31
+    while True:
+        r = 0
+        for _ in range(num_chunks):
+            r = (r << 31) | int(np.random.randint(2**31))
+        r >>= 31 * num_chunks - num_bits
+        if r < n:
+            return r
+
+
+class _Identity:
+    """Compares equal only to the same object. Keeps the object alive, so
+    its id is not reused."""
+
+    def __init__(self, x):
+        self.x = x
+
+    def __eq__(self, other):
+        return isinstance(other, _Identity) and self.x is other.x
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return id(self.x)
+
+
+def _get_structural_key(x, memo):
+    """Key that is equal for functions with the same code and equal closures,
+    defaults, and globals, compared recursively, and for equal numbers,
+    strings, lists, and tuples. Other objects are only equal to themselves.
+    """
+    if x is None or isinstance(x, (numbers.Number, string_types, bytes)):
+        return (type(x), x)
+    elif isinstance(x, (list, tuple)):
+        return (type(x), tuple(_get_structural_key(y, memo) for y in x))
+    elif isinstance(x, types.FunctionType):
+        # recursive functions refer to themselves through their closures.
+        if x in memo:
+            return ('recursive', x.__code__)
+        memo.add(x)
+        cells = []
+        for cell in x.__closure__ or ():
+            try:
+                cells.append(_get_structural_key(cell.cell_contents, memo))
+            except ValueError:
+                # the variable of the cell has not been assigned.
+                cells.append(_Identity(cell))
+        key = (x.__code__, _Identity(x.__globals__),
+               _get_structural_key(x.__defaults__, memo), tuple(cells))
+        memo.remove(x)
+        return key
+    else:
+        return _Identity(x)
+
+
+def _get_num_values(hyperp):
+    """Number of values of a discrete or integer hyperparameter. The values
+    are numbered as in :func:`deep_architect.searchers.common.get_index_value`.
+    """
+    if isinstance(hyperp, hp.Discrete):
+        return len(hyperp.vs)
+    elif isinstance(hyperp, hp.Int):
+        return hyperp.get_num_index_values()
+    else:
+        raise ValueError(
+            'Only discrete and integer hyperparameters are supported.')
+
+
+def _get_users(hyperp):
+    """Modules that use the hyperparameter, directly or through dependent
+    hyperparameters, and the dependent hyperparameters in between."""
+    h_lst = [hyperp]
+    modules = []
+    idx = 0
+    while idx < len(h_lst):
+        h = h_lst[idx]
+        modules.extend(h.modules)
+        for h_next in h.dependent_hyperps:
+            if h_next not in h_lst:
+                h_lst.append(h_next)
+        idx += 1
+    return modules, h_lst[1:]
+
+
+def _get_sub_space_key(hyperp, modules, dependent_hyperps):
+    """Key of the part of the search space created by assigning a value to the
+    hyperparameter, or ``None`` if it does not create one.
+
+    The key depends on the values of the hyperparameter, and on the
+    substitution functions of the modules that use it and the functions of
+    the dependent hyperparameters in between, compared with
+    :func:`_get_structural_key`. Hyperparameters with the same key lead to
+    the same sub-space for the same value, e.g., the hyperparameters of the
+    copies of a block in a repetition.
+    """
+    if not any(isinstance(m, mo.SubstitutionModule) for m in modules):
+        return None
+    h_lst = [hyperp] + dependent_hyperps
+    memo = set()
+
+    def get_hyperps_key(name_to_hyperp):
+        key = []
+        for name in sorted(name_to_hyperp):
+            h = name_to_hyperp[name]
+            if h in h_lst:
+                key.append((name, h_lst.index(h)))
+            elif h.has_value_assigned():
+                key.append((name, _get_structural_key(h.get_value(), memo)))
+            else:
+                key.append((name, _Identity(h)))
+        return tuple(key)
+
+    key = [
+        _get_structural_key(
+            [get_index_value(hyperp, idx)
+             for idx in range(_get_num_values(hyperp))], memo)
+    ]
+    for h in dependent_hyperps:
+        key.append((_get_structural_key(h._fn, memo),
+                    get_hyperps_key(h._hyperps)))
+    for m in modules:
+        if not isinstance(m, mo.SubstitutionModule):
+            return None
+        key.append((_get_structural_key(m._substitution_fn, memo),
+                    get_hyperps_key(m.hyperps)))
+    return tuple(key)
+
+
+class ArchitectureCounter:
+    """Counts the architectures in a search space and samples them uniformly
+    at random.
+
+    Each unspecified hyperparameter is a node of a tree. The roots are the
+    hyperparameters present in the unspecified search space. The children of
+    a node for a given value are the hyperparameters created by the
+    substitutions triggered by assigning that value. A node is identified by
+    its position in the tree: the index of the root, followed by the value
+    index and the position among the children for each level. The number of
+    architectures below a node is computed by dynamic programming as the sum
+    over its values of the product of the numbers of architectures below its
+    children, and the number of architectures in the search space is the
+    product over the roots. The children of each node are found by
+    specifying new search spaces, setting the values of as many unexplored
+    nodes as possible in each search space.
+
+    The counts are memoized by sub-space: nodes whose hyperparameters create
+    the same sub-space, i.e., that are used by substitution modules with
+    substitution functions with the same code and equal closures (e.g., the
+    copies of a block in a repetition), are explored once and share their
+    counts. The other nodes are aliases of the first such node, and so are
+    their descendants.
+
+    Architectures are counted as distinct sequences of values that can be
+    used to specify the search space (see
+    :func:`deep_architect.searchers.common.specify`), and sampling is uniform
+    over these sequences. Different sequences may lead to the same
+    architecture, e.g., a repetition of optional modules in which a different
+    module is left out, in which case the count is larger than the number of
+    distinct architectures, and architectures that are reached by more
+    sequences are sampled more often. Sampling with :meth:`specify` chooses
+    the value of each hyperparameter with probability proportional to the
+    number of sequences that it leads to, so all sequences have the same
+    probability, unlike with
+    :func:`deep_architect.searchers.common.random_specify`.
+
+    .. note::
+        The hyperparameters created by assigning a value to a hyperparameter
+        are assumed to depend only on that value, i.e., each substitution
+        module depends on a single independent hyperparameter (possibly
+        through dependent hyperparameters), and substitution functions only
+        depend on their closures and on the values of their hyperparameters.
+        Hyperparameters shared by more than one module, directly or through
+        dependent hyperparameters, are not supported, as the part of the
+        tree they belong to would depend on the order in which the modules
+        are found. A ``ValueError`` is raised if the search space is found to
+        violate these assumptions. Only discrete and integer
+        hyperparameters are supported.
+
+    Args:
+        search_space_fn (() -> (dict[str,deep_architect.core.Input], dict[str,deep_architect.core.Output])):
+            Returns a new unspecified search space when called.
+    """
+
+    def __init__(self, search_space_fn):
+        self.search_space_fn = search_space_fn
+        self.root_nodes = None
+        self.node_to_domain_size = {}
+        # maps pairs with a node and a value index to the child nodes.
+        self.node_value_to_children = {}
+        self.node_to_count = {}
+        # maps the nodes that share their sub-space with an earlier node to it.
+        self.node_to_alias = {}
+        # nodes whose values do not create other hyperparameters.
+        self.leaf_nodes = set()
+        self.num_specifications = 0
+        self._explore()
+        self._count()
+
+    def get_num_architectures(self):
+        """Number of architectures in the search space.
+
+        Returns:
+            int: Number of distinct sequences of values that specify the
+                search space.
+        """
+        count = 1
+        for node in self.root_nodes:
+            count *= self.node_to_count[self._resolve(node)]
+        return count
+
+    def get_value_weights(self, node):
+        """Number of architectures that each value of a node leads to.
+
+        Args:
+            node (tuple[int]): Node of the tree.
+
+        Returns:
+            list[int]: Number of architectures for each value index.
+        """
+        if node in self.leaf_nodes:
+            return [1] * self.node_to_domain_size[node]
+        weights = []
+        for idx in range(self.node_to_domain_size[node]):
+            w = 1
+            for child in self.node_value_to_children[(node, idx)]:
+                w *= self.node_to_count[child]
+            weights.append(w)
+        return weights
+
+    def specify(self, outputs):
+        """Specifies the search space with a sequence of values sampled
+        uniformly at random among the sequences counted.
+
+        Args:
+            outputs (dict[str, deep_architect.core.Output]): Dictionary of
+                named outputs of an unspecified search space returned by the
+                search space function.
+
+        Returns:
+            list[object]: List of values used to specify the hyperparameters.
+        """
+
+        def choose_fn(node):
+            if node in self.leaf_nodes:
+                return _randint(self.node_to_domain_size[node])
+            # NOTE: the counts may be too large for floating point
+            # probabilities, so the value is chosen with integers.
+            weights = self.get_value_weights(node)
+            r = _randint(sum(weights))
+            for idx, w in enumerate(weights):
+                if r < w:
+                    return idx
+                r -= w
+
+        hyperp_value_lst, _, _ = self._specify(outputs, choose_fn)
+        return hyperp_value_lst
+
+    def _resolve(self, node):
+        """Node that keeps the counts of a node, i.e., the node itself, or the
+        corresponding node of the sub-space of which its sub-space, or the
+        sub-space of one of its ancestors, is an alias."""
+        i = 1
+        while i <= len(node):
+            alias = self.node_to_alias.get(node[:i])
+            if alias is not None:
+                node = alias + node[i:]
+                i = len(alias)
+            i += 2
+        return node
+
+    def _specify(self, outputs, choose_fn, key_to_node=None):
+        """Specifies the search space, calling the function with the node of
+        each hyperparameter to get the index of its value.
+
+        If the dictionary mapping the keys of sub-spaces to nodes is given,
+        the nodes that have not been seen before are added to it, or become
+        aliases of the node with the same key. Nodes are found in the order of
+        the iterator, so the first node with a key is never an alias.
+
+        Returns:
+            (list[object], list[tuple[int]], dict[(tuple[int], int), list[tuple[int]]]):
+                Values assigned, root nodes, and child nodes for the node and
+                value index pairs of the hyperparameters assigned. The root
+                nodes are the positions in the tree, and the other nodes are
+                resolved (see :meth:`_resolve`).
+        """
+        hyperp_to_parent = {}
+        # positions in the tree of the hyperparameters, which are used to find
+        # the positions of their children.
+        h_to_position = {}
+        h_to_idx = {}
+        root_nodes = []
+        position_value_to_children = {}
+        hyperp_value_lst = []
+        for h in co.unassigned_independent_hyperparameter_iterator(
+                outputs, hyperp_to_parent):
+            num_values = _get_num_values(h)
+            h_parent = hyperp_to_parent.get(h)
+            if h_parent is None or h_parent not in h_to_position:
+                position = (len(root_nodes),)
+                root_nodes.append(position)
+            else:
+                key = (h_to_position[h_parent], h_to_idx[h_parent])
+                children = position_value_to_children[key]
+                position = key[0] + (key[1], len(children))
+                children.append(position)
+
+            node = self._resolve(position)
+            if node not in self.node_to_domain_size and key_to_node is not None:
+                modules, dependent_hyperps = _get_users(h)
+                if len(modules) > 1:
+                    raise ValueError(
+                        'Hyperparameter %s is shared by more than one module, '
+                        'which is not supported.' % h.get_name())
+                sub_space_key = _get_sub_space_key(h, modules,
+                                                   dependent_hyperps)
+                if sub_space_key is None:
+                    # assigning a value does not create other hyperparameters.
+                    self.leaf_nodes.add(node)
+                else:
+                    other_node = key_to_node.setdefault(sub_space_key, node)
+                    if other_node != node:
+                        self.node_to_alias[node] = other_node
+                        node = other_node
+            if node not in self.node_to_domain_size:
+                self.node_to_domain_size[node] = num_values
+            elif self.node_to_domain_size[node] != num_values:
+                raise ValueError(
+                    'The hyperparameters created by a substitution depend on '
+                    'hyperparameters other than the one that triggered it.')
+            idx = choose_fn(node)
+            h_to_position[h] = position
+            h_to_idx[h] = idx
+            position_value_to_children[(position, idx)] = []
+            v = get_index_value(h, idx)
+            h.assign_value(v)
+            hyperp_value_lst.append(v)
+
+        # NOTE: aliases of the same node must have the same children.
+        node_value_to_children = {}
+        for (position, idx), children in iteritems(position_value_to_children):
+            children = [self._resolve(child) for child in children]
+            prev_children = node_value_to_children.setdefault(
+                (self._resolve(position), idx), children)
+            if prev_children != children:
+                raise ValueError(
+                    'Substitution modules with the same substitution function '
+                    'create different sub-spaces.')
+        return hyperp_value_lst, root_nodes, node_value_to_children
+
+    def _explore(self):
+        """Finds the children of all the nodes for all their values."""
+        pending = deque()
+        queued = set()
+        key_to_node = {}
+        while self.root_nodes is None or len(pending) > 0:
+            # chooses the value of as many pending pairs as possible.
+            node_to_idx = {}
+            deferred = deque()
+            while len(pending) > 0:
+                node, idx = pending.popleft()
+                pairs = _get_ancestors(node) + [(node, idx)]
+                if all(node_to_idx.get(n, i) == i for (n, i) in pairs):
+                    node_to_idx.update(pairs)
+                else:
+                    deferred.append((node, idx))
+            pending = deferred
+
+            _, outputs = self.search_space_fn()
+            _, root_nodes, node_value_to_children = self._specify(
+                outputs, lambda node: node_to_idx.get(node, 0), key_to_node)
+            self.num_specifications += 1
+
+            if self.root_nodes is None:
+                self.root_nodes = root_nodes
+            elif self.root_nodes != root_nodes:
+                raise ValueError(
+                    'The search space changes between calls to the search '
+                    'space function.')
+            for node, idx in node_to_idx.items():
+                if (node, idx) not in node_value_to_children:
+                    raise ValueError(
+                        'The hyperparameters created by a substitution depend '
+                        'on hyperparameters other than the one that '
+                        'triggered it.')
+            for key, children in iteritems(node_value_to_children):
+                # NOTE: the values of leaf nodes are not explored, as they
+                # have no children.
+                if key[0] in self.leaf_nodes:
+                    if len(children) > 0:
+                        raise ValueError(
+                            'Hyperparameters were created by assigning a '
+                            'hyperparameter that is not used by any '
+                            'substitution module.')
+                    continue
+                prev_children = self.node_value_to_children.get(key)
+                if prev_children is None:
+                    self.node_value_to_children[key] = children
+                    node = key[0]
+                    for idx in range(self.node_to_domain_size[node]):
+                        if ((node, idx) not in queued and
+                                (node, idx) not in node_value_to_children):
+                            queued.add((node, idx))
+                            pending.append((node, idx))
+                elif prev_children != children:
+                    raise ValueError(
+                        'The hyperparameters created by a substitution depend '
+                        'on hyperparameters other than the one that '
+                        'triggered it.')
+
+    def _count(self):
+        """Computes the number of architectures below each node, from the
+        deepest nodes up.
+
+        Nodes may have aliases as children, which are not below them in the
+        tree, so the nodes are counted in the order of a depth-first
+        traversal rather than by depth.
+        """
+        in_progress = set()
+        for root in self.node_to_domain_size:
+            stack = [root]
+            while len(stack) > 0:
+                node = stack[-1]
+                if node in self.node_to_count:
+                    stack.pop()
+                    continue
+                if node in self.leaf_nodes:
+                    self.node_to_count[node] = self.node_to_domain_size[node]
+                    stack.pop()
+                    continue
+                in_progress.add(node)
+                children = [
+                    child for idx in range(self.node_to_domain_size[node])
+                    for child in self.node_value_to_children[(node, idx)]
+                    if child not in self.node_to_count
+                ]
+                if len(children) > 0:
+                    if any(child in in_progress for child in children):
+                        raise ValueError(
+                            'A sub-space contains itself, so substitution '
+                            'functions with the same code and closures '
+                            'create different sub-spaces.')
+                    stack.extend(children)
+                else:
+                    self.node_to_count[node] = sum(
+                        self.get_value_weights(node))
+                    in_progress.remove(node)
+                    stack.pop()
+
+
+class UniformSearcher(Searcher):
+    """Searcher that samples architectures uniformly at random from the
+    search space.
+
+    The architectures in the search space are counted once on creation. See
+    :class:`ArchitectureCounter`.
+
+    Args:
+        search_space_fn (() -> (dict[str,deep_architect.core.Input], dict[str,deep_architect.core.Output])):
+            Returns a new unspecified search space when called.
+    """
+
+    def __init__(self, search_space_fn):
+        Searcher.__init__(self, search_space_fn)
+        self.counter = ArchitectureCounter(search_space_fn)
+
+    def sample(self):
+        inputs, outputs = self.search_space_fn()
+        vs = self.counter.specify(outputs)
+        return inputs, outputs, vs, {}
+
+    def update(self, val, searcher_eval_token):
+        pass
+
+    def save_state(self, folderpath):
+        pass
+
+    def load_state(self, folderpath):
+        pass
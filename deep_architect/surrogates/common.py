@@ -25,6 +25,27 @@ class SurrogateModel:
         """
         raise NotImplementedError
 
+    def eval_batch(self, feats_lst):
+        """Returns the predictions for a list of feature representations of
+        architectures.
+
+        Same as calling :meth:`eval` for each of them, but surrogate models
+        may override it to compute all the predictions at once.
+        """
+        return [self.eval(feats) for feats in feats_lst]
+
+    def update_batch(self, vals, feats_lst):
+        """Updates the state of the surrogate function with a list of ground
+        truth performance metrics and the feature representations of the
+        corresponding architectures.
+
+        Same as calling :meth:`update` for each pair, but surrogate models may
+        override it to refit the model at most once.
+        """
+        assert len(vals) == len(feats_lst)
+        for val, feats in zip(vals, feats_lst):
+            self.update(val, feats)
+
 
 # extract some simple features from the network. useful for smbo surrogate models.
 def extract_features(inputs, outputs):
@@ -13,5 +13,11 @@ class DummySurrogate(SurrogateModel):
         else:
             return np.mean(self.val_lst)
 
+    def eval_batch(self, feats_lst):
+        return [self.eval(None)] * len(feats_lst)
+
     def update(self, val, feats):
-        self.val_lst.append(val)
\ No newline at end of file
+        self.val_lst.append(val)
+
+    def update_batch(self, vals, feats_lst):
+        self.val_lst.extend(vals)
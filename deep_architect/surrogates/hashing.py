@@ -42,6 +42,14 @@ class HashingSurrogate(SurrogateModel):
             vec = self._feats2vec(feats)
             return self.model.predict(vec)[0]
 
+    def eval_batch(self, feats_lst):
+        if self.model == None:
+            return [0.0] * len(feats_lst)
+        else:
+            X = sp.vstack([self._feats2vec(feats) for feats in feats_lst],
+                          format='csr')
+            return self.model.predict(X).tolist()
+
     def update(self, val, feats):
         vec = self._feats2vec(feats)
         self.vecs_lst.append(vec)
@@ -49,6 +57,16 @@ class HashingSurrogate(SurrogateModel):
         if len(self.vals_lst) % self.refit_interval == 0:
             self._refit()
 
+    def update_batch(self, vals, feats_lst):
+        assert len(vals) == len(feats_lst)
+        num_refits = len(self.vals_lst) // self.refit_interval
+        self.vecs_lst.extend([self._feats2vec(feats) for feats in feats_lst])
+        self.vals_lst.extend(vals)
+        # refits once if the model would have been refit by any of the
+        # updates.
+        if len(self.vals_lst) // self.refit_interval > num_refits:
+            self._refit()
+
     def _feats2vec(self, feats):
         vec = sp.dok_matrix((1, self.hash_size), dtype='float')
         for name, fs in iteritems(feats):
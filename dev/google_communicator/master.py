@@ -14,6 +14,7 @@ from deep_architect.contrib.misc.datasets.loaders import (load_cifar10,
 from deep_architect.contrib.misc.datasets.dataset import InMemoryDataset
 
 from deep_architect.searchers import common as se
+from deep_architect.searchers.prefetch import PrefetchingSearcher
 from deep_architect.contrib.misc import gpu_utils
 from deep_architect import search_logging as sl
 from deep_architect import utils as ut
@@ -86,6 +87,9 @@ search_space_factory = name_to_search_space_factory_fn[config['search_space']](
 save_every = 1 if 'save_every' not in config else config['save_every']
 searcher = name_to_searcher_fn[config['searcher']](
     search_space_factory.get_search_space)
+# samples architectures in the background while waiting for results.
+if config.get('prefetch_queue_size', 0) > 0:
+    searcher = PrefetchingSearcher(searcher, config['prefetch_queue_size'])
 num_epochs = -1 if 'epochs' not in config else config['epochs']
 num_samples = -1 if 'samples' not in config else config['samples']
 eval_epochs = config['eval_epochs']
@@ -158,6 +162,10 @@ def update_searcher(message):
         if finished % save_every == 0:
             print('Models sampled: %d Best Accuracy: %f' %
                   (finished, best_accuracy))
+            if isinstance(searcher, PrefetchingSearcher):
+                print('Prefetch queue depth: %d Average wait time: %f' %
+                      (searcher.get_queue_depth(),
+                       searcher.stats.get_average_wait_time()))
             best_accuracy = 0.
 
             searcher.save_state(search_data_folder)
@@ -6,6 +6,7 @@ import logging
 from deep_architect import search_logging as sl
 from deep_architect import utils as ut
 from deep_architect.contrib.communicators.mongo_communicator import MongoCommunicator
+from deep_architect.searchers.prefetch import PrefetchingSearcher
 
 from search_space_factory import name_to_search_space_factory_fn
 from searcher import name_to_searcher_fn
@@ -89,6 +90,9 @@ def process_config_and_args():
         'save_every']
     searcher = name_to_searcher_fn[config['searcher']](
         search_space_factory.get_search_space)
+    # samples architectures in the background while waiting for results.
+    if config.get('prefetch_queue_size', 0) > 0:
+        searcher = PrefetchingSearcher(searcher, config['prefetch_queue_size'])
     config['num_epochs'] = -1 if 'epochs' not in config else config['epochs']
     config['num_samples'] = -1 if 'samples' not in config else config['samples']
 
@@ -171,6 +175,10 @@ def update_searcher(message, comm, search_logger, searcher, state, config):
 def save_searcher_state(searcher, state, config, search_logger):
     logger.info('Models finished: %d Best Accuracy: %f', state['finished'],
                 state['best_accuracy'])
+    if isinstance(searcher, PrefetchingSearcher):
+        logger.info('Prefetch queue depth: %d Average wait time: %f',
+                    searcher.get_queue_depth(),
+                    searcher.stats.get_average_wait_time())
     searcher.save_state(search_logger.get_search_data_folderpath())
     state = {
         'finished': state['finished'],
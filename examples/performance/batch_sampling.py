@@ -0,0 +1,74 @@
+"""Compares the time per architecture of sampling architectures one at a time
+with :meth:`deep_architect.searchers.common.Searcher.sample` and in batches
+with :meth:`deep_architect.searchers.common.Searcher.sample_batch`, for
+several searchers on a cell-based search space.
+"""
+from __future__ import print_function
+import time
+from six.moves import range
+import numpy as np
+import deep_architect.core as co
+import deep_architect.utils as ut
+import deep_architect.modules as mo
+from deep_architect.searchers.random import RandomSearcher
+from deep_architect.searchers.mcts import MCTSSearcher
+from deep_architect.searchers.smbo_random import SMBOSearcher
+from deep_architect.surrogates.hashing import HashingSurrogate
+import search_spaces as ss
+
+
+def main():
+    cmd = ut.CommandLineArgs()
+    cmd.add('num_samples', 'int', 128, True)
+    cmd.add('batch_size', 'int', 16, True)
+    cmd.add('num_cells', 'int', 6, True)
+    cmd.add('num_blocks', 'int', 5, True)
+    cfg = cmd.parse()
+
+    def search_space_fn():
+        co.Scope.reset_default_scope()
+        return mo.buffer_io(
+            *ss.cell_search_space(cfg['num_cells'], cfg['num_blocks']))
+
+    def get_smbo_searcher():
+        searcher = SMBOSearcher(search_space_fn, HashingSurrogate(1024, 1),
+                                cfg['batch_size'], 0.1)
+        # fits the surrogate model so that it is used to score the models.
+        searcher.update_batch(
+            [0.0, 1.0],
+            [t for (_, _, _, t) in searcher.sample_batch(2)])
+        return searcher
+
+    name_to_get_searcher = [
+        ('random', lambda: RandomSearcher(search_space_fn)),
+        ('mcts', lambda: MCTSSearcher(search_space_fn)),
+        ('smbo', get_smbo_searcher),
+    ]
+    num_batches = cfg['num_samples'] // cfg['batch_size']
+    for name, get_searcher in name_to_get_searcher:
+        np.random.seed(0)
+        searcher = get_searcher()
+        start = time.time()
+        for _ in range(num_batches * cfg['batch_size']):
+            _, _, _, token = searcher.sample()
+            searcher.update(0.0, token)
+        sequential_time = time.time() - start
+
+        np.random.seed(0)
+        searcher = get_searcher()
+        start = time.time()
+        for _ in range(num_batches):
+            samples = searcher.sample_batch(cfg['batch_size'])
+            searcher.update_batch([0.0] * len(samples),
+                                  [t for (_, _, _, t) in samples])
+        batch_time = time.time() - start
+
+        num_samples = num_batches * cfg['batch_size']
+        print('%s: %.2f ms per architecture one at a time, %.2f ms in '
+              'batches of %d' % (name, 1e3 * sequential_time / num_samples,
+                                 1e3 * batch_time / num_samples,
+                                 cfg['batch_size']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Compares the rejection rate and the time per valid sample when sampling
+cells whose substitution function rejects invalid connections, with and
+without declaring the validity conditions as constraints.
+
+The cells are similar to the ones of NAS-Bench-101: the nodes are connected
+by a directed acyclic graph chosen with a boolean hyperparameter for each
+pair of nodes, every node with an incoming connection must have an
+outgoing connection and vice versa, the output must be reachable, and the
+number of connections is limited.
+"""
+from __future__ import print_function
+import itertools
+from six.moves import range
+import numpy as np
+import deep_architect.core as co
+import deep_architect.utils as ut
+import deep_architect.modules as mo
+from deep_architect.searchers.random import RandomSearcher
+from deep_architect.hyperparameters import Bool
+import search_spaces as ss
+
+
+def get_num_ins_and_outs(dh, num_nodes):
+    """Number of assigned incoming and outgoing connections of each node, and
+    whether all its incoming and outgoing connections are assigned."""
+    ins = [[dh.get('%d_%d' % (i, j)) for i in range(j)]
+           for j in range(num_nodes + 2)]
+    outs = [[dh.get('%d_%d' % (i, j))
+             for j in range(i + 1, num_nodes + 2)]
+            for i in range(num_nodes + 2)]
+    return ([(sum(v for v in vs if v), None not in vs) for vs in ins],
+            [(sum(v for v in vs if v), None not in vs) for vs in outs])
+
+
+def is_valid(dh, num_nodes, max_num_edges):
+    """Checks if the connections assigned so far can lead to a valid cell."""
+    if sum(v for v in dh.values() if v) > max_num_edges:
+        return False
+    ins, outs = get_num_ins_and_outs(dh, num_nodes)
+    for i in range(1, num_nodes + 1):
+        if ((ins[i] == (0, True) and outs[i][0] > 0) or
+                (outs[i] == (0, True) and ins[i][0] > 0)):
+            return False
+    return ins[-1] != (0, True)
+
+
+def dag_cell(num_nodes, max_num_edges, use_constraint):
+    name_to_hyperp = {
+        '%d_%d' % (i, j): Bool()
+        for (i, j) in itertools.combinations(range(num_nodes + 2), 2)
+    }
+    if use_constraint:
+        co.Constraint(lambda dh: is_valid(dh, num_nodes, max_num_edges),
+                      name_to_hyperp)
+
+    def substitution_fn(dh):
+        if not is_valid(dh, num_nodes, max_num_edges):
+            raise co.InvalidArchitectureError('Invalid cell.')
+        ins, _ = get_num_ins_and_outs(dh, num_nodes)
+        nodes = [ss.identity()] + [
+            ss.op('Node', {}, max(1, ins[i][0]))
+            for i in range(1, num_nodes + 2)
+        ]
+        num_connected = [0] * (num_nodes + 2)
+        for i, j in itertools.combinations(range(num_nodes + 2), 2):
+            if dh['%d_%d' % (i, j)]:
+                ix_name = ('in' if ins[j][0] == 1 else
+                           'in%d' % num_connected[j])
+                nodes[i][1]['out'].connect(nodes[j][0][ix_name])
+                num_connected[j] += 1
+        return nodes[0][0], nodes[-1][1]
+
+    return mo.substitution_module('DAGCell', substitution_fn, name_to_hyperp,
+                                  ['in'], ['out'])
+
+
+def main():
+    cmd = ut.CommandLineArgs()
+    cmd.add('num_samples', 'int', 200, True)
+    cmd.add('num_nodes', 'int', 5, True)
+    cmd.add('max_num_edges', 'int', 9, True)
+    cfg = cmd.parse()
+
+    for use_constraint in [False, True]:
+
+        def search_space_fn():
+            co.Scope.reset_default_scope()
+            return mo.buffer_io(*dag_cell(cfg['num_nodes'], cfg[
+                'max_num_edges'], use_constraint))
+
+        np.random.seed(0)
+        searcher = RandomSearcher(search_space_fn)
+        for _ in range(cfg['num_samples']):
+            searcher.sample()
+        print('%s constraints: rejection rate %.3f, %.2f ms per valid sample' %
+              ('with' if use_constraint else 'without',
+               searcher.stats.get_rejection_rate(),
+               1e3 * searcher.stats.get_time_per_valid_sample()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Measures the memory used by the objects of the core graph representation.
+
+Reports the number of bytes allocated per module (including its inputs,
+outputs, hyperparameters, and the entries in the scope) and the number of
+objects and bytes kept alive per architecture sampled from a cell-based
+search space. Run it on different versions of the code to compare them.
+"""
+from __future__ import print_function
+import gc
+import tracemalloc
+from six.moves import range
+import numpy as np
+import deep_architect.core as co
+import deep_architect.utils as ut
+import deep_architect.searchers.common as se
+from deep_architect.hyperparameters import Discrete as D
+import search_spaces as ss
+
+
+def measure(fn):
+    """Returns the number of objects and bytes allocated and kept alive by
+    the function."""
+    gc.collect()
+    num_objects = len(gc.get_objects())
+    tracemalloc.start()
+    out = fn()
+    gc.collect()
+    num_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    gc.collect()
+    num_objects = len(gc.get_objects()) - num_objects
+    return out, num_objects, num_bytes
+
+
+def create_modules(num_modules):
+    co.Scope.reset_default_scope()
+    return [
+        ss.op('Conv', {
+            'filters': D([32, 64]),
+            'filter_width': D([3])
+        }) for _ in range(num_modules)
+    ]
+
+
+def sample_architectures(search_space_fn, num_samples):
+    archs = []
+    for _ in range(num_samples):
+        inputs, outputs = search_space_fn()
+        se.random_specify(outputs)
+        archs.append((inputs, outputs))
+    return archs
+
+
+def main():
+    cmd = ut.CommandLineArgs()
+    cmd.add('num_modules', 'int', 1000, True)
+    cmd.add('num_samples', 'int', 20, True)
+    cmd.add('num_cells', 'int', 6, True)
+    cmd.add('num_blocks', 'int', 5, True)
+    cfg = cmd.parse()
+
+    _, num_objects, num_bytes = measure(
+        lambda: create_modules(cfg['num_modules']))
+    print('modules with two hyperparameters, one input, and one output:')
+    print('  bytes per module: %.1f' % (num_bytes / float(cfg['num_modules'])))
+    print('  objects per module: %.1f' %
+          (num_objects / float(cfg['num_modules'])))
+
+    np.random.seed(0)
+    search_space_fn = ss.get_cell_search_space_fn(cfg['num_cells'],
+                                                  cfg['num_blocks'])
+    archs, num_objects, num_bytes = measure(
+        lambda: sample_architectures(search_space_fn, cfg['num_samples']))
+    num_modules = []
+    for _, outputs in archs:
+        ms = []
+        co.traverse_backward(outputs, ms.append)
+        num_modules.append(len(ms))
+    print('cell search space with %d cells and %d blocks per cell:' %
+          (cfg['num_cells'], cfg['num_blocks']))
+    print('  modules per sampled architecture: %.1f' % np.mean(num_modules))
+    print('  objects per sampled architecture: %.1f' %
+          (num_objects / float(cfg['num_samples'])))
+    print('  bytes per sampled architecture: %.1f' %
+          (num_bytes / float(cfg['num_samples'])))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Counts the distinct architectures among architectures sampled from a
+search space where different sequences of hyperparameter values lead to the
+same architecture, and shows how to skip their evaluations with a cache of
+results keyed by the fingerprints of the architectures.
+"""
+from __future__ import print_function
+import time
+from six.moves import range
+import numpy as np
+import deep_architect.core as co
+import deep_architect.utils as ut
+import deep_architect.modules as mo
+import deep_architect.frozen as fr
+import deep_architect.search_logging as sl
+import deep_architect.searchers.common as se
+from deep_architect.hyperparameters import Discrete as D
+import search_spaces as ss
+
+
+def search_space(num_blocks):
+    """Blocks with optional convolutions, where each block applies a
+    permutation of two convolutions with a shared filter size.
+
+    The order of the convolutions does not matter if they get the same number
+    of filters.
+    """
+
+    def block():
+        h_filters = D([1, 3])
+        h_other_filters = D([1, 3])
+        return mo.siso_permutation([
+            lambda: ss.op('Conv', {
+                'filters': h_filters,
+                'filter_size': D([1])
+            }),
+            lambda: ss.op('Conv', {
+                'filters': h_other_filters,
+                'filter_size': D([1])
+            })
+        ], D([0, 1]))
+
+    return mo.siso_sequential([
+        mo.siso_optional(block, D([0, 1])) for _ in range(num_blocks)
+    ])
+
+
+def main():
+    cmd = ut.CommandLineArgs()
+    cmd.add('num_samples', 'int', 1000, True)
+    cmd.add('num_blocks', 'int', 2, True)
+    cmd.add('eval_time', 'float', 0.001, True)
+    cfg = cmd.parse()
+
+    np.random.seed(0)
+    cache = sl.ResultCache()
+    value_lsts = set()
+    num_evaluations = 0
+    start = time.time()
+    for _ in range(cfg['num_samples']):
+        co.Scope.reset_default_scope()
+        inputs, outputs = mo.buffer_io(*search_space(cfg['num_blocks']))
+        value_lsts.add(tuple(se.random_specify(outputs)))
+        fingerprint = fr.get_fingerprint(inputs, outputs)
+        if fingerprint not in cache:
+            # simulates the evaluation of the architecture.
+            time.sleep(cfg['eval_time'])
+            cache.add(fingerprint, {'validation_accuracy': np.random.rand()})
+            num_evaluations += 1
+    print('%d samples, %d distinct sequences of values, '
+          '%d distinct architectures' %
+          (cfg['num_samples'], len(value_lsts), len(cache)))
+    print('%d evaluations in %.2f s' % (num_evaluations, time.time() - start))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Compares the time per update and per tournament of the population of
+:class:`deep_architect.searchers.regularized_evolution.EvolutionSearcher`
+when kept in a deque that is scanned for the worst model, as in previous
+versions of the searcher, and when kept in a
+:class:`deep_architect.searchers.regularized_evolution.Population`.
+
+Models are strings and scores are random, so only the operations on the
+population are timed. Each update removes the worst model and adds a new
+one. Tournaments are run one at a time and in batches.
+"""
+from __future__ import print_function
+import random
+import time
+from collections import deque
+from six.moves import range
+import numpy as np
+import deep_architect.utils as ut
+from deep_architect.searchers.regularized_evolution import Population
+
+
+def deque_update(population, model, score):
+    min_score_ind = min(range(len(population)),
+                        key=lambda i: population[i][1])
+    del population[min_score_ind]
+    population.append((model, score))
+
+
+def deque_tournament(population, tournament_size):
+    sample_inds = sorted(
+        random.sample(list(range(len(population))), tournament_size))
+    return max(sample_inds, key=lambda i: population[i][1])
+
+
+def deque_tournaments(population, num_tournaments, tournament_size):
+    scores = np.array([score for (_, score) in population])
+    keys = np.random.rand(num_tournaments, len(population))
+    tournament_inds = np.argsort(keys, axis=1)[:, :tournament_size]
+    tournament_inds.sort(axis=1)
+    winners = np.argmax(scores[tournament_inds], axis=1)
+    return tournament_inds[np.arange(num_tournaments), winners]
+
+
+def time_per_call(fn, num_calls):
+    start = time.time()
+    for _ in range(num_calls):
+        fn()
+    return 1e6 * (time.time() - start) / num_calls
+
+
+def main():
+    cmd = ut.CommandLineArgs()
+    cmd.add('num_calls', 'int', 2000, True)
+    cmd.add('tournament_size', 'int', 25, True)
+    cmd.add('batch_size', 'int', 64, True)
+    cfg = cmd.parse()
+
+    for P in [100, 1000, 10000]:
+        np.random.seed(0)
+        random.seed(0)
+        dq = deque(maxlen=P)
+        population = Population(P)
+        for i in range(P):
+            score = np.random.rand()
+            dq.append(('model%d' % i, score))
+            population.add('model%d' % i, score)
+
+        def population_update():
+            population.remove(population.get_worst_id())
+            population.add('model', np.random.rand())
+
+        num_calls = cfg['num_calls']
+        size = cfg['tournament_size']
+        num_batch_calls = max(1, num_calls // cfg['batch_size'])
+        times = [
+            time_per_call(
+                lambda: deque_update(dq, 'model', np.random.rand()),
+                num_calls),
+            time_per_call(population_update, num_calls),
+            time_per_call(lambda: deque_tournament(dq, size), num_calls),
+            time_per_call(lambda: population.run_tournaments(1, size),
+                          num_calls),
+            time_per_call(
+                lambda: deque_tournaments(dq, cfg['batch_size'], size),
+                num_batch_calls) / cfg['batch_size'],
+            time_per_call(
+                lambda: population.run_tournaments(cfg['batch_size'], size),
+                num_batch_calls) / cfg['batch_size'],
+        ]
+        print('P=%d: update %.1f us (deque) %.1f us (indexed), '
+              'tournament %.1f us / %.1f us, '
+              'batched tournament %.1f us / %.1f us' % tuple([P] + times))
+
+
+if __name__ == '__main__':
+    main()
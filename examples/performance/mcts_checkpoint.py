@@ -0,0 +1,103 @@
+"""Measures the time to write and load checkpoints of an MCTS tree with about
+a million nodes, in full and incrementally after a few more samples, and
+compares them with writing the tree as nested lists to JSON.
+"""
+from __future__ import print_function
+import json
+import os
+import shutil
+import tempfile
+import time
+from six.moves import range
+import numpy as np
+import deep_architect.core as co
+import deep_architect.utils as ut
+import deep_architect.modules as mo
+import deep_architect.hyperparameters as hp
+from deep_architect.searchers.mcts import MCTSSearcher
+import search_spaces as ss
+
+
+def get_folder_size(folderpath):
+    return sum(
+        os.path.getsize(ut.join_paths([folderpath, name]))
+        for name in os.listdir(folderpath))
+
+
+def to_nested_lists(tree):
+    """Nested lists with the statistics and the children of each node, in the
+    format used by JSON checkpoints."""
+    root = [int(tree.num_trials[0]), float(tree.sum_scores[0]), []]
+    stack = [(0, root)]
+    while len(stack) > 0:
+        node, lst = stack.pop()
+        if not tree.is_leaf(node):
+            for i in range(tree.num_children[node]):
+                child = tree.get_child(node, i)
+                child_lst = [
+                    int(tree.num_trials[child]),
+                    float(tree.sum_scores[child]), []
+                ]
+                lst[2].append(child_lst)
+                stack.append((child, child_lst))
+    return root
+
+
+def main():
+    cmd = ut.CommandLineArgs()
+    cmd.add('num_values', 'int', 1000, True)
+    cmd.add('num_samples', 'int', 1000, True)
+    cmd.add('num_incremental_samples', 'int', 10, True)
+    cfg = cmd.parse()
+
+    def search_space_fn():
+        co.Scope.reset_default_scope()
+        return mo.buffer_io(*mo.siso_sequential([
+            ss.Op({'h': hp.Discrete(list(range(cfg['num_values'])))}).get_io()
+            for _ in range(4)
+        ]))
+
+    def run(searcher, num_samples):
+        for _ in range(num_samples):
+            _, _, _, searcher_eval_token = searcher.sample()
+            searcher.update(np.random.rand(), searcher_eval_token)
+
+    np.random.seed(0)
+    searcher = MCTSSearcher(search_space_fn)
+    run(searcher, cfg['num_samples'])
+    print('%d nodes' % searcher.tree.get_num_nodes())
+
+    folderpath = tempfile.mkdtemp()
+    try:
+        start = time.time()
+        searcher.save_state(folderpath)
+        print('full checkpoint: %.3f s to write, %.1f MB' %
+              (time.time() - start, get_folder_size(folderpath) / 1e6))
+
+        size = get_folder_size(folderpath)
+        run(searcher, cfg['num_incremental_samples'])
+        start = time.time()
+        searcher.save_state(folderpath)
+        print('incremental checkpoint after %d samples: %.3f s to write, '
+              '%.1f KB' % (cfg['num_incremental_samples'], time.time() - start,
+                           (get_folder_size(folderpath) - size) / 1e3))
+
+        start = time.time()
+        MCTSSearcher(search_space_fn).load_state(folderpath)
+        print('checkpoint: %.3f s to load' % (time.time() - start))
+
+        filepath = ut.join_paths([folderpath, 'nested.json'])
+        start = time.time()
+        with open(filepath, 'w') as f:
+            json.dump({'mcts_root_node': to_nested_lists(searcher.tree)}, f)
+        print('nested lists in JSON: %.3f s to write, %.1f MB' %
+              (time.time() - start, os.path.getsize(filepath) / 1e6))
+        start = time.time()
+        ut.read_jsonfile(filepath)
+        print('nested lists in JSON: %.3f s to parse' % (time.time() - start))
+    finally:
+        shutil.rmtree(folderpath)
+
+
+if __name__ == '__main__':
+    main()
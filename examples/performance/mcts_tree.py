@@ -0,0 +1,63 @@
+"""Measures the memory used by the MCTS tree and the time to sample an
+architecture with MCTS as the tree grows, for a search space with wide
+discrete hyperparameters.
+
+Each sample expands a leaf of the tree, adding as many nodes as values of the
+hyperparameter, so the tree reaches a million nodes after roughly
+``1e6 / num_values`` samples.
+"""
+from __future__ import print_function
+import time
+import tracemalloc
+from six.moves import range
+import numpy as np
+import deep_architect.core as co
+import deep_architect.utils as ut
+import deep_architect.modules as mo
+import deep_architect.hyperparameters as hp
+from deep_architect.searchers.mcts import MCTSSearcher
+import search_spaces as ss
+
+
+def main():
+    cmd = ut.CommandLineArgs()
+    cmd.add('num_nodes', 'int', 1000000, True)
+    cmd.add('num_values', 'int', 1000, True)
+    cmd.add('num_hyperps', 'int', 4, True)
+    cmd.add('num_timed_samples', 'int', 10, True)
+    cfg = cmd.parse()
+
+    def search_space_fn():
+        co.Scope.reset_default_scope()
+        return mo.buffer_io(*mo.siso_sequential([
+            ss.Op({'h': hp.Discrete(list(range(cfg['num_values'])))}).get_io()
+            for _ in range(cfg['num_hyperps'])
+        ]))
+
+    np.random.seed(0)
+    tracemalloc.start()
+    searcher = MCTSSearcher(search_space_fn)
+    num_samples = 0
+    checkpoint = 10000
+    while True:
+        start = time.time()
+        for _ in range(cfg['num_timed_samples']):
+            _, _, _, searcher_eval_token = searcher.sample()
+            searcher.update(np.random.rand(), searcher_eval_token)
+        latency = (time.time() - start) / cfg['num_timed_samples']
+        num_samples += cfg['num_timed_samples']
+
+        num_nodes = searcher.tree.get_num_nodes()
+        if num_nodes >= checkpoint or num_nodes >= cfg['num_nodes']:
+            memory, _ = tracemalloc.get_traced_memory()
+            print('%d nodes after %d samples: %.2f ms per sample, %.1f bytes '
+                  'per node' % (num_nodes, num_samples, 1e3 * latency,
+                                float(memory) / num_nodes))
+            while checkpoint <= num_nodes:
+                checkpoint *= 10
+        if num_nodes >= cfg['num_nodes']:
+            break
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Compares computing the module evaluation sequence in each forward call with
+getting it from a cache, and evaluating all the modules with evaluating only
+the modules needed for an intermediate output.
+"""
+from __future__ import print_function
+import time
+import deep_architect.core as co
+import deep_architect.utils as ut
+import deep_architect.searchers.common as se
+import search_spaces as ss
+
+
+def time_forward(input_to_val, get_seq_fn, output_lst, num_repeats):
+    start = time.time()
+    for _ in range(num_repeats):
+        co.forward(input_to_val, get_seq_fn(), output_lst=output_lst)
+    return (time.time() - start) / num_repeats
+
+
+def main():
+    cmd = ut.CommandLineArgs()
+    cmd.add('num_cells', 'int', 8, True)
+    cmd.add('num_blocks', 'int', 5, True)
+    cmd.add('num_repeats', 'int', 100, True)
+    cfg = cmd.parse()
+
+    inputs, outputs = ss.cell_search_space(cfg['num_cells'],
+                                           cfg['num_blocks'])
+    se.random_specify(outputs)
+    input_lst = list(inputs.values())
+    output_lst = list(outputs.values())
+    input_to_val = {ix: 1.0 for ix in input_lst}
+    module_seq = co.determine_module_eval_seq(input_lst)
+    # output of a module halfway through the architecture.
+    mid_output_lst = list(module_seq[len(module_seq) // 2].outputs.values())
+    cache = co.ModuleEvalSeqCache(2)
+    print('%d modules, %d needed for the intermediate output' %
+          (len(module_seq),
+           len(co.determine_module_eval_seq(input_lst, mid_output_lst))))
+
+    for name, lst in [('all outputs', output_lst),
+                      ('intermediate output', mid_output_lst)]:
+        t_compute = time_forward(
+            input_to_val, lambda: co.determine_module_eval_seq(input_lst, lst),
+            lst, cfg['num_repeats'])
+        t_cache = time_forward(input_to_val, lambda: cache.get(input_lst, lst),
+                               lst, cfg['num_repeats'])
+        print('%s: %.3f ms per forward recomputing the sequence, '
+              '%.3f ms with the cache' % (name, 1e3 * t_compute,
+                                          1e3 * t_cache))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Compares sequential forward with forward in a thread pool on a wide graph.
+
+The modules sleep during forward to simulate operations that release the
+global interpreter lock, e.g., operations of deep learning frameworks on
+large tensors.
+"""
+from __future__ import print_function
+import time
+import deep_architect.core as co
+import deep_architect.utils as ut
+import deep_architect.modules as mo
+import deep_architect.searchers.common as se
+import search_spaces as ss
+
+
+def main():
+    cmd = ut.CommandLineArgs()
+    cmd.add('num_branches', 'int', 16, True)
+    cmd.add('branch_length', 'int', 4, True)
+    cmd.add('sleep_time', 'float', 0.005, True)
+    cmd.add('num_repeats', 'int', 5, True)
+    cfg = cmd.parse()
+
+    inputs, outputs = mo.buffer_io(*ss.wide_search_space(
+        cfg['num_branches'], cfg['branch_length'], cfg['sleep_time']))
+    se.random_specify(outputs)
+    module_seq = co.determine_module_eval_seq(list(inputs.values()))
+    print('%d modules, %d branches of length %d, %.1f ms per module' %
+          (len(module_seq), cfg['num_branches'], cfg['branch_length'],
+           1e3 * cfg['sleep_time']))
+
+    for num_workers in [1, 2, 4, 8, 16]:
+        start = time.time()
+        for _ in range(cfg['num_repeats']):
+            co.forward({inputs['in']: 1.0},
+                       module_seq,
+                       num_workers=num_workers)
+        elapsed = (time.time() - start) / cfg['num_repeats']
+        print('%d workers: %.1f ms per forward, output %.1f' %
+              (num_workers, 1e3 * elapsed, outputs['out'].val))
+
+
+if __name__ == '__main__':
+    main()
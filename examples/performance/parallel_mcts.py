@@ -0,0 +1,87 @@
+"""Compares MCTS searchers with and without virtual loss when many
+evaluations are pending at the same time, as with many asynchronous workers.
+
+The workers are simulated: a fixed number of architectures is being
+evaluated at any time, and each step a random one of them finishes, the
+searcher is updated with its score, and a new architecture is sampled. The
+score of an architecture is a deterministic function of its hyperparameter
+values. Reports the number of architectures that were sampled while an
+equal architecture was pending, the number of distinct architectures
+evaluated, and the best score found.
+"""
+from __future__ import print_function
+import hashlib
+from six.moves import range
+import numpy as np
+import deep_architect.core as co
+import deep_architect.utils as ut
+import deep_architect.modules as mo
+from deep_architect.searchers.mcts import MCTSSearcher
+from deep_architect.searchers.smbo_mcts import SMBOSearcherWithMCTSOptimizer
+from deep_architect.surrogates.hashing import HashingSurrogate
+import search_spaces as ss
+
+
+def get_score(vs):
+    """Average over the hyperparameters of a pseudo-random score in [0, 1]
+    for each position and value."""
+    scores = []
+    for i, v in enumerate(vs):
+        digest = hashlib.md5(('%d %r' % (i, v)).encode('utf-8')).hexdigest()
+        scores.append(int(digest[:8], 16) / float(2**32))
+    return np.mean(scores)
+
+
+def main():
+    cmd = ut.CommandLineArgs()
+    cmd.add('num_evals', 'int', 512, True)
+    cmd.add('num_workers', 'int', 32, True)
+    cmd.add('num_layers', 'int', 3, True)
+    cfg = cmd.parse()
+
+    def search_space_fn():
+        co.Scope.reset_default_scope()
+        return mo.buffer_io(*mo.siso_sequential(
+            [ss.conv() for _ in range(cfg['num_layers'])]))
+
+    def get_smbo_searcher(virtual_loss):
+        return SMBOSearcherWithMCTSOptimizer(search_space_fn,
+                                             HashingSurrogate(1024, 1),
+                                             16,
+                                             0.1,
+                                             cfg['num_evals'],
+                                             virtual_loss=virtual_loss)
+
+    name_to_get_searcher = [
+        ('mcts', lambda: MCTSSearcher(search_space_fn)),
+        ('mcts, virtual loss',
+         lambda: MCTSSearcher(search_space_fn, virtual_loss=0.0)),
+        ('smbo mcts', lambda: get_smbo_searcher(None)),
+        ('smbo mcts, virtual loss', lambda: get_smbo_searcher(0.0)),
+    ]
+    for name, get_searcher in name_to_get_searcher:
+        np.random.seed(0)
+        searcher = get_searcher()
+        pending = []
+        evaluated = set()
+        num_repeated = 0
+        best_score = -np.inf
+        for i in range(cfg['num_evals'] + cfg['num_workers']):
+            if len(pending) == cfg['num_workers'] or i >= cfg['num_evals']:
+                vs, token = pending.pop(np.random.randint(len(pending)))
+                score = get_score(vs)
+                searcher.update(score, token)
+                evaluated.add(ut.json_object_to_json_string(vs))
+                best_score = max(best_score, score)
+            if i < cfg['num_evals']:
+                _, _, vs, token = searcher.sample()
+                if any(vs == other_vs for (other_vs, _) in pending):
+                    num_repeated += 1
+                pending.append((vs, token))
+
+        print('%s: %d sampled while pending, %d distinct, best score %.3f' %
+              (name, num_repeated, len(evaluated), best_score))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Compares the time a master spends sampling architectures for the workers
+with and without sampling them in the background with
+:class:`deep_architect.searchers.prefetch.PrefetchingSearcher`.
+
+The master waits a fixed time between requests, as if waiting for a worker
+to finish an evaluation, and then samples an architecture and updates the
+searcher with a random result.
+"""
+from __future__ import print_function
+import time
+from six.moves import range
+import numpy as np
+import deep_architect.core as co
+import deep_architect.utils as ut
+import deep_architect.modules as mo
+from deep_architect.searchers.random import RandomSearcher
+from deep_architect.searchers.prefetch import PrefetchingSearcher
+import search_spaces as ss
+
+
+def main():
+    cmd = ut.CommandLineArgs()
+    cmd.add('num_samples', 'int', 100, True)
+    cmd.add('eval_time', 'float', 0.02, True)
+    cmd.add('queue_size', 'int', 4, True)
+    cmd.add('num_cells', 'int', 6, True)
+    cmd.add('num_blocks', 'int', 5, True)
+    cfg = cmd.parse()
+
+    def search_space_fn():
+        co.Scope.reset_default_scope()
+        return mo.buffer_io(
+            *ss.cell_search_space(cfg['num_cells'], cfg['num_blocks']))
+
+    for use_prefetch in [False, True]:
+        np.random.seed(0)
+        searcher = RandomSearcher(search_space_fn)
+        if use_prefetch:
+            searcher = PrefetchingSearcher(searcher, cfg['queue_size'])
+        sampling_time = 0.0
+        for _ in range(cfg['num_samples']):
+            time.sleep(cfg['eval_time'])
+            start = time.time()
+            _, _, _, searcher_eval_token = searcher.sample()
+            sampling_time += time.time() - start
+            searcher.update(np.random.rand(), searcher_eval_token)
+
+        print('%s: %.2f ms per architecture waiting for the searcher' %
+              ('prefetch' if use_prefetch else 'no prefetch',
+               1e3 * sampling_time / cfg['num_samples']))
+        if use_prefetch:
+            print('average queue depth: %.2f, %d waits for an empty queue' %
+                  (searcher.stats.get_average_queue_depth(),
+                   searcher.stats.num_waits))
+            searcher.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Compares range hyperparameters with discrete hyperparameters over a fine
+discretization of the same ranges: time to sample values, and size of the
+tree and best score found by MCTS on a synthetic score of a learning rate,
+a width, and a dropout rate.
+"""
+from __future__ import print_function
+import time
+from six.moves import range
+import numpy as np
+import deep_architect.core as co
+import deep_architect.utils as ut
+import deep_architect.modules as mo
+import deep_architect.hyperparameters as hp
+import deep_architect.searchers.common as se
+from deep_architect.searchers.mcts import MCTSSearcher
+import search_spaces as ss
+
+
+def get_hyperps(use_range, num_values):
+    if use_range:
+        return {
+            'lr': hp.LogFloat(1e-5, 1e-1),
+            'width': hp.Int(16, 512),
+            'dropout': hp.Float(0.0, 0.5)
+        }
+    else:
+        return {
+            'lr': hp.Discrete(list(np.logspace(-5, -1, num_values))),
+            'width': hp.Discrete(list(range(16, 513))),
+            'dropout': hp.Discrete(list(np.linspace(0.0, 0.5, num_values)))
+        }
+
+
+def get_score(lr, width, dropout):
+    return -((np.log10(lr) + 3.0)**2 + (np.log2(width) - 7.0)**2 +
+             (10.0 * (dropout - 0.2))**2)
+
+
+def main():
+    cmd = ut.CommandLineArgs()
+    cmd.add('num_samples', 'int', 500, True)
+    cmd.add('num_values', 'int', 1000, True)
+    cfg = cmd.parse()
+
+    for use_range in [False, True]:
+        name = 'range' if use_range else 'discrete'
+        np.random.seed(0)
+        h = get_hyperps(use_range, cfg['num_values'])['lr']
+        start = time.time()
+        if use_range:
+            h.sample_values(100000)
+        else:
+            for _ in range(100000):
+                h.vs[se.sample_value_index(h)]
+        print('%s: %.3f us per sampled learning rate' %
+              (name, 1e6 * (time.time() - start) / 100000))
+
+        # hyperparameters of the last search space created.
+        name_to_hyperp = {}
+
+        def search_space_fn():
+            co.Scope.reset_default_scope()
+            name_to_hyperp.update(get_hyperps(use_range, cfg['num_values']))
+            return mo.buffer_io(*ss.Op(name_to_hyperp).get_io())
+
+        searcher = MCTSSearcher(search_space_fn)
+        best_score = -np.inf
+        for _ in range(cfg['num_samples']):
+            _, outputs, _, token = searcher.sample()
+            score = get_score(*[
+                name_to_hyperp[k].get_value()
+                for k in ['lr', 'width', 'dropout']
+            ])
+            best_score = max(best_score, score)
+            searcher.update(score, token)
+        print('%s: %d tree nodes, best score %.3f' %
+              (name, searcher.tree.get_num_nodes(), best_score))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Compares replaying sampled architectures from lists of values and from
+lists of indices into the possible values of the hyperparameters, and the
+size of both encodings when serialized to JSON.
+"""
+from __future__ import print_function
+import json
+import time
+from six.moves import range
+import numpy as np
+import deep_architect.core as co
+import deep_architect.utils as ut
+import deep_architect.modules as mo
+import deep_architect.searchers.common as se
+import search_spaces as ss
+
+
+def main():
+    cmd = ut.CommandLineArgs()
+    cmd.add('num_samples', 'int', 1000, True)
+    cmd.add('num_cells', 'int', 6, True)
+    cmd.add('num_blocks', 'int', 5, True)
+    cfg = cmd.parse()
+
+    def search_space_fn():
+        co.Scope.reset_default_scope()
+        return mo.buffer_io(
+            *ss.cell_search_space(cfg['num_cells'], cfg['num_blocks']))
+
+    np.random.seed(0)
+    index_lsts = []
+    value_lsts = []
+    for _ in range(cfg['num_samples']):
+        _, outputs = search_space_fn()
+        index_lsts.append(se.random_specify_indices(outputs))
+        _, outputs = search_space_fn()
+        value_lsts.append(
+            se.index_lst_to_hyperp_value_lst(outputs, index_lsts[-1]))
+    print('%d hyperparameters per architecture' % len(index_lsts[0]))
+    print('JSON size per architecture: %.1f KB with values, '
+          '%.1f KB with indices' %
+          (len(json.dumps(value_lsts)) / 1024.0 / cfg['num_samples'],
+           len(json.dumps(index_lsts)) / 1024.0 / cfg['num_samples']))
+
+    for name, lsts, specify_fn in [('values', value_lsts, se.specify),
+                                   ('indices', index_lsts,
+                                    se.specify_indices)]:
+        start = time.time()
+        for lst in lsts:
+            _, outputs = search_space_fn()
+            specify_fn(outputs, lst)
+        print('replay from %s: %.2f ms per architecture' %
+              (name, 1e3 * (time.time() - start) / cfg['num_samples']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Checks that architectures sampled into a long-lived scope are released.
+
+Samples many architectures into the same scope without resetting it, as a
+long-running master that does not reset the scope would, and keeps only the
+last one. Reports the memory in use as sampling progresses and exits with an
+error if it goes over the limit. With a scope that keeps regular references,
+memory grows with the number of samples. With a scope that keeps weak
+references, it stays constant.
+"""
+from __future__ import print_function
+import gc
+import sys
+import tracemalloc
+from six.moves import range
+import deep_architect.core as co
+import deep_architect.utils as ut
+import deep_architect.searchers.common as se
+import deep_architect.modules as mo
+import search_spaces as ss
+
+
+def main():
+    cmd = ut.CommandLineArgs()
+    cmd.add('num_samples', 'int', 100000, True)
+    cmd.add('num_cells', 'int', 1, True)
+    cmd.add('num_blocks', 'int', 2, True)
+    cmd.add('weak_references', 'int', 1, True)
+    cmd.add('max_memory_mb', 'float', 16.0, True)
+    cfg = cmd.parse()
+
+    co.Scope.default_scope = co.Scope(
+        weak_references=bool(cfg['weak_references']))
+    tracemalloc.start()
+    report_every = max(1, cfg['num_samples'] // 10)
+    for i in range(1, cfg['num_samples'] + 1):
+        inputs, outputs = mo.buffer_io(*ss.cell_search_space(
+            cfg['num_cells'], cfg['num_blocks'], 0.0))
+        se.random_specify(outputs)
+        if i % report_every == 0:
+            gc.collect()
+            memory_mb = tracemalloc.get_traced_memory()[0] / 1e6
+            print('%d samples: %.2f MB in use, %d names in the scope' %
+                  (i, memory_mb, len(co.Scope.default_scope.elem_to_name)))
+            if memory_mb > cfg['max_memory_mb']:
+                print('memory limit of %.2f MB exceeded' % cfg['max_memory_mb'])
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""Measures the time to construct modules in a single scope.
+
+Creates increasing numbers of modules with the same name in the same scope,
+as it happens when the scope is not reset between samples or in large
+cell-based search spaces. The time per module should not grow with the
+number of modules already in the scope.
+"""
+from __future__ import print_function
+import time
+from six.moves import range
+import deep_architect.core as co
+import deep_architect.utils as ut
+from deep_architect.hyperparameters import Discrete as D
+import search_spaces as ss
+
+
+def create_modules(num_modules):
+    return [
+        ss.op('Conv', {
+            'filters': D([32, 64]),
+            'filter_width': D([3])
+        }) for _ in range(num_modules)
+    ]
+
+
+def main():
+    cmd = ut.CommandLineArgs()
+    cmd.add('max_num_modules', 'int', 16000, True)
+    cmd.add('lazy_names', 'int', 0, True)
+    cfg = cmd.parse()
+
+    num_modules = 1000
+    while num_modules <= cfg['max_num_modules']:
+        co.Scope.default_scope = (co.Scope(lazy_names=True)
+                                  if cfg['lazy_names'] else co.Scope())
+        start = time.time()
+        create_modules(num_modules)
+        elapsed = time.time() - start
+        print('%d modules: %.2f seconds, %.1f microseconds per module' %
+              (num_modules, elapsed, 1e6 * elapsed / num_modules))
+        num_modules *= 2
+
+
+if __name__ == '__main__':
+    main()
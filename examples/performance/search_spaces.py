@@ -0,0 +1,144 @@
+"""Framework independent search spaces used by the performance benchmarks.
+
+The modules do not depend on any deep learning framework. Their forward
+computation sums the values of their inputs, optionally after spending a
+given amount of time, which makes them useful to measure the overhead of the
+core functionality.
+"""
+import time
+from six.moves import range
+import deep_architect.core as co
+import deep_architect.modules as mo
+from deep_architect.hyperparameters import Discrete as D
+
+
+class Op(co.Module):
+    """Module that sums its inputs.
+
+    Args:
+        name_to_hyperp (dict[str, deep_architect.core.Hyperparameter]):
+            Hyperparameters that the module depends on.
+        num_inputs (int): Number of inputs of the module. The inputs are
+            named ``in`` if there is a single input, and ``in0``, ``in1``, ...
+            otherwise.
+        sleep_time (float): Time in seconds spent in each forward call.
+    """
+    __slots__ = ['sleep_time']
+
+    def __init__(self,
+                 name_to_hyperp,
+                 num_inputs=1,
+                 sleep_time=0.0,
+                 scope=None,
+                 name=None):
+        co.Module.__init__(self, scope, name)
+        input_names = ['in'] if num_inputs == 1 else [
+            'in%d' % i for i in range(num_inputs)
+        ]
+        self._register(input_names, ['out'], name_to_hyperp)
+        self.sleep_time = sleep_time
+
+    def _compile(self):
+        pass
+
+    def _forward(self):
+        if self.sleep_time > 0.0:
+            time.sleep(self.sleep_time)
+        self.outputs['out'].val = sum(
+            ix.val for ix in self.inputs.values())
+
+
+def op(name, name_to_hyperp, num_inputs=1, sleep_time=0.0):
+    return Op(name_to_hyperp, num_inputs, sleep_time, name=name).get_io()
+
+
+def conv(sleep_time=0.0):
+    name_to_hyperp = {
+        'filters': D([32, 64, 128]),
+        'filter_width': D([1, 3, 5]),
+        'stride': D([1])
+    }
+    return op('Conv', name_to_hyperp, sleep_time=sleep_time)
+
+
+def pool(sleep_time=0.0):
+    name_to_hyperp = {'pool_type': D(['max', 'avg']), 'filter_width': D([3])}
+    return op('Pool', name_to_hyperp, sleep_time=sleep_time)
+
+
+def identity():
+    return mo.identity()
+
+
+def cell_op(sleep_time=0.0):
+    return mo.siso_or([
+        lambda: conv(sleep_time), lambda: pool(sleep_time), identity,
+        lambda: mo.siso_sequential([conv(sleep_time), conv(sleep_time)])
+    ], D([0, 1, 2, 3]))
+
+
+def cell(num_blocks, sleep_time=0.0):
+    """Cell with two inputs similar to the ones of NASNet.
+
+    Each block chooses two of the previous hidden states, applies an operation
+    to each of them, and sums the results. The output of the cell sums the
+    outputs of all the blocks.
+    """
+    name_to_hyperp = {}
+    for b in range(num_blocks):
+        name_to_hyperp['b%d_in0' % b] = D(list(range(b + 2)))
+        name_to_hyperp['b%d_in1' % b] = D(list(range(b + 2)))
+
+    def substitution_fn(dh):
+        i_inputs, i_outputs = zip(*[identity() for _ in range(2)])
+        hidden_outputs = [io['out'] for io in i_outputs]
+        for b in range(num_blocks):
+            a_inputs, a_outputs = op('Add', {}, 2)
+            for k in range(2):
+                o_inputs, o_outputs = cell_op(sleep_time)
+                o_inputs['in'].connect(hidden_outputs[dh['b%d_in%d' % (b, k)]])
+                a_inputs['in%d' % k].connect(o_outputs['out'])
+            hidden_outputs.append(a_outputs['out'])
+
+        c_inputs, c_outputs = op('Combine', {}, num_blocks)
+        for b in range(num_blocks):
+            c_inputs['in%d' % b].connect(hidden_outputs[b + 2])
+        return ({
+            'in0': i_inputs[0]['in'],
+            'in1': i_inputs[1]['in']
+        }, c_outputs)
+
+    return mo.substitution_module('Cell', substitution_fn, name_to_hyperp,
+                                  ['in0', 'in1'], ['out'])
+
+
+def cell_search_space(num_cells, num_blocks, sleep_time=0.0):
+    """Stack of cells where each cell takes the outputs of the two previous
+    cells.
+    """
+    i_inputs, i_outputs = identity()
+    prev_outputs = [i_outputs['out'], i_outputs['out']]
+    for _ in range(num_cells):
+        c_inputs, c_outputs = cell(num_blocks, sleep_time)
+        c_inputs['in0'].connect(prev_outputs[-2])
+        c_inputs['in1'].connect(prev_outputs[-1])
+        prev_outputs.append(c_outputs['out'])
+    return i_inputs, {'out': prev_outputs[-1]}
+
+
+def get_cell_search_space_fn(num_cells, num_blocks, sleep_time=0.0):
+    return mo.SearchSpaceFactory(lambda: cell_search_space(
+        num_cells, num_blocks, sleep_time)).get_search_space
+
+
+def wide_search_space(num_branches, branch_length, sleep_time=0.0):
+    """Branches of convolutions that start at the same input and whose outputs
+    are summed.
+
+    The branches are independent, so their modules can be evaluated at the
+    same time.
+    """
+    return mo.siso_split_combine(
+        lambda: mo.siso_sequential(
+            [conv(sleep_time) for _ in range(branch_length)]),
+        lambda num_inputs: op('Add', {}, num_inputs), D([num_branches]))
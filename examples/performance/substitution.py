@@ -0,0 +1,71 @@
+"""Measures the time to sample architectures from search spaces with many
+substitution modules.
+
+The nested search space wraps a module in a chain of repeat substitution
+modules whose hyperparameters are already assigned, so all substitutions
+happen when the search space is created.
+"""
+from __future__ import print_function
+import sys
+import time
+from six.moves import range
+import numpy as np
+import deep_architect.core as co
+import deep_architect.utils as ut
+import deep_architect.modules as mo
+import deep_architect.searchers.common as se
+from deep_architect.hyperparameters import Discrete as D
+import search_spaces as ss
+
+
+def nested_search_space(depth):
+
+    def fn(d):
+        if d == 0:
+            return ss.conv()
+        h = D([1])
+        h.assign_value(1)
+        return mo.siso_repeat(lambda: fn(d - 1), h)
+
+    return fn(depth)
+
+
+def time_sampling(search_space_fn, num_samples):
+    start = time.time()
+    for _ in range(num_samples):
+        co.Scope.reset_default_scope()
+        inputs, outputs = mo.buffer_io(*search_space_fn())
+        se.random_specify(outputs)
+    return (time.time() - start) / num_samples
+
+
+def main():
+    cmd = ut.CommandLineArgs()
+    cmd.add('num_samples', 'int', 100, True)
+    cmd.add('num_cells', 'int', 6, True)
+    cmd.add('num_blocks', 'int', 5, True)
+    cfg = cmd.parse()
+
+    np.random.seed(0)
+    t = time_sampling(
+        lambda: ss.cell_search_space(cfg['num_cells'], cfg['num_blocks'], 0.0),
+        cfg['num_samples'])
+    print('cell search space with %d cells and %d blocks per cell: '
+          '%.2f ms per sample' %
+          (cfg['num_cells'], cfg['num_blocks'], 1e3 * t))
+
+    for depth in [50, 100, 1000, 10000]:
+        try:
+            t = time_sampling(lambda: nested_search_space(depth),
+                              max(1, cfg['num_samples'] // 10))
+            print('nested search space with depth %d: %.2f ms per sample' %
+                  (depth, 1e3 * t))
+        except RuntimeError:
+            # NOTE: RecursionError is a subclass of RuntimeError.
+            print('nested search space with depth %d: '
+                  'recursion limit of %d exceeded' %
+                  (depth, sys.getrecursionlimit()))
+
+
+if __name__ == '__main__':
+    main()
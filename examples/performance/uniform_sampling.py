@@ -0,0 +1,66 @@
+"""Counts the architectures in a search space with nested substitution
+modules and compares how evenly architectures are sampled by choosing each
+value uniformly at random and by sampling architectures uniformly at random.
+
+Architectures are counted and compared as sequences of values, which is
+what :class:`deep_architect.searchers.uniform.ArchitectureCounter` samples
+uniformly. Some of the sequences lead to the same architecture.
+"""
+from __future__ import print_function
+import time
+from collections import Counter
+from six.moves import range
+import numpy as np
+import deep_architect.core as co
+import deep_architect.utils as ut
+import deep_architect.modules as mo
+import deep_architect.searchers.common as se
+import deep_architect.searchers.uniform as un
+from deep_architect.hyperparameters import Discrete as D
+import search_spaces as ss
+
+
+def search_space():
+    """Blocks that are either a pooling module or a repetition of optional
+    pooling modules. Most of the architectures are behind the repetition."""
+
+    def block():
+        return mo.siso_or([
+            ss.pool, lambda: mo.siso_repeat(
+                lambda: mo.siso_optional(ss.pool, D([0, 1])), D([1, 2, 3]))
+        ], D([0, 1]))
+
+    return mo.siso_sequential([block(), mo.siso_repeat(block, D([1, 2]))])
+
+
+def search_space_fn():
+    co.Scope.reset_default_scope()
+    return mo.buffer_io(*search_space())
+
+
+def main():
+    cmd = ut.CommandLineArgs()
+    cmd.add('num_samples', 'int', 10000, True)
+    cfg = cmd.parse()
+
+    start = time.time()
+    counter = un.ArchitectureCounter(search_space_fn)
+    num_archs = counter.get_num_architectures()
+    print('%d architectures, counted in %.2f s with %d search spaces' %
+          (num_archs, time.time() - start, counter.num_specifications))
+
+    np.random.seed(0)
+    for name, specify_fn in [('uniform values', se.random_specify),
+                             ('uniform architectures', counter.specify)]:
+        counts = Counter()
+        for _ in range(cfg['num_samples']):
+            _, outputs = search_space_fn()
+            counts[tuple(specify_fn(outputs))] += 1
+        print('%s: %d distinct architectures in %d samples, '
+              'most frequent sampled %d times' %
+              (name, len(counts), cfg['num_samples'],
+               max(counts.values())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,2 @@
+# the folder of this file is added to the path, so that the tests can import
+# the modules in it, e.g., search_spaces.
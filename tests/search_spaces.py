@@ -0,0 +1,92 @@
+"""Framework independent search spaces used by the tests.
+
+Only the functionality of :mod:`deep_architect.core` and
+:mod:`deep_architect.modules` that has been available since the first
+versions of the library is used, so that the results of specifying these
+search spaces can be compared across versions.
+"""
+from six import iteritems, itervalues
+import deep_architect.core as co
+import deep_architect.modules as mo
+from deep_architect.hyperparameters import Discrete as D
+
+
+class Op(co.Module):
+    """Module that sums its inputs."""
+
+    def __init__(self, name_to_hyperp, input_names, scope=None, name=None):
+        co.Module.__init__(self, scope, name)
+        self._register(input_names, ['out'], name_to_hyperp)
+
+    def _compile(self):
+        pass
+
+    def _forward(self):
+        self.outputs['out'].val = sum(
+            ix.val for ix in itervalues(self.inputs))
+
+
+def op(name, name_to_hyperp, input_names=('in',)):
+    return Op(name_to_hyperp, list(input_names), name=name).get_io()
+
+
+def conv():
+    return op('Conv', {'filters': D([32, 64]), 'width': D([1, 3, 5])})
+
+
+def add():
+    return op('Add', {}, ['in0', 'in1'])
+
+
+def block():
+    return mo.siso_or([
+        conv,
+        lambda: mo.siso_repeat(conv, D([1, 2, 3])),
+        lambda: mo.siso_optional(
+            lambda: mo.siso_permutation(
+                [conv, lambda: op('Pool', {'type': D(['max', 'avg'])})],
+                D([0, 1])), D([0, 1])),
+        lambda: mo.siso_residual(
+            lambda: mo.siso_repeat(
+                lambda: mo.siso_or([conv, mo.identity], D([0, 1])),
+                D([1, 2])), mo.identity, add),
+    ], D([0, 1, 2, 3]))
+
+
+def nested_search_space(reset_scope=True):
+    """Search space with substitution modules nested up to four levels,
+    including repeats, optional modules, permutations, and residual
+    connections."""
+    if reset_scope:
+        co.Scope.reset_default_scope()
+    return mo.siso_sequential([
+        block(),
+        mo.siso_repeat(block, D([1, 2])),
+        mo.siso_split_combine(
+            block, lambda num_inputs: op(
+                'Combine', {}, ['in%d' % i for i in range(num_inputs)]),
+            D([1, 2])),
+    ])
+
+
+def describe(outputs):
+    """Description of a specified architecture that does not depend on the
+    names of the modules or on the order of the hyperparameter values used to
+    specify it.
+
+    Modules are listed in the order of a backward traversal from the outputs,
+    with their type, their hyperparameter values, and the positions of the
+    modules connected to their inputs.
+    """
+    modules = []
+    co.traverse_backward(outputs, lambda m: modules.append(m))
+    module_to_idx = {m: i for (i, m) in enumerate(modules)}
+    description = []
+    for m in modules:
+        hyperps = sorted(
+            (name, h.get_value()) for (name, h) in iteritems(m.hyperps))
+        inputs = sorted((name, module_to_idx[ix.get_connected_output(
+        ).get_module()] if ix.is_connected() else None)
+                        for (name, ix) in iteritems(m.inputs))
+        description.append([type(m).__name__, hyperps, inputs])
+    return description
@@ -0,0 +1,119 @@
+import random
+import numpy as np
+import deep_architect.core as co
+import deep_architect.hyperparameters as hp
+import deep_architect.searchers.common as se
+import search_spaces as ss
+
+
+def _range_search_space():
+    co.Scope.reset_default_scope()
+    return ss.op(
+        'Op', {
+            'discrete': hp.Discrete(['a', 'b', 'c']),
+            'float': hp.Float(-1.0, 3.0),
+            'log_float': hp.LogFloat(1e-5, 1e-1),
+            'int': hp.Int(2, 9),
+        })
+
+
+def _get_values(outputs):
+    return sorted((name, h.get_value()) for (name, h) in
+                  outputs['out'].get_module().hyperps.items())
+
+
+def test_indices_are_integers_and_replay_exactly():
+    np.random.seed(0)
+    for _ in range(100):
+        _, outputs = _range_search_space()
+        index_lst = se.random_specify_indices(outputs)
+        assert all(isinstance(idx, int) for idx in index_lst)
+        _, outputs_replay = _range_search_space()
+        se.specify_indices(outputs_replay, index_lst)
+        assert _get_values(outputs_replay) == _get_values(outputs)
+
+        _, outputs = _range_search_space()
+        vs = se.index_lst_to_hyperp_value_lst(outputs, index_lst)
+        _, outputs = _range_search_space()
+        assert se.hyperp_value_lst_to_index_lst(outputs, vs) == index_lst
+
+
+def test_grid_of_range_hyperparameters_includes_both_ends():
+    for h in [hp.Float(-1.0, 3.0), hp.LogFloat(1e-5, 1e-1), hp.Int(2, 9)]:
+        n = h.get_num_index_values()
+        assert h.get_index_value(0) == h.low
+        assert h.get_index_value(n - 1) == h.high
+        for idx in [0, 1, n // 2, n - 1]:
+            assert se.get_value_index(h, se.get_index_value(h, idx)) == idx
+
+
+def test_values_not_in_the_grid_have_no_index():
+    h = hp.Float(0.0, 1.0, num_index_values=11)
+    assert se.get_value_index(h, 0.5) == 5
+    for v in [0.55, 1.5]:
+        try:
+            se.get_value_index(h, v)
+            assert False
+        except ValueError:
+            pass
+    try:
+        se.get_value_index(hp.Int(0, 3), 1.5)
+        assert False
+    except ValueError:
+        pass
+
+
+def test_sample_value_index_satisfies_constraints():
+    random.seed(0)
+    np.random.seed(0)
+    for _ in range(20):
+        co.Scope.reset_default_scope()
+        h = hp.Float(0.0, 1.0)
+        co.Constraint(lambda dh: dh.get('h', 1.0) >= 0.5, {'h': h})
+        idx = se.sample_value_index(h)
+        assert h.get_index_value(idx) >= 0.5
+
+
+def test_sample_value_finds_values_allowed_by_narrow_constraints():
+    np.random.seed(0)
+    for _ in range(20):
+        co.Scope.reset_default_scope()
+        h = hp.Float(0.0, 1.0)
+        # about one value in 500 is allowed, so the first batch of candidates
+        # usually has no allowed value.
+        co.Constraint(lambda dh: dh.get('h', 1.0) >= 0.998, {'h': h})
+        assert se.sample_value(h) >= 0.998
+
+
+def _invalid_search_space_fn():
+    co.Scope.reset_default_scope()
+    h = hp.Float(0.0, 1.0)
+    co.Constraint(lambda dh: dh.get('h') is None, {'h': h})
+    return ss.op('Op', {'h': h})
+
+
+def test_sample_valid_rejects_invalid_architectures_up_to_a_maximum():
+    stats = se.SamplingStats()
+    try:
+        se.sample_valid(_invalid_search_space_fn,
+                        se.random_specify,
+                        stats,
+                        max_num_attempts=10)
+        assert False
+    except RuntimeError:
+        pass
+    assert stats.num_rejected == 10 and stats.num_valid == 0
+
+
+def test_sample_valid_does_not_reject_on_other_errors():
+
+    def specify_fn(outputs):
+        raise ValueError('Not a rejection.')
+
+    stats = se.SamplingStats()
+    try:
+        se.sample_valid(_range_search_space, specify_fn, stats)
+        assert False
+    except ValueError as e:
+        assert not isinstance(e, co.InvalidArchitectureError)
+    assert stats.num_rejected == 0
@@ -0,0 +1,224 @@
+import json
+import os
+import numpy as np
+import pytest
+import deep_architect.core as co
+import deep_architect.utils as ut
+import deep_architect.modules as mo
+from deep_architect.searchers.mcts import (MCTSSearcher, MCTSTree,
+                                           MCTSTreeNode)
+from deep_architect.searchers.smbo_mcts import SMBOSearcherWithMCTSOptimizer
+from deep_architect.surrogates.dummy import DummySurrogate
+import search_spaces as ss
+
+
+def _search_space_fn():
+    co.Scope.reset_default_scope()
+    return mo.siso_sequential([ss.conv(), ss.conv()])
+
+
+def test_cancel_removes_the_pending_trials():
+    np.random.seed(0)
+    searcher = MCTSSearcher(_search_space_fn, virtual_loss=0.0)
+    tokens = [searcher.sample()[3] for _ in range(8)]
+    assert searcher.tree.num_pending[0] == 8
+    for token in tokens[:4]:
+        searcher.cancel(token)
+    for token in tokens[4:]:
+        searcher.update(1.0, token)
+    tree = searcher.tree
+    assert np.all(tree.num_pending[:tree.get_num_nodes()] == 0)
+    assert tree.num_trials[0] == 4
+
+    # canceling a token more than once has no effect.
+    searcher.cancel(tokens[0])
+    assert np.all(tree.num_pending[:tree.get_num_nodes()] == 0)
+
+
+def test_cancel_removes_the_pending_architectures_of_smbo_with_mcts():
+    np.random.seed(0)
+    searcher = SMBOSearcherWithMCTSOptimizer(_search_space_fn,
+                                             DummySurrogate(),
+                                             4,
+                                             0.5,
+                                             100,
+                                             virtual_loss=0.0)
+    samples = searcher.sample_batch(4) + [searcher.sample()]
+    assert searcher.get_num_pending() == 5
+    for (_, _, _, token) in samples:
+        searcher.cancel(token)
+    assert searcher.get_num_pending() == 0
+    searcher.cancel(samples[0][3])
+    assert searcher.get_num_pending() == 0
+
+
+def _run(searcher, num_samples):
+    for _ in range(num_samples):
+        _, _, vs, token = searcher.sample()
+        searcher.update(float(vs[0] == 32), token)
+
+
+def _assert_same_tree(tree, other_tree):
+    arrays = tree.get_arrays()
+    other_arrays = other_tree.get_arrays()
+    assert sorted(arrays) == sorted(other_arrays)
+    for name in arrays:
+        assert np.array_equal(arrays[name], other_arrays[name])
+
+
+def _get_delta_filenames(folderpath):
+    return sorted(name for name in os.listdir(folderpath)
+                  if name.startswith('mcts_tree_delta_'))
+
+
+def test_checkpoints_and_deltas_reload_the_same_tree(tmpdir):
+    np.random.seed(0)
+    folderpath = str(tmpdir)
+    searcher = MCTSSearcher(_search_space_fn)
+    _run(searcher, 20)
+    searcher.save_state(folderpath)
+    assert _get_delta_filenames(folderpath) == []
+    for i in range(3):
+        _run(searcher, 2)
+        searcher.save_state(folderpath)
+        assert len(_get_delta_filenames(folderpath)) == i + 1
+
+        other_searcher = MCTSSearcher(_search_space_fn)
+        other_searcher.load_state(folderpath)
+        _assert_same_tree(searcher.tree, other_searcher.tree)
+
+    # the searcher that loaded the checkpoint continues it with deltas.
+    _run(other_searcher, 2)
+    other_searcher.save_state(folderpath)
+    assert len(_get_delta_filenames(folderpath)) == 4
+    searcher.load_state(folderpath)
+    _assert_same_tree(searcher.tree, other_searcher.tree)
+
+
+def test_deltas_of_older_checkpoints_are_ignored(tmpdir):
+    np.random.seed(0)
+    folderpath = str(tmpdir)
+    searcher = MCTSSearcher(_search_space_fn)
+    _run(searcher, 20)
+    searcher.save_state(folderpath)
+    _run(searcher, 2)
+    searcher.save_state(folderpath)
+    delta_filepath = os.path.join(folderpath,
+                                  _get_delta_filenames(folderpath)[0])
+    with open(delta_filepath, 'rb') as f:
+        old_delta = f.read()
+
+    # a new full checkpoint, as if it were interrupted before deleting the
+    # deltas of the previous one.
+    searcher.max_num_checkpoint_deltas = 0
+    _run(searcher, 2)
+    searcher.save_state(folderpath)
+    with open(delta_filepath, 'wb') as f:
+        f.write(old_delta)
+
+    other_searcher = MCTSSearcher(_search_space_fn)
+    other_searcher.load_state(folderpath)
+    _assert_same_tree(searcher.tree, other_searcher.tree)
+
+
+def _to_nested_lists(tree, node):
+    children = [] if tree.is_leaf(node) else [
+        _to_nested_lists(tree, tree.get_child(node, i))
+        for i in range(tree.num_children[node])
+    ]
+    return [int(tree.num_trials[node]), float(tree.sum_scores[node]), children]
+
+
+def test_loads_the_nested_lists_of_previous_versions(tmpdir):
+    np.random.seed(0)
+    searcher = MCTSSearcher(_search_space_fn)
+    _run(searcher, 20)
+    nested_lists = _to_nested_lists(searcher.tree, 0)
+    ut.write_jsonfile({'mcts_root_node': nested_lists},
+                      os.path.join(str(tmpdir), 'mcts_searcher_state.json'))
+
+    other_searcher = MCTSSearcher(_search_space_fn)
+    other_searcher.load_state(str(tmpdir))
+    assert isinstance(other_searcher.tree, MCTSTree)
+    # the nodes may be numbered differently, so the trees are compared
+    # through their nested lists.
+    assert _to_nested_lists(other_searcher.tree, 0) == nested_lists
+
+
+def test_smbo_with_mcts_rebuilds_the_tree_on_refits():
+    np.random.seed(0)
+    searcher = SMBOSearcherWithMCTSOptimizer(_search_space_fn,
+                                             DummySurrogate(), 4, 0.0, 2)
+    tokens = [searcher.sample()[3] for _ in range(2)]
+    assert searcher.mcts.tree.get_num_nodes() > 1
+    assert searcher.mcts.tree.num_trials[0] == 8
+    searcher.update_batch([0.0, 1.0], tokens)
+    tree = searcher.mcts.tree
+    assert tree.get_num_nodes() == 1 and tree.num_trials[0] == 0
+
+
+def _tree_with_children(num_trials, sum_scores):
+    tree = MCTSTree()
+    tree.expand(0, len(num_trials))
+    tree.num_trials[0] = sum(num_trials)
+    tree.num_trials[1:tree.get_num_nodes()] = num_trials
+    tree.sum_scores[1:tree.get_num_nodes()] = sum_scores
+    return tree
+
+
+def _get_uct_score(tree, i, exploration_bonus):
+    nt = tree.num_trials[1 + i]
+    return (tree.sum_scores[1 + i] / nt + exploration_bonus *
+            np.sqrt(2.0 * np.log(tree.num_trials[0]) / nt))
+
+
+def test_best_child_maximizes_the_uct_score():
+    np.random.seed(0)
+    tree = _tree_with_children([4, 1, 10, 2], [3.0, 0.5, 9.0, 0.2])
+    for exploration_bonus in [0.0, 0.1, 1.0, 10.0]:
+        scores = [_get_uct_score(tree, i, exploration_bonus) for i in range(4)]
+        assert tree.best_child(0, exploration_bonus) == np.argmax(scores)
+        # the best child among the allowed ones.
+        allowed_inds = [1, 3]
+        i = tree.best_child(0, exploration_bonus, allowed_inds)
+        assert i == allowed_inds[np.argmax([scores[j] for j in allowed_inds])]
+
+
+def test_best_child_prefers_children_that_were_not_tried():
+    np.random.seed(0)
+    tree = _tree_with_children([4, 0, 10, 0], [4.0, 0.0, 10.0, 0.0])
+    # ties are broken at random.
+    inds = set(tree.best_child(0, 1.0) for _ in range(50))
+    assert inds == set([1, 3])
+    assert tree.best_child(0, 1.0, [0, 2, 3]) == 3
+    with pytest.raises(co.InvalidArchitectureError):
+        tree.best_child(0, 1.0, [])
+
+
+def test_best_child_counts_pending_trials_with_the_virtual_loss():
+    np.random.seed(0)
+    tree = _tree_with_children([2, 2], [2.0, 1.8])
+    assert tree.best_child(0, 0.0, virtual_loss=0.0) == 0
+    tree.add_pending(tree.get_path([0]), 2)
+    assert tree.best_child(0, 0.0) == 0
+    assert tree.best_child(0, 0.0, virtual_loss=0.0) == 1
+
+
+def test_mcts_root_node_is_a_view_of_the_tree():
+    np.random.seed(0)
+    searcher = MCTSSearcher(_search_space_fn)
+    _run(searcher, 20)
+    root = searcher.mcts_root_node
+    assert isinstance(root, MCTSTreeNode)
+    assert root.num_trials == 20
+    assert sum(child.num_trials for child in root.children) == 20
+    child, i = root.best_child(1.0)
+    assert child.parent is root and child.node == searcher.tree.get_child(0, i)
+
+    child.update_stats(1.0)
+    assert searcher.tree.num_trials[child.node] == child.num_trials
+    serialization = MCTSTreeNode.serialize(root)
+    assert json.loads(json.dumps(serialization)) == _to_nested_lists(
+        searcher.tree, 0)
+    other_root = MCTSTreeNode.deserialize(serialization)
+    assert MCTSTreeNode.serialize(other_root) == serialization
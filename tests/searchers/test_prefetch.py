@@ -0,0 +1,66 @@
+import numpy as np
+import deep_architect.core as co
+import deep_architect.modules as mo
+from deep_architect.searchers.mcts import MCTSSearcher
+from deep_architect.searchers.prefetch import PrefetchingSearcher
+import search_spaces as ss
+
+
+def _search_space_fn():
+    co.Scope.reset_default_scope()
+    return mo.siso_sequential([ss.conv(), ss.conv()])
+
+
+def _get_num_pending(searcher):
+    return int(searcher.tree.num_pending[0])
+
+
+def test_discarded_samples_are_canceled():
+    np.random.seed(0)
+    mcts = MCTSSearcher(_search_space_fn, virtual_loss=0.0)
+    searcher = PrefetchingSearcher(mcts,
+                                   queue_size=4,
+                                   batch_size=2,
+                                   discard_on_update=True)
+    for _ in range(10):
+        _, _, _, token = searcher.sample()
+        searcher.update(1.0, token)
+    searcher.close()
+    # only the samples left in the queue are pending.
+    assert _get_num_pending(mcts) == searcher.get_queue_depth()
+    assert searcher.stats.num_discarded > 0
+
+    _, _, _, token = searcher.sample()
+    searcher.cancel(token)
+    assert _get_num_pending(mcts) == searcher.get_queue_depth()
+
+
+class RecordingMCTSSearcher(MCTSSearcher):
+    """Searcher that records the number of pending trials of its tree each
+    time a sample is canceled."""
+
+    def __init__(self, search_space_fn):
+        MCTSSearcher.__init__(self, search_space_fn, virtual_loss=0.0)
+        self.num_pending_lst = []
+
+    def cancel(self, searcher_eval_token):
+        self.num_pending_lst.append(_get_num_pending(self))
+        MCTSSearcher.cancel(self, searcher_eval_token)
+
+
+def test_samples_in_the_queue_are_canceled_before_the_state_is_loaded(
+        tmpdir):
+    np.random.seed(0)
+    mcts = RecordingMCTSSearcher(_search_space_fn)
+    mcts.save_state(str(tmpdir))
+    searcher = PrefetchingSearcher(mcts, queue_size=4)
+    _, _, _, token = searcher.sample()
+    searcher.update(1.0, token)
+    searcher.close()
+    num_queued = searcher.get_queue_depth()
+    assert num_queued > 0
+    searcher.load_state(str(tmpdir))
+    assert searcher.get_queue_depth() == 0
+    # the samples were canceled in the tree that sampled them.
+    assert mcts.num_pending_lst == list(range(num_queued, 0, -1))
+    assert _get_num_pending(mcts) == 0
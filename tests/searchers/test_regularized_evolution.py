@@ -0,0 +1,129 @@
+from collections import Counter
+from math import factorial
+import random
+import numpy as np
+import deep_architect.core as co
+import deep_architect.modules as mo
+import deep_architect.hyperparameters as hp
+from deep_architect.searchers.regularized_evolution import (
+    EvolutionSearcher, Population, mutatable)
+import search_spaces as ss
+
+
+def _comb(n, k):
+    if k > n:
+        return 0
+    return factorial(n) // (factorial(k) * factorial(n - k))
+
+
+def test_population_keeps_the_models_in_age_order():
+    population = Population(4)
+    for i, score in enumerate([0.5, 0.1, 0.9, 0.1]):
+        assert population.add('model%d' % i, score) == i
+    assert population.get_ids() == [0, 1, 2, 3]
+    assert population.get_oldest_id() == 0
+    # ties are broken in favor of the oldest model.
+    assert population.get_worst_id() == 1
+
+    population.remove(1)
+    assert population.get_ids() == [0, 2, 3]
+    assert population.get_worst_id() == 3
+    population.add('model4', 0.7)
+    # adding to a full population removes the oldest model.
+    population.add('model5', 0.3)
+    assert population.get_ids() == [2, 3, 4, 5]
+    assert population.get_oldest_id() == 2
+    assert [population.get_model(i) for i in population.get_ids()
+           ] == ['model2', 'model3', 'model4', 'model5']
+    assert population.get_score(4) == 0.7
+
+
+def test_population_stays_consistent_over_many_updates():
+    np.random.seed(0)
+    population = Population(20)
+    scores = {}
+    for i in range(1000):
+        if len(population) == 20:
+            if np.random.rand() < 0.5:
+                model_id = population.get_oldest_id()
+                assert model_id == min(scores)
+            else:
+                model_id = population.get_worst_id()
+                assert model_id == min(
+                    scores, key=lambda j: (scores[j], j))
+            population.remove(model_id)
+            del scores[model_id]
+        score = float(np.random.randint(10))
+        scores[population.add('model', score)] = score
+        assert population.get_ids() == sorted(scores)
+
+
+def test_tournaments_sample_models_without_replacement():
+    np.random.seed(0)
+    n = 6
+    population = Population(n)
+    # older models have higher scores, so the winner is the oldest model in
+    # the tournament.
+    for i in range(n):
+        population.add('model%d' % i, float(-i))
+    num_tournaments = 20000
+    for tournament_size in [2, 4, 6]:
+        counts = Counter(
+            population.run_tournaments(num_tournaments, tournament_size))
+        for i in range(n):
+            # probability that the model is the oldest one in the tournament.
+            p = (_comb(n - 1 - i, tournament_size - 1) /
+                 float(_comb(n, tournament_size)))
+            assert abs(counts[i] / float(num_tournaments) - p) < 0.02
+
+
+def test_tournament_ties_are_won_by_the_oldest_model():
+    np.random.seed(0)
+    population = Population(10)
+    for i in range(10):
+        population.add('model%d' % i, float(i % 2))
+    population.remove(1)
+    assert population.run_tournaments(5, 9) == [3] * 5
+
+
+def _constrained_search_space_fn():
+    co.Scope.reset_default_scope()
+    h_a = hp.Discrete([0, 1, 2, 3], name='a')
+    h_b = hp.Discrete([0, 1, 2, 3], name='b')
+    h_w = hp.Int(1, 8, name='w')
+    h_x = hp.Float(0.0, 1.0, name='x')
+    co.Constraint(lambda dh: dh.get('a', 0) + dh.get('b', 0) <= 3, {
+        'a': h_a,
+        'b': h_b
+    })
+    co.Constraint(lambda dh: dh.get('w', 2) % 2 == 0, {'w': h_w})
+    co.Constraint(lambda dh: dh.get('x', 1.0) >= 0.5, {'x': h_x})
+    return mo.siso_sequential([
+        ss.op('A', {
+            'a': h_a,
+            'b': h_b
+        }),
+        mo.siso_repeat(lambda: ss.op('W', {
+            'w': h_w,
+            'x': h_x
+        }), hp.Discrete([1, 2])),
+    ])
+
+
+def test_evolution_samples_satisfy_the_constraints():
+    random.seed(0)
+    np.random.seed(0)
+    searcher = EvolutionSearcher(_constrained_search_space_fn, mutatable, 8,
+                                 3)
+    for _ in range(200):
+        _, outputs, _, token = searcher.sample()
+        assert co.is_specified(outputs)
+        dh = {
+            h.get_name().split('.')[1].split('-')[0]: h.get_value()
+            for h in co.get_all_hyperparameters(outputs)
+        }
+        assert dh['a'] + dh['b'] <= 3
+        assert dh['w'] % 2 == 0 and dh['x'] >= 0.5
+        searcher.update(np.random.rand(), token)
+    assert searcher.stats.num_valid == 200
+    assert searcher.stats.num_rejected > 0
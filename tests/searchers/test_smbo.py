@@ -0,0 +1,59 @@
+import numpy as np
+import deep_architect.core as co
+from deep_architect.hyperparameters import Discrete as D
+from deep_architect.searchers.smbo_random import SMBOSearcher
+from deep_architect.searchers.smbo_mcts import SMBOSearcherWithMCTSOptimizer
+from deep_architect.surrogates.dummy import DummySurrogate
+import search_spaces as ss
+
+
+class CountingSurrogate(DummySurrogate):
+    """Surrogate model that gives the same score to all the models and counts
+    the models it scores."""
+
+    def __init__(self):
+        DummySurrogate.__init__(self)
+        self.num_evals = 0
+
+    def eval(self, feats):
+        self.num_evals += 1
+        return DummySurrogate.eval(self, feats)
+
+    def eval_batch(self, feats_lst):
+        self.num_evals += len(feats_lst)
+        return [DummySurrogate.eval(self, feats) for feats in feats_lst]
+
+
+def _search_space_fn():
+    co.Scope.reset_default_scope()
+    return ss.op('Op', {'h': D([0, 1, 2])})
+
+
+def _get_searchers(surr_model, num_samples):
+    return [
+        SMBOSearcher(_search_space_fn, surr_model, num_samples, 0.0),
+        SMBOSearcherWithMCTSOptimizer(_search_space_fn, surr_model,
+                                      num_samples, 0.0, 100)
+    ]
+
+
+def test_sample_batch_scores_num_samples_models_per_model():
+    for searcher in _get_searchers(CountingSurrogate(), 4):
+        np.random.seed(0)
+        searcher.surr_model.num_evals = 0
+        samples = searcher.sample_batch(3)
+        assert len(samples) == 3
+        assert searcher.surr_model.num_evals == 12
+
+
+def test_sample_batch_returns_distinct_models_if_possible():
+    for searcher in _get_searchers(CountingSurrogate(), 4):
+        np.random.seed(0)
+        # all the models have the same score, and there are three distinct
+        # models in the search space.
+        samples = searcher.sample_batch(3)
+        assert sorted(vs[0] for (_, _, vs, _) in samples) == [0, 1, 2]
+        samples = searcher.sample_batch(5)
+        assert len(samples) == 5
+        assert set(vs[0] for (_, _, vs, _) in samples) == set([0, 1, 2])
+        assert all(co.is_specified(outputs) for (_, outputs, _, _) in samples)
@@ -0,0 +1,159 @@
+from collections import Counter
+import numpy as np
+import pytest
+import deep_architect.core as co
+import deep_architect.modules as mo
+import deep_architect.hyperparameters as hp
+import deep_architect.searchers.uniform as un
+from deep_architect.hyperparameters import Discrete as D
+import search_spaces as ss
+
+
+def _pool():
+    return ss.op('Pool', {'type': D(['max', 'avg'])})
+
+
+def _search_space_fn():
+    co.Scope.reset_default_scope()
+    return mo.siso_sequential([
+        mo.siso_or([
+            _pool, lambda: mo.siso_repeat(
+                lambda: mo.siso_optional(_pool, D([0, 1])), D([1, 2]))
+        ], D([0, 1])),
+        _pool(),
+    ])
+
+
+def _enumerate_sequences(search_space_fn, vs=()):
+    """All the sequences of values that specify the search space."""
+    _, outputs = search_space_fn()
+    it = co.unassigned_independent_hyperparameter_iterator(outputs)
+    for v in vs:
+        next(it).assign_value(v)
+    h = next(it, None)
+    if h is None:
+        return [tuple(vs)]
+    if isinstance(h, hp.Int):
+        values = range(h.low, h.high + 1)
+    else:
+        values = h.vs
+    return sum([
+        _enumerate_sequences(search_space_fn,
+                             tuple(vs) + (v,)) for v in values
+    ], [])
+
+
+def test_counts_and_samples_sequences_of_values_uniformly():
+    counter = un.ArchitectureCounter(_search_space_fn)
+    sequences = _enumerate_sequences(_search_space_fn)
+    assert counter.get_num_architectures() == len(sequences)
+
+    np.random.seed(0)
+    num_samples = 100 * len(sequences)
+    counts = Counter()
+    for _ in range(num_samples):
+        _, outputs = _search_space_fn()
+        counts[tuple(counter.specify(outputs))] += 1
+    assert set(counts) == set(sequences)
+    assert max(counts.values()) < 2 * min(counts.values())
+
+
+def test_samples_counts_larger_than_machine_integers():
+    np.random.seed(0)
+    for n in [1, 2, 3, 2**31, 2**31 + 1, 3**100]:
+        rs = [un._randint(n) for _ in range(100)]
+        assert all(0 <= r < n for r in rs)
+    assert max(un._randint(3**100) for _ in range(100)) > 2**64
+
+
+def _optional_pool(types):
+    return mo.siso_optional(lambda: ss.op('Pool', {'type': D(types)}),
+                            D([0, 1]))
+
+
+def _optional_pools(types_lst):
+    # optional pooling modules, with the given types for each of them.
+    return mo.siso_sequential([_optional_pool(types) for types in types_lst])
+
+
+def _block():
+    return mo.siso_or([
+        _pool, lambda: mo.siso_repeat(lambda: _optional_pools([['max']]),
+                                      D([1, 2]))
+    ], D([0, 1]))
+
+
+def _repeated_search_space_fn():
+    co.Scope.reset_default_scope()
+    return mo.siso_sequential([
+        mo.siso_repeat(_block, D([1, 2])),
+        _optional_pools([['max'], ['max', 'avg']]),
+    ])
+
+
+def test_sub_spaces_with_the_same_substitution_functions_are_shared():
+    counter = un.ArchitectureCounter(_repeated_search_space_fn)
+    sequences = set(_enumerate_sequences(_repeated_search_space_fn))
+    assert counter.get_num_architectures() == len(sequences)
+    # the blocks and the optional modules of the repetitions share their
+    # sub-spaces, but the optional modules with different types do not.
+    assert len(counter.node_to_alias) > 0
+    assert len(set(counter.node_to_alias.values())) < len(
+        counter.node_to_alias)
+    root_counts = [
+        counter.node_to_count[counter._resolve(node)]
+        for node in counter.root_nodes
+    ]
+    assert sorted(root_counts) == [2, 3, 72]
+
+    np.random.seed(0)
+    for _ in range(100):
+        _, outputs = _repeated_search_space_fn()
+        assert tuple(counter.specify(outputs)) in sequences
+
+
+def test_shared_hyperparameters_are_not_supported():
+
+    def search_space_fn():
+        co.Scope.reset_default_scope()
+        h_opt = D([0, 1])
+        return mo.siso_sequential([
+            mo.siso_optional(_pool, h_opt),
+            mo.siso_optional(_pool, h_opt)
+        ])
+
+    with pytest.raises(ValueError, match='shared by more than one module'):
+        un.ArchitectureCounter(search_space_fn)
+
+
+def _int_search_space_fn():
+    co.Scope.reset_default_scope()
+    return mo.siso_repeat(
+        lambda: ss.op('Conv', {
+            'filters': hp.Int(16, 19),
+            'width': D([1, 3])
+        }), hp.Int(1, 3))
+
+
+def test_counts_integer_hyperparameters():
+    counter = un.ArchitectureCounter(_int_search_space_fn)
+    sequences = set(_enumerate_sequences(_int_search_space_fn))
+    assert counter.get_num_architectures() == len(sequences) == 8 + 8**2 + 8**3
+    # only the values of the number of repetitions are explored, i.e., one
+    # specification to discover the root and one per repetition count.
+    assert counter.num_specifications <= 4
+
+    np.random.seed(0)
+    for _ in range(100):
+        _, outputs = _int_search_space_fn()
+        assert tuple(counter.specify(outputs)) in sequences
+
+
+def test_continuous_hyperparameters_are_not_supported():
+
+    def search_space_fn():
+        co.Scope.reset_default_scope()
+        return ss.op('Dropout', {'rate': hp.Float(0.0, 0.5)})
+
+    with pytest.raises(ValueError, match='discrete and integer'):
+        un.ArchitectureCounter(search_space_fn)
@@ -0,0 +1,572 @@
+import gc
+import json
+import os
+import random
+import sys
+import threading
+import weakref
+import numpy as np
+import deep_architect.core as co
+import deep_architect.modules as mo
+from six import itervalues
+from deep_architect.hyperparameters import Discrete as D
+from deep_architect.searchers.common import random_specify, specify
+import search_spaces as ss
+
+_data_folderpath = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def _read_jsonl(filename):
+    with open(os.path.join(_data_folderpath, filename)) as f:
+        return [json.loads(line) for line in f]
+
+
+def _describe(outputs):
+    # json round trip to compare with the descriptions read from files.
+    return json.loads(json.dumps(ss.describe(outputs)))
+
+
+def test_specify_replays_values_logged_by_the_first_version():
+    # the values were sampled with random_specify by the first version of
+    # the library. replaying them must give the same architectures.
+    for case in _read_jsonl('nested_search_space_specifications.jsonl'):
+        _, outputs = ss.nested_search_space()
+        specify(outputs, case['hyperp_value_lst'])
+        assert co.is_specified(outputs)
+        assert _describe(outputs) == case['description']
+
+
+def test_specify_replays_values_sampled_by_random_specify():
+    for seed in range(20):
+        random.seed(seed)
+        np.random.seed(seed)
+        _, outputs = ss.nested_search_space()
+        vs = random_specify(outputs)
+        _, outputs_replay = ss.nested_search_space()
+        specify(outputs_replay, vs)
+        assert _describe(outputs_replay) == _describe(outputs)
+
+
+def test_iterator_visits_rounds_in_backward_order():
+    co.Scope.reset_default_scope()
+    h_or = D([0, 1])
+    h_a = D([1, 2])
+    h_b = D([3, 4])
+    h_c = D([5, 6])
+    h_d = D([7, 8])
+    inputs, outputs = mo.siso_sequential([
+        ss.op('A', {'h': h_a}),
+        mo.siso_or([
+            lambda: mo.siso_sequential(
+                [ss.op('C', {'h': h_c}),
+                 ss.op('D', {'h': h_d})]), mo.identity
+        ], h_or),
+        ss.op('B', {'h': h_b}),
+    ])
+
+    hs = []
+    for h in co.unassigned_independent_hyperparameter_iterator(outputs):
+        hs.append(h)
+        h.assign_value(h.vs[0])
+    # the hyperparameters created by the substitution are visited after the
+    # ones present before it, and each round goes backward from the outputs.
+    assert hs == [h_b, h_or, h_a, h_d, h_c]
+
+
+def _select_search_space(h_sel, h_x, h_b):
+    co.Scope.reset_default_scope()
+
+    def substitution_fn(dh):
+        inputs, outputs = mo.identity()
+        return {'in%d' % dh['sel']: inputs['in']}, outputs
+
+    inputs, outputs = mo.SubstitutionModule(
+        'Select',
+        substitution_fn, {'sel': h_sel}, ['in0', 'in1'], ['out'],
+        allow_input_subset=True).get_io()
+    x_inputs, x_outputs = mo.siso_or([lambda: ss.op('B', {'h': h_b})], h_x)
+    mo.identity()[1]['out'].connect(inputs['in0'])
+    x_outputs['out'].connect(inputs['in1'])
+    return outputs
+
+
+def test_iterator_skips_hyperparameters_disconnected_by_substitutions():
+    for sel in [0, 1]:
+        h_sel = D([sel])
+        h_x = D([0])
+        h_b = D([2])
+        outputs = _select_search_space(h_sel, h_x, h_b)
+        hs = []
+        for h in co.unassigned_independent_hyperparameter_iterator(outputs):
+            hs.append(h)
+            h.assign_value(h.vs[0])
+        # choosing the first input disconnects the fragment created by h_x.
+        assert hs[:2] == [h_sel, h_x]
+        assert hs[2:] == ([] if sel == 0 else [h_b])
+        assert co.is_specified(outputs)
+
+
+def _reference_iterator(outputs):
+    # visits the hyperparameters as the first version of the library, going
+    # over the whole graph in each round.
+    while True:
+        hs = [
+            h for h in co.get_all_hyperparameters(outputs)
+            if not isinstance(h, co.DependentHyperparameter) and
+            not h.has_value_assigned()
+        ]
+        if len(hs) == 0:
+            break
+        for h in hs:
+            if not h.has_value_assigned():
+                yield h
+
+
+def _nested_or_search_space(depth, buffered):
+    co.Scope.reset_default_scope()
+
+    def fn(i):
+        if i == 0:
+            return ss.conv()
+        return mo.siso_or([ss.conv, lambda: fn(i - 1)], D([0, 1]))
+
+    inputs, outputs = mo.siso_sequential([ss.conv(), fn(depth)])
+    # without buffering, the dictionary of outputs keeps the outputs of the
+    # first substitution, so the rest of the graph is not reached.
+    return mo.buffer_io(inputs, outputs) if buffered else (inputs, outputs)
+
+
+def _shared_search_space():
+    co.Scope.reset_default_scope()
+    h = D([0, 1])
+    # the substitution modules created by the repeat are substituted right
+    # away if the shared hyperparameter is assigned before.
+    return mo.buffer_io(*mo.siso_sequential([
+        mo.siso_repeat(
+            lambda: mo.siso_or([
+                ss.conv, lambda: mo.siso_optional(ss.conv, D([0, 1]))
+            ], h), D([1, 2])),
+        mo.siso_or([ss.conv, ss.conv], h),
+    ]))
+
+
+def test_iterator_visits_the_hyperparameters_of_the_reference():
+    search_space_fns = [
+        ss.nested_search_space,
+        lambda: _nested_or_search_space(8, True),
+        lambda: _nested_or_search_space(8, False),
+        _shared_search_space,
+    ]
+    for search_space_fn in search_space_fns:
+        for seed in range(10):
+            names_lst = []
+            for iterator in [
+                    co.unassigned_independent_hyperparameter_iterator,
+                    lambda outputs: co.
+                    unassigned_independent_hyperparameter_iterator(
+                        outputs, {}), _reference_iterator
+            ]:
+                rng = random.Random(seed)
+                _, outputs = search_space_fn()
+                names = []
+                for h in iterator(outputs):
+                    names.append(h.get_name())
+                    h.assign_value(h.vs[rng.randint(0, len(h.vs) - 1)])
+                names_lst.append(names)
+            assert names_lst[0] == names_lst[1] == names_lst[2]
+
+
+def test_iterator_records_parents():
+    co.Scope.reset_default_scope()
+    h_repeat = D([2])
+    h_filters = D([32])
+    inputs, outputs = mo.siso_sequential([
+        ss.op('A', {'h': D([1])}),
+        mo.siso_repeat(
+            lambda: mo.siso_or([
+                lambda: ss.op('B', {'filters': h_filters}), mo.identity
+            ], D([0])), h_repeat),
+    ])
+
+    hyperp_to_parent = {}
+    hs = []
+    for h in co.unassigned_independent_hyperparameter_iterator(
+            outputs, hyperp_to_parent):
+        hs.append(h)
+        h.assign_value(h.vs[0])
+    assert len(hs) == 5
+    h_ors = [h for h in hs if hyperp_to_parent.get(h) is h_repeat]
+    assert len(h_ors) == 2
+    assert hyperp_to_parent[h_filters] in h_ors
+    assert all(h not in hyperp_to_parent for h in hs[:2])
+
+
+def _get_specified_architecture(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    inputs, outputs = mo.buffer_io(*ss.nested_search_space(reset_scope=False))
+    random_specify(outputs)
+    return list(inputs.values()), list(outputs.values())
+
+
+def test_module_eval_seq_cache_is_not_invalidated_by_other_graphs():
+    co.Scope.reset_default_scope()
+    input_lst, output_lst = _get_specified_architecture(0)
+    cache = co.ModuleEvalSeqCache()
+    module_seq = cache.get(input_lst, output_lst)
+    assert module_seq == co.determine_module_eval_seq(input_lst, output_lst)
+    # building and specifying other architectures connects many inputs.
+    _get_specified_architecture(1)
+    assert cache.get(input_lst, output_lst) is module_seq
+
+
+def test_module_eval_seq_cache_is_invalidated_by_changes_to_the_graph():
+    co.Scope.reset_default_scope()
+    input_lst, output_lst = _get_specified_architecture(0)
+    cache = co.ModuleEvalSeqCache()
+    module_seq = cache.get(input_lst, output_lst)
+
+    # inserts a module before the output.
+    ix = output_lst[0].get_module().inputs['in']
+    ox = ix.get_connected_output()
+    ix.disconnect()
+    (m_inputs, m_outputs) = ss.op('Extra', {})
+    m_inputs['in'].connect(ox)
+    ix.connect(m_outputs['out'])
+    new_module_seq = cache.get(input_lst, output_lst)
+    assert new_module_seq == co.determine_module_eval_seq(
+        input_lst, output_lst)
+    assert len(new_module_seq) == len(module_seq) + 1
+
+    # connecting the outputs of a module of the sequence to a new module
+    # changes the sequence if no outputs are given.
+    module_seq = cache.get(input_lst)
+    (m_inputs, _) = ss.op('Dangling', {})
+    m_inputs['in'].connect(ox)
+    assert len(cache.get(input_lst)) == len(module_seq) + 1
+
+
+def test_dependent_hyperparameter_is_assigned_once_all_parents_are():
+    co.Scope.reset_default_scope()
+    h_a = D([1, 2])
+    h_b = D([3, 4])
+    h = co.DependentHyperparameter(lambda dh: dh['a'] * dh['b'], {
+        'a': h_a,
+        'b': h_b
+    })
+    assert h._num_pending == 2
+    h_a.assign_value(2)
+    assert h._num_pending == 1 and not h.has_value_assigned()
+    h_b.assign_value(3)
+    assert h._num_pending == 0 and h.get_value() == 6
+
+    # parents that are assigned before do not count as pending.
+    h_other = co.DependentHyperparameter(lambda dh: dh['a'] + 1, {'a': h_a})
+    assert h_other._num_pending == 0 and h_other.get_value() == 3
+
+
+def test_memo_table_calls_the_function_once_per_combination():
+    memo = co.MemoTable(max_size=2)
+    calls = []
+
+    def fn(dh):
+        calls.append(dh)
+        return dh['a'] + dh['b']
+
+    for a, b in [(1, 3), (1, 3), (2, 3), (1, 3)]:
+        co.Scope.reset_default_scope()
+        h_a = D([1, 2])
+        h_b = D([3, 4])
+        h = co.DependentHyperparameter(fn, {'a': h_a, 'b': h_b}, memo=memo)
+        h_a.assign_value(a)
+        h_b.assign_value(b)
+        assert h.get_value() == a + b
+    assert len(calls) == 2
+    assert memo.num_hits == 2 and memo.num_misses == 2
+
+    # the least recently used value is dropped once the table is full.
+    assert memo.get_value(fn, {'a': 2, 'b': 4}) == 6
+    assert len(memo) == 2
+    memo.get_value(fn, {'a': 2, 'b': 3})
+    assert memo.num_misses == 4 and len(calls) == 4
+
+    # values that are not hashable are not kept.
+    assert memo.get_value(lambda dh: len(dh['a']), {'a': [1, 2]}) == 2
+    assert len(memo) == 2
+
+
+def _sample_weak_refs(num_samples):
+    # weak references to the modules of the architectures sampled, which are
+    # not kept otherwise.
+    refs = []
+    for _ in range(num_samples):
+        _, outputs = ss.nested_search_space(reset_scope=False)
+        random_specify(outputs)
+        refs.extend(
+            weakref.ref(ox.get_module()) for ox in outputs.values())
+    return refs
+
+
+def test_scope_with_weak_references_releases_sampled_architectures():
+    np.random.seed(0)
+    co.Scope.default_scope = co.Scope(weak_references=True)
+    refs = _sample_weak_refs(20)
+    gc.collect()
+    assert all(r() is None for r in refs)
+    num_names = len(co.Scope.default_scope.elem_to_name)
+    # the scope does not grow with the number of architectures sampled.
+    _sample_weak_refs(20)
+    gc.collect()
+    assert len(co.Scope.default_scope.elem_to_name) <= num_names
+
+
+def test_reset_default_scope_releases_sampled_architectures():
+    np.random.seed(0)
+    refs = []
+    for _ in range(20):
+        co.Scope.reset_default_scope()
+        refs.extend(_sample_weak_refs(1))
+    co.Scope.reset_default_scope()
+    gc.collect()
+    assert all(r() is None for r in refs)
+
+    # a scope with regular references keeps them alive otherwise.
+    refs = _sample_weak_refs(5)
+    gc.collect()
+    assert all(r() is not None for r in refs)
+    co.Scope.reset_default_scope()
+
+
+def _get_names(scope):
+    # names of the objects of the nested search space created in the scope.
+    # the values are fixed, as the random state is shared by the threads.
+    with scope:
+        inputs, outputs = ss.nested_search_space(reset_scope=False)
+        case = _read_jsonl('nested_search_space_specifications.jsonl')[0]
+        specify(outputs, case['hyperp_value_lst'])
+        modules = []
+        co.traverse_backward(outputs, modules.append)
+        hyperps = list(co.get_all_hyperparameters(outputs))
+    return [x.get_name() for x in modules + hyperps] + [
+        repr(x) for m in modules
+        for x in list(m.inputs.values()) + list(m.outputs.values())
+    ]
+
+
+def test_scope_creates_names_with_a_counter_per_prefix():
+    scope = co.Scope()
+    names = [scope.get_unused_name('a') for _ in range(3)]
+    names.append(scope.get_unused_name('b'))
+    assert names == ['a0', 'a1', 'a2', 'b0']
+    # names registered directly are skipped.
+    h = D([0])
+    scope.register('a3', h)
+    scope.register('a5', D([0]))
+    assert scope.get_unused_name('a') == 'a4'
+    assert scope.get_unused_name('a') == 'a6'
+    assert scope.get_elem('a3') is h and scope.get_name(h) == 'a3'
+
+
+def test_scope_with_lazy_names_creates_the_same_names():
+    names = _get_names(co.Scope())
+    assert len(set(names)) == len(names)
+    for scope in [
+            co.Scope(lazy_names=True),
+            co.Scope(lazy_names=True, weak_references=True)
+    ]:
+        assert _get_names(scope) == names
+
+    scope = co.Scope(lazy_names=True)
+    with scope:
+        _, outputs = ss.conv()
+    # the names are only built when requested.
+    assert all(isinstance(name, tuple)
+               for name in scope.elem_to_name.values())
+    ox = outputs['out']
+    assert scope.get_elem(ox.get_name()) is ox
+
+
+def test_scope_context_manager_restores_the_default_scope():
+    co.Scope.reset_default_scope()
+    default_scope = co.Scope.default_scope
+    with co.Scope() as outer_scope:
+        assert co.Scope.default_scope is outer_scope
+        with co.Scope() as inner_scope:
+            h = D([0])
+            assert co.Scope.default_scope is inner_scope
+        assert co.Scope.default_scope is outer_scope
+        try:
+            with co.Scope():
+                raise ValueError()
+        except ValueError:
+            pass
+        assert co.Scope.default_scope is outer_scope
+    assert co.Scope.default_scope is default_scope
+    assert h.scope is inner_scope and h.get_name() == 'H.Discrete-0'
+    assert len(default_scope.elem_to_name) == 0
+
+
+def test_default_scope_is_local_to_each_thread():
+    num_threads = 4
+    barrier = threading.Barrier(num_threads)
+    thread_names = [None] * num_threads
+
+    def fn(i):
+        co.Scope.reset_default_scope()
+        scope = co.Scope.default_scope
+        barrier.wait()
+        # the threads sample at the same time in their own scopes.
+        thread_names[i] = _get_names(scope)
+        assert co.Scope.default_scope is scope
+
+    co.Scope.reset_default_scope()
+    default_scope = co.Scope.default_scope
+    threads = [
+        threading.Thread(target=fn, args=(i,)) for i in range(num_threads)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    names = _get_names(co.Scope())
+    assert all(other_names == names for other_names in thread_names)
+    assert co.Scope.default_scope is default_scope
+    assert len(default_scope.elem_to_name) == 0
+
+
+def test_default_scope_is_local_to_each_context():
+    if sys.version_info < (3, 7):
+        return
+    import contextvars
+    co.Scope.reset_default_scope()
+    default_scope = co.Scope.default_scope
+
+    def fn():
+        co.Scope.reset_default_scope()
+        return co.Scope.default_scope
+
+    context = contextvars.copy_context()
+    scope = context.run(fn)
+    assert scope is not default_scope
+    assert co.Scope.default_scope is default_scope
+    assert context.run(lambda: co.Scope.default_scope) is scope
+
+
+def _substitution_chain(h, depth):
+    # each substitution creates the next substitution module of the chain.
+    if depth == 0:
+        return mo.identity()
+    return mo.substitution_module(
+        'Chain', lambda dh: _substitution_chain(h, depth - 1), {'h': h},
+        ['in'], ['out'])
+
+
+def test_specify_substitution_chain_deeper_than_the_recursion_limit():
+    co.Scope.reset_default_scope()
+    depth = 2 * sys.getrecursionlimit()
+    h = D([0])
+    inputs, outputs = _substitution_chain(h, depth)
+    specify(outputs, [0])
+    assert co.is_specified(outputs)
+    modules = []
+    co.traverse_backward(outputs, modules.append)
+    assert [type(m) for m in modules] == [mo.Identity]
+    co.forward({inputs['in']: 3})
+    assert outputs['out'].val == 3
+
+
+class _Affine(co.Module):
+    """Module that scales and shifts its input."""
+
+    def __init__(self, a, b, barrier=None):
+        co.Module.__init__(self, name='Affine')
+        self._register(['in'], ['out'], {})
+        self.a = a
+        self.b = b
+        self.barrier = barrier
+
+    def _compile(self):
+        pass
+
+    def _forward(self):
+        if self.barrier is not None:
+            self.barrier.wait()
+        self.outputs['out'].val = self.a * self.inputs['in'].val + self.b
+
+
+def _branching_graph(depths, barrier=None):
+    # branches of affine modules of the given depths between a shared input
+    # module and a module that sums them.
+    co.Scope.reset_default_scope()
+    inputs, outputs = ss.op('In', {})
+    combine_inputs, combine_outputs = ss.op(
+        'Combine', {}, ['in%d' % i for i in range(len(depths))])
+    intermediate_outputs = [outputs['out']]
+    for i, depth in enumerate(depths):
+        prev_ox = outputs['out']
+        for j in range(depth):
+            m = _Affine(i + 2, j, barrier if j == 0 else None)
+            prev_ox.connect(m.inputs['in'])
+            prev_ox = m.outputs['out']
+            intermediate_outputs.append(prev_ox)
+        prev_ox.connect(combine_inputs['in%d' % i])
+    return inputs, combine_outputs, intermediate_outputs
+
+
+def _forward_branching_graph(depths, **kwargs):
+    inputs, outputs, intermediate_outputs = _branching_graph(depths)
+    max_num_values = co.forward({inputs['in']: 1}, **kwargs)
+    return outputs['out'], intermediate_outputs, max_num_values
+
+
+def test_forward_frees_intermediate_values():
+    depths = [1, 3, 8]
+    ox, intermediate_outputs, max_num_values = _forward_branching_graph(
+        depths)
+    val = ox.val
+    assert all(x.val is not None for x in intermediate_outputs)
+    assert max_num_values == sum(depths) + 3
+
+    ox, intermediate_outputs, max_num_values = _forward_branching_graph(
+        depths, free_values=True)
+    assert ox.val == val
+    assert all(x.val is None for x in intermediate_outputs)
+    modules = []
+    co.traverse_backward({'out': ox}, modules.append)
+    assert all(
+        ix.val is None for m in modules for ix in itervalues(m.inputs))
+    # at most one value per branch, plus the value that is passed along.
+    assert max_num_values <= len(depths) + 2
+
+    # outputs that are needed are kept, even if they are connected.
+    inputs, outputs, intermediate_outputs = _branching_graph(depths)
+    co.forward({inputs['in']: 1},
+               free_values=True,
+               output_lst=[outputs['out'], intermediate_outputs[-1]])
+    assert outputs['out'].val == val
+    assert intermediate_outputs[-1].val is not None
+    assert intermediate_outputs[-2].val is None
+
+
+def test_forward_with_workers_gives_the_same_values_as_sequential():
+    depths = [1, 3, 8, 2]
+    ox, _, _ = _forward_branching_graph(depths)
+    val = ox.val
+    for num_workers in [2, 4]:
+        for free_values in [False, True]:
+            other_ox, intermediate_outputs, _ = _forward_branching_graph(
+                depths, free_values=free_values, num_workers=num_workers)
+            assert other_ox.val == val
+            assert all((x.val is None) == free_values
+                       for x in intermediate_outputs)
+
+
+def test_forward_with_workers_evaluates_branches_at_the_same_time():
+    # the first module of each branch waits for the others, so the forward
+    # pass only finishes if the branches are evaluated at the same time.
+    depths = [2, 2, 2]
+    barrier = threading.Barrier(len(depths), timeout=10.0)
+    inputs, outputs, _ = _branching_graph(depths, barrier)
+    co.forward({inputs['in']: 1}, num_workers=len(depths))
+    assert not barrier.broken
+    assert outputs['out'].val == _forward_branching_graph(depths)[0].val
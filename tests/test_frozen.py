@@ -0,0 +1,123 @@
+import json
+import numpy as np
+import deep_architect.core as co
+import deep_architect.modules as mo
+from deep_architect.frozen import FrozenArchitecture, freeze, get_fingerprint
+from deep_architect.hyperparameters import Discrete as D
+from deep_architect.searchers.common import random_specify, specify
+import search_spaces as ss
+
+
+def _sample(seed):
+    np.random.seed(seed)
+    inputs, outputs = ss.nested_search_space()
+    vs = random_specify(outputs)
+    return inputs, outputs, vs
+
+
+def test_fingerprint_of_nested_search_spaces_without_buffer_io():
+    # the outermost module of the nested search space is substituted in
+    # several rounds, so the dictionaries it returned keep replaced inputs.
+    description_to_fingerprint = {}
+    for seed in range(50):
+        inputs, outputs, _ = _sample(seed)
+        fingerprint = get_fingerprint(inputs, outputs)
+        description = json.dumps(ss.describe(outputs), sort_keys=True)
+        assert description_to_fingerprint.setdefault(
+            description, fingerprint) == fingerprint
+    # different architectures have different fingerprints.
+    fingerprints = list(description_to_fingerprint.values())
+    assert len(set(fingerprints)) == len(fingerprints)
+
+
+def test_fingerprint_does_not_depend_on_the_scope():
+    for seed in range(10):
+        inputs, outputs, vs = _sample(seed)
+        fingerprint = get_fingerprint(inputs, outputs)
+        for scope in [
+                co.Scope(lazy_names=True),
+                co.Scope(lazy_names=True, weak_references=True)
+        ]:
+            with scope:
+                # names are shifted by the modules created before.
+                ss.conv()
+                other_inputs, other_outputs = ss.nested_search_space(
+                    reset_scope=False)
+                specify(other_outputs, vs)
+                assert get_fingerprint(other_inputs,
+                                       other_outputs) == fingerprint
+
+
+def _conv_search_space(num_unused):
+    co.Scope.reset_default_scope()
+    for _ in range(num_unused):
+        ss.conv()
+    return mo.siso_sequential([ss.conv(), ss.conv()])
+
+
+def test_fingerprint_ignores_modules_that_do_not_reach_the_outputs():
+    fingerprints = set()
+    for num_unused in [0, 1, 2]:
+        inputs, outputs = _conv_search_space(num_unused)
+        specify(outputs, [32, 1, 64, 3])
+        fingerprints.add(get_fingerprint(inputs, outputs))
+    assert len(fingerprints) == 1
+
+
+def test_fingerprint_depends_on_the_values():
+    fingerprints = set()
+    for vs in [[32, 1, 64, 3], [64, 1, 32, 3], [32, 1, 64, 5]]:
+        inputs, outputs = _conv_search_space(0)
+        specify(outputs, vs)
+        fingerprints.add(get_fingerprint(inputs, outputs))
+        # hyperparameters that are not associated to modules count as well.
+        h_lr = D([0.1, 0.01])
+        h_lr.assign_value(0.1)
+        fingerprints.add(get_fingerprint(inputs, outputs, {'lr': h_lr}))
+    assert len(fingerprints) == 6
+
+
+def test_frozen_architecture_round_trip():
+    for seed in range(10):
+        inputs, outputs, _ = _sample(seed)
+        a = freeze(inputs, outputs)
+        d = json.loads(json.dumps(a.to_dict()))
+        other = FrozenArchitecture.from_dict(d)
+        assert other == a and hash(other) == hash(a)
+        assert other.get_hash() == a.get_hash()
+        assert other.to_dict() == a.to_dict()
+        assert other.extract_features() == a.extract_features()
+
+
+def test_frozen_architecture_is_topologically_sorted():
+    for seed in range(10):
+        inputs, outputs, _ = _sample(seed)
+        a = freeze(inputs, outputs)
+        src, dst = a.get_connections()
+        assert np.all(src < dst)
+        assert a.get_num_modules() == len(ss.describe(outputs))
+        assert a.get_adjacency_matrix().sum() == a.get_num_connections()
+
+
+def test_frozen_architecture_hash_is_stable():
+    # the hash only depends on the contents, e.g., not on the scope or on the
+    # order in which the values are assigned, and it is not changed by
+    # computing it or by the other methods.
+    inputs, outputs = _conv_search_space(0)
+    specify(outputs, [32, 1, 64, 3])
+    a = freeze(inputs, outputs)
+    h = a.get_hash()
+    a.get_module_depths()
+    a.extract_features()
+    assert a.get_hash() == h
+
+    inputs, outputs = _conv_search_space(1)
+    hs = co.get_all_hyperparameters(outputs)
+    for h_x, v in reversed(list(zip(hs, [32, 1, 64, 3]))):
+        h_x.assign_value(v)
+    assert freeze(inputs, outputs).get_hash() == h
+
+    inputs, outputs = _conv_search_space(0)
+    specify(outputs, [32, 1, 64, 5])
+    assert freeze(inputs, outputs).get_hash() != h
+    assert freeze(inputs, outputs) != a
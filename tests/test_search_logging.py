@@ -0,0 +1,33 @@
+import os
+from deep_architect.search_logging import ResultCache
+
+
+def test_result_cache_reloads_results(tmpdir):
+    filepath = str(tmpdir.join('cache.jsonl'))
+    cache = ResultCache(filepath)
+    cache.add('a', {'acc': 0.5})
+    cache.add('b', {'acc': 0.75})
+
+    cache = ResultCache(filepath)
+    assert len(cache) == 2
+    assert cache.get('a') == {'acc': 0.5} and cache.get('b') == {'acc': 0.75}
+    assert 'c' not in cache and cache.get('c') is None
+
+
+def test_result_cache_drops_incomplete_last_line(tmpdir):
+    filepath = str(tmpdir.join('cache.jsonl'))
+    cache = ResultCache(filepath)
+    cache.add('a', {'acc': 0.5})
+    # simulates a search interrupted while writing a result.
+    with open(filepath, 'a') as f:
+        f.write('{"fingerprint": "b", "res')
+    size = os.path.getsize(filepath)
+
+    cache = ResultCache(filepath)
+    assert len(cache) == 1
+    assert os.path.getsize(filepath) < size
+    cache.add('c', {'acc': 0.25})
+
+    cache = ResultCache(filepath)
+    assert len(cache) == 2
+    assert cache.get('a') == {'acc': 0.5} and cache.get('c') == {'acc': 0.25}